@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# bench_cli_startup.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Startup benchmark for `gradience-cli`, based on `python -X importtime`.
+
+Runs a CLI command several times, reports wall time and the total time
+spent importing modules, and lists the slowest top-level imports.
+Exits with status 1 if import time goes over `--budget` milliseconds.
+
+    python3 benchmarks/bench_cli_startup.py --cli builddir/bin/gradience-cli presets
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+
+
+def run_cli(cli_path, command):
+    start = time.perf_counter()
+
+    process = subprocess.run([sys.executable, "-X", "importtime", cli_path, *command],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+
+    wall_time = time.perf_counter() - start
+
+    return wall_time, parse_importtime(process.stderr)
+
+
+def parse_importtime(output):
+    """
+    Returns cumulative import time in microseconds for each top-level
+    import (nested imports are already counted in their parents).
+    """
+    imports = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        _self_time, cumulative, name = line[len("import time:"):].split("|", 2)
+
+        # Nested imports are indented under their parent module
+        if name.startswith(" ") and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cli", default=shutil.which("gradience-cli"), help="path to gradience-cli script")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=150, help="import time budget in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="amount of slowest imports to list")
+    parser.add_argument("command", nargs="*", default=["presets"], help="CLI command to run (default: presets)")
+    args = parser.parse_args()
+
+    if not args.cli:
+        parser.error("gradience-cli not found, pass its path with --cli")
+
+    results = [run_cli(args.cli, args.command) for _run in range(args.runs)]
+
+    best_wall_time = min(wall_time for wall_time, _imports in results)
+    best_imports = min((imports for _wall_time, imports in results), key=lambda imports: sum(imports.values()))
+    import_time = sum(best_imports.values()) / 1000
+
+    print(f"gradience-cli {' '.join(args.command)}: {best_wall_time * 1000:.1f} ms wall time, "
+          f"{import_time:.1f} ms importing modules (budget: {args.budget:.0f} ms)")
+
+    slowest = sorted(best_imports.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for name, cumulative in slowest:
+        print(f"{cumulative / 1000:10.1f} ms  {name}")
+
+    if import_time > args.budget:
+        print("Import time budget exceeded", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
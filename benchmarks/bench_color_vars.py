@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# bench_color_vars.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark for `color_vars_to_color_code()` on presets with deep alias chains.
+
+Run it with a built Gradience package on `PYTHONPATH`, eg. after running
+`local.sh`:
+
+    PYTHONPATH=builddir/lib/python3.11/site-packages python3 benchmarks/bench_color_vars.py
+"""
+
+import argparse
+import timeit
+
+from gradience.backend.utils.colors import color_vars_to_color_code
+
+from fixtures import make_palette, make_variables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chains", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=40)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    palette = make_palette()
+    variables = make_variables(args.chains, args.depth)
+
+    timings = timeit.repeat(
+        lambda: color_vars_to_color_code(variables, palette),
+        number=args.number, repeat=args.repeat)
+
+    best = min(timings) / args.number
+    print(f"color_vars_to_color_code: {len(variables)} variables "
+          f"({args.chains} chains, depth {args.depth}): {best * 1000:.3f} ms per call")
+
+
+if __name__ == "__main__":
+    main()
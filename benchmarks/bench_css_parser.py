@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# bench_css_parser.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark for `parse_css()` on large user stylesheets.
+
+Run it with a built Gradience package on `PYTHONPATH`, eg. after running
+`local.sh`:
+
+    PYTHONPATH=builddir/lib/python3.11/site-packages python3 benchmarks/bench_css_parser.py
+"""
+
+import os
+import argparse
+import timeit
+import tempfile
+
+from gradience.backend.css_parser import parse_css
+
+from fixtures import make_stylesheet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, default=30000)
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "gtk.css")
+
+        with open(path, "w", encoding="utf-8") as sheet:
+            sheet.write(make_stylesheet(args.rules))
+
+        size = os.path.getsize(path) / 1024 / 1024
+
+        timings = timeit.repeat(lambda: parse_css(path),
+            number=args.number, repeat=args.repeat)
+
+    best = min(timings) / args.number
+    print(f"parse_css: {size:.1f} MiB stylesheet ({args.rules} rules): "
+          f"{best * 1000:.3f} ms per call")
+
+
+if __name__ == "__main__":
+    main()
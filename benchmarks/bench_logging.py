@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# bench_logging.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark for the cost of suppressed debug messages in `Logger`.
+
+Simulates presets listing and search loops with debug logging disabled
+(as in release builds) and compares eager f-string messages with lazy
+`%`-style arguments and callables.
+
+Run it with a built Gradience package on `PYTHONPATH`, eg. after running
+`local.sh`:
+
+    PYTHONPATH=builddir/lib/python3.11/site-packages python3 benchmarks/bench_logging.py
+"""
+
+import logging as std_logging
+import argparse
+import timeit
+
+from gradience.backend.logger import Logger
+
+
+def make_presets(count):
+    return {
+        f"/home/user/.config/presets/user/preset-{number}.json": f"Preset {number}"
+        for number in range(count)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--presets", type=int, default=500)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging = Logger(logger_name="Benchmark")
+    logging.logger.setLevel(std_logging.INFO)
+
+    presets = make_presets(args.presets)
+    custom_presets = {"user": presets}
+
+    def listing_none():
+        for path, name in presets.items():
+            pass
+
+    def listing_eager():
+        for path, name in presets.items():
+            logging.debug(f"preset: {path} ({name}), all: {custom_presets}")
+
+    def listing_lazy_args():
+        for path, name in presets.items():
+            logging.debug("preset: %s (%s), all: %s", path, name, custom_presets)
+
+    def listing_lazy_callable():
+        for path, name in presets.items():
+            logging.debug(lambda: f"preset: {path} ({name}), all: {custom_presets}")
+
+    def search_eager():
+        for name in presets.values():
+            logging.debug("[New search query]")
+            logging.debug(f"Preset amount: {len(presets)}")
+            logging.debug(f"Search string: {name}")
+
+    def search_lazy():
+        for name in presets.values():
+            logging.debug("[New search query]")
+            logging.debug("Preset amount: %d", len(presets))
+            logging.debug("Search string: %s", name)
+
+    cases = [
+        ("listing, no logging", listing_none),
+        ("listing, eager f-string", listing_eager),
+        ("listing, lazy %-args", listing_lazy_args),
+        ("listing, lazy callable", listing_lazy_callable),
+        ("search, eager f-strings", search_eager),
+        ("search, lazy %-args", search_lazy),
+    ]
+
+    print(f"Suppressed debug messages, {args.presets} presets per loop:")
+
+    for label, func in cases:
+        timings = timeit.repeat(func, number=args.number, repeat=args.repeat)
+        best = min(timings) / args.number
+
+        print(f"  {label:<26} {best * 1000:8.3f} ms per loop, "
+              f"{best / args.presets * 1e9:8.1f} ns per preset")
+
+
+if __name__ == "__main__":
+    main()
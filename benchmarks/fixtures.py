@@ -0,0 +1,236 @@
+# fixtures.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Synthetic fixtures shared by the benchmarks.
+
+Everything is generated from fixed seeds, so repeated runs (and runs
+on other machines) work with the same data and don't need network access.
+"""
+
+import os
+import json
+import random
+import shutil
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_PRESET_PATH = os.path.join(REPO_DIR, "data", "presets", "adwaita.json")
+
+USER_THEME_EXT_NAME = "user-theme@gnome-shell-extensions.gcampax.github.com"
+USER_THEME_SCHEMA_ID = "org.gnome.shell.extensions.user-theme"
+
+USER_THEME_SCHEMA = """<?xml version="1.0" encoding="UTF-8"?>
+<schemalist>
+  <schema id="org.gnome.shell.extensions.user-theme" path="/org/gnome/shell/extensions/user-theme/">
+    <key name="name" type="s">
+      <default>""</default>
+      <summary>Theme name</summary>
+      <description>The name of the theme, to be loaded from ~/.themes/name/gnome-shell</description>
+    </key>
+  </schema>
+</schemalist>
+"""
+
+
+def setup_environment(root_dir):
+    """
+    Points home, XDG directories and GSettings backend to `root_dir`,
+    so benchmarks never touch the real user configuration.
+
+    Has to be called before any Gradience module is imported, as
+    directories are resolved on import.
+    """
+    for name, subdir in (("HOME", "home"),
+                         ("XDG_CONFIG_HOME", "home/.config"),
+                         ("XDG_DATA_HOME", "home/.local/share"),
+                         ("XDG_CACHE_HOME", "home/.cache"),
+                         ("XDG_RUNTIME_DIR", "runtime")):
+        path = os.path.join(root_dir, subdir)
+        os.makedirs(path, exist_ok=True)
+        os.environ[name] = path
+
+    os.environ["GSETTINGS_BACKEND"] = "memory"
+    os.environ.pop("FLATPAK_ID", None)
+
+
+def load_base_preset():
+    with open(BASE_PRESET_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _shift_color(color, rng):
+    if not color.startswith("#") or len(color) != 7:
+        return color
+
+    channels = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    channels = [min(255, max(0, channel + rng.randint(-24, 24))) for channel in channels]
+
+    return "#" + "".join(f"{channel:02x}" for channel in channels)
+
+
+def make_preset(number, base_preset=None, custom_rules=20):
+    """
+    Returns preset `number` as a dictionary, a variation of the base
+    Adwaita preset with shifted colors and some custom CSS rules.
+    """
+    base_preset = base_preset or load_base_preset()
+    rng = random.Random(number)
+
+    custom_css = "".join(
+        f".custom-{number}-{rule} {{ color: @accent_color; margin: {rule}px; }}\n"
+        for rule in range(custom_rules)
+    )
+
+    return {
+        "name": f"Preset {number}",
+        "variables": {key: _shift_color(value, rng) for key, value in base_preset["variables"].items()},
+        "palette": {
+            prefix: {shade: _shift_color(value, rng) for shade, value in shades.items()}
+            for prefix, shades in base_preset["palette"].items()
+        },
+        "custom_css": {"gtk4": custom_css, "gtk3": custom_css}
+    }
+
+
+def make_preset_repo(repo_dir, count):
+    """ Writes `count` preset files to `repo_dir`, unless it already has them. """
+    os.makedirs(repo_dir, exist_ok=True)
+
+    if len(os.listdir(repo_dir)) == count:
+        return repo_dir
+
+    base_preset = load_base_preset()
+
+    for number in range(count):
+        with open(os.path.join(repo_dir, f"preset-{number}.json"), "w", encoding="utf-8") as file:
+            json.dump(make_preset(number, base_preset, custom_rules=2), file, indent=4)
+
+    return repo_dir
+
+
+def make_palette():
+    return {
+        f"{color}_": {str(shade): f"#{shade:02x}{shade:02x}{shade:02x}" for shade in range(1, 6)}
+        for color in ("blue", "green", "yellow", "orange", "red", "purple", "brown", "light", "dark")
+    }
+
+
+def make_variables(chains, depth):
+    """
+    Builds `chains` alias chains, each `depth` variables long, ending with
+    a palette color reference, eg. `@accent_0_2 -> @accent_0_1 -> @blue_3`.
+    """
+    variables = {}
+
+    for chain in range(chains):
+        variables[f"accent_{chain}_0"] = f"@blue_{chain % 5 + 1}"
+
+        for link in range(1, depth):
+            variables[f"accent_{chain}_{link}"] = f"@accent_{chain}_{link - 1}"
+
+    return variables
+
+
+def make_stylesheet(rules):
+    """
+    Builds a stylesheet resembling a Gradience generated `gtk.css`, followed by
+    `rules` custom CSS rules with comments, strings and multi-line declarations,
+    and a declaration missing its semicolon, which has to be left in CSS.
+    """
+    parts = [
+        "/* Generated by Gradience */\n",
+        "@define-color accent_color #3584e4;\n",
+        "@define-color accent_bg_color @blue_3;\n",
+        "@define-color window_bg_color\n    mix(@light_2,\n        @blue_1, 0.1);\n",
+    ]
+
+    for color in ("blue", "green", "yellow", "orange", "red", "purple", "brown", "light", "dark"):
+        for shade in range(1, 6):
+            parts.append(f"@define-color {color}_{shade} #{shade:02x}{shade:02x}{shade:02x};\n")
+
+    parts.append("@define-color broken_color #ffffff\n.broken {\n    color: red;\n}\n")
+
+    for rule in range(rules):
+        parts.append(f"/* Rule {rule}, @define-color in comments is ignored */\n")
+        parts.append(f".custom-{rule} > label {{\n"
+                     f"    color: @accent_color;\n"
+                     f"    background-color: alpha(@window_bg_color, 0.{rule % 10});\n"
+                     f"    font-family: \"Cantarell\";\n"
+                     f"}}\n")
+
+    return "".join(parts)
+
+
+def make_image(path, width, height, seed=0):
+    """
+    Saves a wallpaper-like PNG image to `path`: a diagonal two color
+    gradient with a few random blobs, so Monet has something to quantize.
+    """
+    from PIL import Image, ImageDraw
+
+    if os.path.exists(path):
+        return path
+
+    rng = random.Random(seed)
+    start = [rng.randrange(256) for _ in range(3)]
+    end = [rng.randrange(256) for _ in range(3)]
+
+    image = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(image)
+
+    for x in range(width):
+        ratio = x / max(1, width - 1)
+        color = tuple(int(a + (b - a) * ratio) for a, b in zip(start, end))
+        draw.line([(x, 0), (x, height)], fill=color)
+
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(max(2, min(width, height) // 4))
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius],
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+
+    image.save(path, "PNG")
+
+    return path
+
+
+def install_user_theme_schema(home_dir):
+    """
+    Installs GSettings schema of the User Themes extension into
+    `home_dir`, where `ShellTheme` looks for it.
+
+    Returns False if `glib-compile-schemas` isn't available.
+    """
+    schema_dir = os.path.join(home_dir, ".local", "share", "gnome-shell",
+                              "extensions", USER_THEME_EXT_NAME, "schemas")
+
+    if os.path.exists(os.path.join(schema_dir, "gschemas.compiled")):
+        return True
+
+    if not shutil.which("glib-compile-schemas"):
+        return False
+
+    os.makedirs(schema_dir, exist_ok=True)
+
+    with open(os.path.join(schema_dir, USER_THEME_SCHEMA_ID + ".gschema.xml"), "w", encoding="utf-8") as file:
+        file.write(USER_THEME_SCHEMA)
+
+    subprocess.run(["glib-compile-schemas", schema_dir], check=True)
+
+    return True
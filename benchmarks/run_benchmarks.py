@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+
+# run_benchmarks.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark suite for Gradience backend engines.
+
+Runs every benchmark on generated fixtures in a temporary home directory,
+so it works offline and doesn't touch user configuration. Results can be
+saved as a baseline and later runs compared against it, exiting with
+status 1 when any benchmark got slower than `--threshold`.
+
+Run it with a built Gradience package on `PYTHONPATH`, eg. after running
+`local.sh`:
+
+    PYTHONPATH=builddir/lib/python3.11/site-packages python3 benchmarks/run_benchmarks.py --save baseline.json
+    PYTHONPATH=builddir/lib/python3.11/site-packages python3 benchmarks/run_benchmarks.py --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+import platform
+import itertools
+import statistics
+import tempfile
+import timeit
+
+import fixtures
+
+BENCHMARKS = []
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def benchmark(name, params=(None,), slow_params=()):
+    """
+    Registers a benchmark. The decorated function is called once for every
+    value from `params` with the parameter and a fixtures directory, and
+    returns the function that is timed.
+
+    Parameters from `slow_params` are skipped with `--quick`.
+    """
+    def decorator(setup):
+        BENCHMARKS.append((name, params, slow_params, setup))
+        return setup
+
+    return decorator
+
+
+def _require(module_name):
+    try:
+        __import__(module_name)
+    except ImportError as e:
+        raise SkipBenchmark(f"{module_name} is not installed") from e
+
+
+@benchmark("generate_gtk_css", params=("cold", "warm"))
+def bench_generate_gtk_css(mode, fixtures_dir):
+    from gradience.backend.models.preset import Preset
+    from gradience.backend.utils.theming import generate_gtk_css
+
+    # Cycling through more presets than fit into render caches measures uncached output
+    count = 64 if mode == "cold" else 1
+    presets = itertools.cycle([Preset().new_from_dict(fixtures.make_preset(number)) for number in range(count)])
+
+    return lambda: generate_gtk_css("gtk4", next(presets))
+
+
+@benchmark("parse_css", params=(1000, 30000))
+def bench_parse_css(rules, fixtures_dir):
+    from gradience.backend.css_parser import parse_css
+
+    path = os.path.join(fixtures_dir, f"gtk-{rules}.css")
+
+    with open(path, "w", encoding="utf-8") as sheet:
+        sheet.write(fixtures.make_stylesheet(rules))
+
+    return lambda: parse_css(path)
+
+
+@benchmark("color_vars_to_color_code", params=("adwaita", "chains-50x40"))
+def bench_color_vars(variant, fixtures_dir):
+    from gradience.backend.utils.colors import color_vars_to_color_code
+
+    if variant == "adwaita":
+        preset = fixtures.load_base_preset()
+        variables, palette = preset["variables"], preset["palette"]
+    else:
+        variables, palette = fixtures.make_variables(50, 40), fixtures.make_palette()
+
+    return lambda: color_vars_to_color_code(variables, palette)
+
+
+@benchmark("get_presets_list", params=(10, 1000, 10000), slow_params=(10000,))
+def bench_get_presets_list(count, fixtures_dir):
+    from pathlib import Path
+    from gradience.backend.theming.preset import PresetUtils
+
+    repo_dir = Path(fixtures.make_preset_repo(os.path.join(fixtures_dir, f"repo-{count}"), count))
+    preset_utils = PresetUtils()
+
+    return lambda: preset_utils.get_presets_list(repo=repo_dir)
+
+
+@benchmark("Preset.new_from_path")
+def bench_preset_new_from_path(_param, fixtures_dir):
+    from gradience.backend.models.preset import Preset
+
+    path = os.path.join(fixtures_dir, "preset.json")
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(fixtures.make_preset(0), file, indent=4)
+
+    return lambda: Preset().new_from_path(path)
+
+
+@benchmark("Monet.generate_palette_from_image", params=("256x256", "1920x1080"))
+def bench_monet(size, fixtures_dir):
+    _require("PIL")
+    _require("material_color_utilities_python")
+
+    from gradience.backend.theming.monet import Monet
+
+    width, height = map(int, size.split("x"))
+    path = fixtures.make_image(os.path.join(fixtures_dir, f"wallpaper-{size}.png"), width, height)
+    monet = Monet()
+
+    return lambda: monet.generate_palette_from_image(path)
+
+
+@benchmark("ShellTheme.apply_theme", params=("light", "dark"))
+def bench_shell_theme(variant, fixtures_dir):
+    _require("sass")
+
+    if not fixtures.install_user_theme_schema(os.environ["HOME"]):
+        raise SkipBenchmark("glib-compile-schemas is not available")
+
+    from gradience.backend.constants import datadir
+    from gradience.backend.models.preset import Preset
+    from gradience.backend.theming.shell import ShellTheme
+
+    # Render for the newest Shell version which has theme sources installed
+    shell_versions = [version for version in ShellTheme.shell_versions
+                      if os.path.isdir(os.path.join(datadir, "gradience", "shell", str(version)))]
+
+    if not shell_versions:
+        raise SkipBenchmark(f"no Shell theme sources found in {datadir}")
+
+    shell_theme = ShellTheme(shell_version=shell_versions[-1])
+    preset = Preset().new_from_dict(fixtures.make_preset(0))
+
+    return lambda: shell_theme.apply_theme(None, variant, preset)
+
+
+def measure(func, repeat, min_time):
+    """
+    Returns timings of `func` in seconds per call, from `repeat` rounds
+    with as many calls each as fit into `min_time` seconds.
+    """
+    timer = timeit.Timer(func)
+
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    timings = [elapsed / number] + [timing / number for timing in timer.repeat(repeat - 1, number)]
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "number": number,
+        "repeat": repeat
+    }
+
+
+def run(args, fixtures_dir):
+    results = {}
+    skipped = {}
+
+    for name, params, slow_params, setup in BENCHMARKS:
+        for param in params:
+            bench_id = name if param is None else f"{name}[{param}]"
+
+            if args.filter and not any(fnmatch.fnmatch(bench_id, pattern) for pattern in args.filter):
+                continue
+
+            if args.quick and param in slow_params:
+                continue
+
+            try:
+                func = setup(param, fixtures_dir)
+                func()  # Warm up and check the benchmark works at all
+            except SkipBenchmark as e:
+                skipped[bench_id] = str(e)
+                print(f"{bench_id:<48} skipped: {e}")
+                continue
+            except Exception as e:
+                skipped[bench_id] = f"{type(e).__name__}: {e}"
+                print(f"{bench_id:<48} failed: {type(e).__name__}: {e}")
+                continue
+
+            results[bench_id] = measure(func, args.repeat, args.min_time)
+            print(f"{bench_id:<48} {results[bench_id]['min'] * 1000:12.4f} ms")
+
+    return results, skipped
+
+
+def compare(results, baseline, threshold):
+    """ Prints changes against `baseline` and returns IDs of regressed benchmarks. """
+    regressions = []
+
+    print()
+    print(f"{'Benchmark':<48} {'Baseline ms':>12} {'Current ms':>12} {'Change':>8}")
+
+    for bench_id, result in results.items():
+        base = baseline["results"].get(bench_id)
+
+        if base is None:
+            print(f"{bench_id:<48} {'-':>12} {result['min'] * 1000:12.4f} {'new':>8}")
+            continue
+
+        change = result["min"] / base["min"] - 1
+        marker = ""
+
+        if change > threshold:
+            regressions.append(bench_id)
+            marker = "  slower"
+        elif change < -threshold:
+            marker = "  faster"
+
+        print(f"{bench_id:<48} {base['min'] * 1000:12.4f} {result['min'] * 1000:12.4f} {change:+8.1%}{marker}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-k", "--filter", action="append", metavar="PATTERN",
+                        help="run only benchmarks matching a glob pattern, eg. 'parse_css*' (can be repeated)")
+    parser.add_argument("--quick", action="store_true", help="skip the largest fixtures")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum time of a round in seconds (default: 0.2)")
+    parser.add_argument("--fixtures-dir", help="keep generated fixtures in this directory, instead of a temporary one")
+    parser.add_argument("--save", metavar="PATH", help="save results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare results with a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown reported as a regression (default: 0.15)")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, params, _slow_params, _setup in BENCHMARKS:
+            print(name if params == (None,) else f"{name}[{', '.join(map(str, params))}]")
+        return 0
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    with tempfile.TemporaryDirectory(prefix="gradience-bench-") as temp_dir:
+        fixtures.setup_environment(temp_dir)
+
+        fixtures_dir = args.fixtures_dir or os.path.join(temp_dir, "fixtures")
+        os.makedirs(fixtures_dir, exist_ok=True)
+
+        results, skipped = run(args, fixtures_dir)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+                "skipped": skipped
+            }, file, indent=4)
+
+        print(f"\nResults saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}: "
+                  + ", ".join(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,31 +22,55 @@ from gradience.backend.globals import adw_palette_prefixes
 
 
 # Regular expressions
-define_color = re.compile(r"(@define-color .*[^\s])")
-not_define_color = re.compile(r"(^(?:(?!@define-color).)*$)")
+# Comments and strings are matched only to skip `@define-color` appearing inside them.
+# Color value can't contain braces, so declaration missing its semicolon doesn't swallow a following rule
+css_tokens = re.compile(r"""
+    (?P<comment>/\*.*?(?:\*/|\Z))
+    | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<define>@define-color\s+(?P<name>[\w-]+)\s+(?P<color>[^;{}]*?)\s*;[ \t]*\n?)
+""", re.DOTALL | re.VERBOSE)
+
+palette_prefixes = tuple(adw_palette_prefixes)
 
 def parse_css(path):
-    css = ""
-    variables = {}
-    palette = {}
+    """
+    Parses a GTK stylesheet into color variables, palette colors and
+    the remaining CSS rules, with `@define-color` declarations removed.
 
-    for color in adw_palette_prefixes:
-        palette[color] = {}
+    The file is read at once and scanned in a single pass. Declarations
+    may span multiple lines, and those inside comments or strings are ignored.
+    """
+    css_parts = []
+    variables = {}
+    palette = {color: {} for color in adw_palette_prefixes}
 
     with open(path, "r", encoding="utf-8") as sheet:
-        for line in sheet:
-            cdefine_match = re.search(define_color, line)
-            not_cdefine_match = re.search(not_define_color, line)
-            if cdefine_match != None: # If @define-color variable declarations were found
-                palette_part = cdefine_match.__getitem__(1) # Get the second item of the re.Match object
-                name, color = palette_part.split(" ", 1)[1].split(" ", 1)
-                if name.startswith(tuple(adw_palette_prefixes)): # Palette colors
-                    palette[name[:-1]][name[-1:]] = color[:-1]
-                else: # Other color variables
-                    variables[name] = color[:-1]
-            elif not_cdefine_match != None: # If CSS rules were found
-                css_part = not_cdefine_match.__getitem__(1)
-                css += f"{css_part}\n"
-
-        sheet.close()
-        return variables, palette, css
+        sheet_css = sheet.read()
+
+    position = 0
+
+    for token in css_tokens.finditer(sheet_css):
+        if token["define"] is None: # Comments and strings are left in CSS as they are
+            continue
+
+        css_part = sheet_css[position:token.start()]
+
+        # Drop indentation in front of the removed declaration
+        stripped_part = css_part.rstrip(" \t")
+        if not stripped_part or stripped_part.endswith("\n"):
+            css_part = stripped_part
+
+        css_parts.append(css_part)
+        position = token.end()
+
+        name = token["name"]
+        color = " ".join(token["color"].split()) # Collapse multi-line values
+
+        if name.startswith(palette_prefixes): # Palette colors
+            palette[name[:-1]][name[-1:]] = color
+        else: # Other color variables
+            variables[name] = color
+
+    css_parts.append(sheet_css[position:])
+
+    return variables, palette, "".join(css_parts)
@@ -0,0 +1,325 @@
+# daemon.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+
+from collections import OrderedDict
+
+from gi.repository import GLib, Gio
+
+from gradience.backend.daemon_client import DAEMON_BUS_NAME, DAEMON_OBJECT_PATH, DAEMON_INTERFACE, DAEMON_ERROR
+from gradience.backend.models.preset import Preset
+from gradience.backend.preset_catalog import PresetCatalog
+from gradience.backend.theming.preset import PresetUtils
+
+from gradience.backend.exceptions import UnsupportedShellVersion
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="Daemon")
+
+
+DAEMON_INTERFACE_XML = f"""
+<node>
+  <interface name="{DAEMON_INTERFACE}">
+    <method name="ListPresets">
+      <arg type="a{{ss}}" name="presets" direction="out"/>
+    </method>
+    <method name="ApplyPreset">
+      <arg type="s" name="preset_name" direction="in"/>
+      <arg type="s" name="preset_path" direction="in"/>
+      <arg type="s" name="app_type" direction="in"/>
+      <arg type="s" name="display_name" direction="out"/>
+    </method>
+    <method name="GenerateMonet">
+      <arg type="s" name="image_path" direction="in"/>
+      <arg type="s" name="preset_name" direction="in"/>
+      <arg type="s" name="tone" direction="in"/>
+      <arg type="s" name="theme" direction="in"/>
+      <arg type="b" name="save" direction="in"/>
+      <arg type="s" name="preset_json" direction="out"/>
+    </method>
+    <method name="BuildShellTheme">
+      <arg type="s" name="preset_name" direction="in"/>
+      <arg type="s" name="preset_path" direction="in"/>
+      <arg type="s" name="variant" direction="in"/>
+      <arg type="as" name="warnings" direction="out"/>
+    </method>
+  </interface>
+</node>
+"""
+
+
+class ThemingService:
+    """
+    Implementation of the daemon's D-Bus methods.
+
+    Everything expensive is kept warm between calls: the preset index
+    is loaded once and kept up to date by file monitors, parsed presets
+    are cached by `PresetItem`s, Shell theme engines are created once per
+    Shell version and Monet palettes are cached by image file and its
+    modification time.
+    """
+
+    MONET_CACHE_SIZE = 8
+
+    def __init__(self):
+        self.preset_catalog = PresetCatalog()
+        self.preset_catalog.load()
+
+        self._shell_themes = {}
+        self._monet = None
+        self._monet_cache = OrderedDict()
+
+    def list_presets(self) -> dict:
+        return {item.props.preset_path: item.props.display_name for item in self.preset_catalog.get_items()}
+
+    def apply_preset(self, preset_name: str, preset_path: str, app_type: str) -> str:
+        preset = self.get_preset(preset_name, preset_path)
+        app_types = ("gtk4", "gtk3") if app_type == "both" else (app_type,)
+
+        for app_type in app_types:
+            if app_type not in ("gtk4", "gtk3"):
+                raise ValueError(f"Unknown app type: {app_type}")
+
+            PresetUtils().apply_preset(app_type, preset)
+
+        return preset.display_name
+
+    def generate_monet(self, image_path: str, preset_name: str, tone: str, theme: str, save: bool) -> str:
+        preset = self.get_monet_preset(image_path, tone, theme, preset_name or None)
+
+        if save:
+            preset.save_to_file()
+            self.preset_catalog.refresh_path(preset.preset_path)
+
+        return preset.get_preset_json()
+
+    def get_monet_preset(self, image_path: str, tone, theme: str, name: str = None) -> Preset:
+        """ Returns Monet preset generated from `image_path`, using cached palette if possible. """
+        from gradience.backend.theming.monet import Monet
+
+        if self._monet is None:
+            self._monet = Monet()
+
+        palette = self._get_monet_palette(image_path)
+
+        return self._monet.new_preset_from_monet(name, palette, [tone, theme], obj_only=True)
+
+    def build_shell_theme(self, preset_name: str, preset_path: str, variant: str) -> list:
+        from gradience.backend.theming.shell import ShellTheme
+        from gradience.backend.utils.gnome import get_gnome_environment
+
+        preset = self.get_preset(preset_name, preset_path)
+        environment = get_gnome_environment()
+        warnings = []
+
+        if not environment.is_gnome:
+            warnings.append("Shell Engine is designed to work only on systems running GNOME, "
+                "generated theme won't have any effect on other desktop environments.")
+
+        shell_version = environment.shell_major_version
+
+        if not environment.is_ext_installed(ShellTheme.THEME_EXT_NAME):
+            warnings.append("User Themes extension isn't installed, the theme was generated but can't be applied.")
+        elif not environment.is_ext_installed(ShellTheme.THEME_EXT_NAME, check_enabled=True):
+            warnings.append("User Themes extension is currently disabled, enable it in order to apply the theme.")
+
+        shell_theme = self._shell_themes.get(shell_version)
+
+        if shell_theme is None:
+            shell_theme = ShellTheme(shell_version=shell_version)
+            self._shell_themes[shell_version] = shell_theme
+
+        shell_theme.apply_theme(None, variant or None, preset)
+
+        return warnings
+
+    def get_preset(self, preset_name: str, preset_path: str) -> Preset:
+        """ Returns preset from `preset_path`, or installed preset named `preset_name`. """
+        if preset_path:
+            item = self.preset_catalog.get_item(preset_path)
+
+            # Presets outside of presets directory aren't cached
+            return item.get_preset() if item else Preset().new_from_path(preset_path)
+
+        for item in self.preset_catalog.get_items():
+            if item.props.display_name == preset_name:
+                return item.get_preset()
+
+        raise KeyError(f"Failed to find preset named {preset_name}")
+
+    def _get_monet_palette(self, image_path):
+        stat = os.stat(image_path)
+        key = (os.path.realpath(image_path), stat.st_mtime_ns, stat.st_size)
+
+        if key in self._monet_cache:
+            self._monet_cache.move_to_end(key)
+            logging.debug("Using cached Monet palette for %s", image_path)
+            return self._monet_cache[key]
+
+        palette = self._monet.generate_palette_from_image(image_path)
+
+        self._monet_cache[key] = palette
+        if len(self._monet_cache) > self.MONET_CACHE_SIZE:
+            self._monet_cache.popitem(last=False)
+
+        return palette
+
+
+class GradienceDaemon:
+    """
+    Session D-Bus service running `ThemingService`, so frequent callers
+    like `gradience-cli` in wallpaper or dark mode hooks don't pay
+    Gradience's startup cost on every call.
+
+    Calls are handled one at a time on the main loop. If `idle_timeout`
+    is set, the daemon exits after that many seconds without calls.
+
+    With `watch_wallpaper` set, the daemon also applies Monet preset
+    generated from the wallpaper whenever it changes, for `app_type`
+    applications. With `scheme_presets` (a dictionary with `light` and
+    `dark` preset names or paths), it switches between these presets
+    following the system color scheme, also for GNOME Shell if `shell`
+    is set. Idle timeout is ignored in both cases.
+    """
+
+    def __init__(self, idle_timeout: int = 0, watch_wallpaper: bool = False, scheme_presets: dict = None,
+                 app_type: str = "gtk4", shell: bool = False):
+        self.idle_timeout = idle_timeout
+        self.watch_wallpaper = watch_wallpaper
+        self.scheme_presets = scheme_presets
+        self.app_type = app_type
+        self.shell = shell
+
+        self.service = None
+        self.wallpaper_watcher = None
+        self.scheme_switcher = None
+        self.loop = GLib.MainLoop()
+
+        self._owner_id = None
+        self._registration_id = None
+        self._idle_timeout_id = None
+        self._exit_code = 0
+
+    def run(self) -> int:
+        self.service = ThemingService()
+
+        if self.watch_wallpaper:
+            from gradience.backend.wallpaper_watcher import WallpaperWatcher
+            from gradience.backend.utils.gsettings import GSettingsMissingError
+
+            try:
+                self.wallpaper_watcher = WallpaperWatcher(self.service, app_type=self.app_type)
+                self.wallpaper_watcher.start()
+            except GSettingsMissingError as e:
+                logging.error("Unable to watch wallpaper changes, GNOME desktop settings aren't installed.", exc=e)
+                return 1
+
+        if self.scheme_presets:
+            from gradience.backend.scheme_switcher import SchemeSwitcher
+            from gradience.backend.utils.gsettings import GSettingsMissingError
+
+            try:
+                self.scheme_switcher = SchemeSwitcher(self.service, self.scheme_presets,
+                                                      app_type=self.app_type, shell=self.shell)
+                self.scheme_switcher.start()
+            except (GSettingsMissingError, OSError, KeyError, ValueError, UnsupportedShellVersion,
+                    json.JSONDecodeError, GLib.GError) as e:
+                logging.error("Unable to set up switching of light and dark presets.", exc=e)
+                return 1
+
+        self._owner_id = Gio.bus_own_name(Gio.BusType.SESSION, DAEMON_BUS_NAME,
+            Gio.BusNameOwnerFlags.NONE, self._on_bus_acquired,
+            self._on_name_acquired, self._on_name_lost)
+
+        self._reset_idle_timeout()
+        self.loop.run()
+
+        if self.wallpaper_watcher:
+            self.wallpaper_watcher.stop()
+
+        if self.scheme_switcher:
+            self.scheme_switcher.stop()
+
+        if self._owner_id:
+            Gio.bus_unown_name(self._owner_id)
+
+        return self._exit_code
+
+    def _on_bus_acquired(self, connection, _name):
+        node_info = Gio.DBusNodeInfo.new_for_xml(DAEMON_INTERFACE_XML)
+        self._registration_id = connection.register_object(DAEMON_OBJECT_PATH,
+            node_info.interfaces[0], self._on_method_call, None, None)
+
+    def _on_name_acquired(self, _connection, name):
+        logging.info(f"Gradience daemon running as {name}")
+
+    def _on_name_lost(self, _connection, name):
+        logging.error(f"Unable to own {name} on session bus, is another daemon already running?")
+        self._exit_code = 1
+        self.loop.quit()
+
+    def _reset_idle_timeout(self):
+        if not self.idle_timeout or self.watch_wallpaper or self.scheme_presets:
+            return
+
+        if self._idle_timeout_id:
+            GLib.source_remove(self._idle_timeout_id)
+
+        self._idle_timeout_id = GLib.timeout_add_seconds(self.idle_timeout, self._on_idle_timeout)
+
+    def _on_idle_timeout(self):
+        logging.info("No requests received in a while, exiting")
+        self._idle_timeout_id = None
+        self.loop.quit()
+
+        return GLib.SOURCE_REMOVE
+
+    def _on_method_call(self, _connection, _sender, _object_path, _interface_name,
+                        method_name, parameters, invocation):
+        self._reset_idle_timeout()
+        logging.debug("D-Bus call: %s%s", method_name, parameters)
+
+        args = parameters.unpack()
+
+        try:
+            if method_name == "ListPresets":
+                reply = GLib.Variant("(a{ss})", (self.service.list_presets(),))
+            elif method_name == "ApplyPreset":
+                reply = GLib.Variant("(s)", (self.service.apply_preset(*args),))
+            elif method_name == "GenerateMonet":
+                reply = GLib.Variant("(s)", (self.service.generate_monet(*args),))
+            elif method_name == "BuildShellTheme":
+                reply = GLib.Variant("(as)", (self.service.build_shell_theme(*args),))
+            else:
+                invocation.return_dbus_error("org.freedesktop.DBus.Error.UnknownMethod",
+                    f"Unknown method: {method_name}")
+                return
+        except (OSError, KeyError, ValueError, AttributeError, TypeError,
+                json.JSONDecodeError, UnsupportedShellVersion, GLib.GError) as e:
+            logging.error(f"{method_name} call failed.", exc=e)
+            invocation.return_dbus_error(DAEMON_ERROR, str(e) or type(e).__name__)
+            return
+        except Exception as e:
+            # Keep the daemon running, whatever goes wrong in a single call
+            logging.critical(f"Unexpected error in {method_name} call.", exc=e)
+            invocation.return_dbus_error(DAEMON_ERROR, f"{type(e).__name__}: {e}")
+            return
+
+        invocation.return_value(reply)
@@ -0,0 +1,67 @@
+# daemon_client.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from gi.repository import GLib, Gio
+
+from gradience.backend.constants import app_id
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="DaemonClient")
+
+
+# NOTE: This module is imported by `gradience-cli` on every call,
+# so it should import only lightweight modules like constants and logger
+
+DAEMON_BUS_NAME = f"{app_id}.Daemon"
+DAEMON_OBJECT_PATH = "/" + DAEMON_BUS_NAME.replace(".", "/")
+DAEMON_INTERFACE = "com.github.GradienceTeam.Gradience.Daemon"
+DAEMON_ERROR = f"{DAEMON_INTERFACE}.Error.Failed"
+
+
+class DaemonError(Exception):
+    """ Raised when the daemon was reached, but the called method failed. """
+
+
+def call_daemon(method: str, signature: str, args: tuple, reply_signature: str, timeout: int = 120):
+    """
+    Calls `method` on the running Gradience daemon and returns
+    its unpacked reply tuple.
+
+    Returns None if the daemon isn't running (it's never started
+    automatically), so the caller can do the work itself instead.
+    Raises `DaemonError` if the method itself failed.
+    """
+    try:
+        connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+
+        reply = connection.call_sync(
+            DAEMON_BUS_NAME, DAEMON_OBJECT_PATH, DAEMON_INTERFACE, method,
+            GLib.Variant(signature, args) if signature else None,
+            GLib.VariantType.new(reply_signature),
+            Gio.DBusCallFlags.NO_AUTO_START, timeout * 1000, None)
+    except GLib.GError as e:
+        if Gio.DBusError.is_remote_error(e) and Gio.DBusError.get_remote_error(e) == DAEMON_ERROR:
+            Gio.DBusError.strip_remote_error(e)
+            raise DaemonError(e.message) from e
+
+        # No session bus, daemon not running, or an older daemon without this method
+        logging.debug("Gradience daemon not available: %s", e.message)
+        return None
+
+    return reply.unpack()
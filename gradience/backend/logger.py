@@ -16,17 +16,61 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import json
+import time
 import logging
 import traceback
 
 from gradience.backend.constants import build_type
 
 
+LOG_FORMAT_ENV = "GRADIENCE_LOG_FORMAT"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats log records as JSON lines, for feeding logs into other tools.
+
+    Every line contains a timestamp, level, logger name and message,
+    and optionally `duration_ms` and structured exception data.
+    """
+
+    def format(self, record):
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+
+        duration = getattr(record, "duration", None)
+        if duration is not None:
+            entry["duration_ms"] = round(duration * 1000, 3)
+
+        exc = getattr(record, "exc", None)
+        if exc is not None:
+            entry["exception"] = {
+                "type": type(exc).__name__,
+                "message": str(exc),
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in traceback.extract_tb(exc.__traceback__)]
+            }
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
 class Logger(logging.getLoggerClass()):
     """
     This is a wrapper of `logging` module. It provides
     custom formatting for log messages.
 
+    Every instance logs to a child of the `Gradience` logger, eg.
+    `Gradience.PresetCatalog`, which shares a single handler. Messages
+    are colored text by default, setting `GRADIENCE_LOG_FORMAT=json`
+    environment variable (or calling `set_log_format("json")`) switches
+    them to JSON lines.
+
     Attributes:
         logger_name (str): Custom name of the logger.
         formatter (dict): Custom formatter for the logger.
@@ -43,6 +87,11 @@ class Logger(logging.getLoggerClass()):
         'fmt': '[%(name)s] %(message)s'
     }
 
+    parent_name = "Gradience"
+
+    _handler = None
+    _json_format = False
+
     def __set_exc_info(self, exc):
         exc_tb = traceback.extract_tb(exc.__traceback__)
         exc_info = ""
@@ -75,45 +124,99 @@ class Logger(logging.getLoggerClass()):
         even if you didn't wrote any debug messages in your code.
         The logger name should usually be a name of your module's main class or module name.
         """
-        if formatter is None:
-            formatter = self.log_format
-        formatter = logging.Formatter(**formatter)
-
         if logger_name:
-            self.root.name = f"Gradience.{logger_name}"
+            self.logger = logging.getLogger(f"{self.parent_name}.{logger_name}")
         else:
-            self.root.name = "Gradience"
+            self.logger = logging.getLogger(self.parent_name)
+
+        if Logger._handler is None:
+            Logger.set_log_format(os.environ.get(LOG_FORMAT_ENV, "text"))
+
+        if formatter is not None and not Logger._json_format:
+            Logger._handler.setFormatter(logging.Formatter(**formatter))
+
+    @classmethod
+    def set_log_format(cls, log_format: str) -> None:
+        """ Configures the shared handler to output `text` (default) or `json` lines. """
+        parent = logging.getLogger(cls.parent_name)
+
+        if cls._handler is None:
+            if build_type == "debug":
+                parent.setLevel(logging.DEBUG)
+            else:
+                parent.setLevel(logging.INFO)
+
+            # Messages are handled only here, not by the handlers of the root logger
+            parent.propagate = False
 
-        if build_type == "debug":
-            self.root.setLevel(logging.DEBUG)
+            cls._handler = logging.StreamHandler()
+            parent.addHandler(cls._handler)
+
+        cls._json_format = log_format == "json"
+
+        if cls._json_format:
+            cls._handler.setFormatter(JsonFormatter())
         else:
-            self.root.setLevel(logging.INFO)
-        self.root.handlers = []
+            cls._handler.setFormatter(logging.Formatter(**cls.log_format))
 
-        handler = logging.StreamHandler()
-        handler.setFormatter(formatter)
-        self.root.addHandler(handler)
+    def __format_message(self, message, args):
+        # Messages can be passed as callables, so expensive ones are built only when needed
+        if callable(message):
+            message = message()
 
-    def debug(self, message):
-        self.root.debug(self.__set_level_color("debug", str(message)))
+        message = str(message)
 
-    def info(self, message):
-        self.root.info(self.__set_level_color("info", str(message)))
+        if args:
+            message = message % args
 
-    def warning(self, message, exc=None):
-        if exc:
-            message += self.__set_exc_info(exc)
-        self.root.warning(self.__set_level_color("warning", str(message)))
+        return message
 
-    def error(self, message, exc=None):
-        if exc:
-            message += self.__set_exc_info(exc)
-        self.root.error(self.__set_level_color("error", str(message)))
+    def __log(self, level: int, level_name: str, message, args, exc=None, duration=None):
+        message = self.__format_message(message, args)
+
+        if Logger._json_format:
+            self.logger.log(level, message, extra={"exc": exc, "duration": duration})
+            return
+
+        if duration is not None:
+            message += f" ({duration * 1000:.1f} ms)"
 
-    def critical(self, message, exc=None):
         if exc:
             message += self.__set_exc_info(exc)
-        self.root.critical(self.__set_level_color("critical", str(message)))
+
+        self.logger.log(level, self.__set_level_color(level_name, message))
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, message, *args, duration=None):
+        """
+        Logs a debug message.
+
+        `message` can contain `%`-style placeholders for `args`, or be a callable
+        returning the message. Neither is evaluated if debug messages are disabled.
+
+        `duration` (in seconds) is added to the message, or as a separate
+        field in JSON output, eg. for timings of operations.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.__log(logging.DEBUG, "debug", message, args, duration=duration)
+
+    def info(self, message, *args, duration=None):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.__log(logging.INFO, "info", message, args, duration=duration)
+
+    def warning(self, message, *args, exc=None, duration=None):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.__log(logging.WARNING, "warning", message, args, exc, duration)
+
+    def error(self, message, *args, exc=None, duration=None):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.__log(logging.ERROR, "error", message, args, exc, duration)
+
+    def critical(self, message, *args, exc=None, duration=None):
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.__log(logging.CRITICAL, "critical", message, args, exc, duration)
 
     def set_silent(self):
-        self.root.handlers = []
+        self.logger.disabled = True
@@ -0,0 +1,76 @@
+# preset_item.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+from gi.repository import GObject
+
+from gradience.backend.utils.common import to_slug_case
+from gradience.backend.models.preset import Preset
+
+
+class PresetItem(GObject.Object):
+    """
+    Lightweight list model item describing an installed preset.
+
+    Items are stored in `Gio.ListStore` models and bound to recycled
+    row widgets, so the full preset file is only parsed when
+    `get_preset()` is called for the first time.
+    """
+    __gtype_name__ = "GradiencePresetItem"
+
+    display_name = GObject.Property(type=str, default="")
+    preset_path = GObject.Property(type=str, default="")
+    repo_name = GObject.Property(type=str, default="")
+
+    def __init__(self, display_name: str, preset_path: str, repo_name: str):
+        super().__init__(display_name=display_name,
+                        preset_path=preset_path, repo_name=repo_name)
+
+        self.pending_deletion = False
+        self._preset = None
+
+    @property
+    def prefix(self) -> str:
+        return to_slug_case(self.props.repo_name)
+
+    def get_preset(self) -> Preset:
+        if self._preset is None:
+            self._preset = Preset().new_from_path(self.props.preset_path)
+
+        return self._preset
+
+    def clear_preset(self) -> None:
+        """ Drops the parsed preset, so it's read again after the file has changed. """
+        self._preset = None
+
+
+class ExplorePresetItem(GObject.Object):
+    """ List model item describing a preset available in a remote repository. """
+    __gtype_name__ = "GradienceExplorePresetItem"
+
+    display_name = GObject.Property(type=str, default="")
+    url = GObject.Property(type=str, default="")
+    repo_name = GObject.Property(type=str, default="")
+    badge = GObject.Property(type=str, default="")
+
+    def __init__(self, display_name: str, url: str, repo_name: str, badge: str):
+        super().__init__(display_name=display_name, url=url,
+                        repo_name=repo_name, badge=badge)
+
+    @property
+    def prefix(self) -> str:
+        return to_slug_case(self.props.repo_name)
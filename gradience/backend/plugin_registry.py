@@ -0,0 +1,170 @@
+# plugin_registry.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+
+from yapsy.PluginManager import PluginManager
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="PluginRegistry")
+
+
+class _CandidatesPluginManager(PluginManager):
+    """
+    Plugin manager that loads only the given candidates,
+    instead of locating them in plugin directories again.
+    """
+
+    def __init__(self, candidates):
+        super().__init__()
+        self.__candidates = candidates
+
+    def locatePlugins(self):
+        self._candidates = list(self.__candidates)
+
+
+class PluginEntry:
+    """
+    Plugin found in one of the plugin directories.
+
+    `plugin_object` is None until the plugin is loaded with
+    `PluginRegistry.load()`, before that only metadata from
+    the plugin info file is available.
+    """
+
+    def __init__(self, plugin_id, candidate):
+        self.plugin_id = plugin_id
+        self.candidate = candidate
+
+        self.info_path, _module_path, self.plugin_info = candidate
+        self.load_failed = False
+
+    @property
+    def name(self) -> str:
+        return self.plugin_info.name
+
+    @property
+    def plugin_object(self):
+        return self.plugin_info.plugin_object
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.plugin_info.plugin_object is not None
+
+
+class PluginRegistry:
+    """
+    Keeps track of plugins installed in `plugin_places`.
+
+    Discovered plugins are cached until modification time of any plugin
+    directory changes, so `refresh()` is cheap when nothing was installed
+    or removed. Plugin modules are imported only when `load()` is called,
+    and loaded plugins are kept alive for the rest of the session.
+    """
+
+    def __init__(self, plugin_places: list):
+        self.plugin_places = plugin_places
+
+        self._entries = {}
+        self._dir_mtimes = None
+
+    def refresh(self) -> bool:
+        """
+        Locates plugins again if any plugin directory has changed.
+
+        Returns True if plugins were located again.
+        """
+        dir_mtimes = self._get_dir_mtimes()
+
+        if dir_mtimes == self._dir_mtimes:
+            return False
+
+        self._dir_mtimes = dir_mtimes
+
+        locator = PluginManager()
+        locator.setPluginPlaces(self.plugin_places)
+        locator.locatePlugins()
+
+        entries = {}
+
+        for candidate in locator.getPluginCandidates():
+            info_path = candidate[0]
+            plugin_id = os.path.basename(info_path).rsplit(".", 1)[0]
+
+            # Keep already loaded plugins, if their info file is still in place
+            entry = self._entries.get(plugin_id)
+            if entry is None or entry.info_path != info_path:
+                entry = PluginEntry(plugin_id, candidate)
+
+            entries[plugin_id] = entry
+
+        for plugin_id in self._entries.keys() - entries.keys():
+            logging.debug(f"Plugin removed: {plugin_id}")
+
+        self._entries = entries
+        logging.debug(f"Located {len(entries)} plugins.")
+
+        return True
+
+    def get_entries(self) -> list:
+        return list(self._entries.values())
+
+    def get_entry(self, plugin_id: str) -> PluginEntry:
+        return self._entries.get(plugin_id)
+
+    def get_loaded_entries(self) -> list:
+        return [entry for entry in self._entries.values() if entry.is_loaded]
+
+    def load(self, plugin_ids) -> None:
+        """
+        Imports and activates plugins with IDs from `plugin_ids`,
+        which haven't been loaded yet.
+        """
+        entries = [
+            self._entries[plugin_id] for plugin_id in plugin_ids
+            if plugin_id in self._entries and not self._entries[plugin_id].is_loaded
+            and not self._entries[plugin_id].load_failed
+        ]
+
+        if not entries:
+            return
+
+        loader = _CandidatesPluginManager([entry.candidate for entry in entries])
+        loader.collectPlugins()
+
+        for entry in entries:
+            if entry.is_loaded:
+                logging.debug(f"Loaded plugin: {entry.plugin_id}")
+                entry.plugin_object.activate()
+            else:
+                # Don't try to import broken plugins again on every reload
+                entry.load_failed = True
+                logging.error(f"Unable to load plugin: {entry.plugin_id}")
+
+    def _get_dir_mtimes(self):
+        dir_mtimes = {}
+
+        for place in self.plugin_places:
+            for dir_path, _dir_names, _file_names in os.walk(place, followlinks=True):
+                try:
+                    dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    continue
+
+        return dir_mtimes
@@ -0,0 +1,223 @@
+# plugin_runner.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import time
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import GLib
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="PluginRunner")
+
+
+class PluginResult:
+    """ Outcome of running a single plugin method. """
+
+    def __init__(self, plugin_id: str, method_name: str):
+        self.plugin_id = plugin_id
+        self.method_name = method_name
+
+        self.value = None
+        self.error = None
+        self.timed_out = False
+        self.duration = 0.0
+
+    @property
+    def failed(self) -> bool:
+        return self.timed_out or self.error is not None
+
+
+class PluginRun:
+    """
+    Single call of a method on a set of plugins, returned by `PluginRunner.run()`.
+
+    Call `cancel()` to stop waiting for the plugins, the callback
+    won't be called afterwards. Plugins which have already started can't
+    be interrupted, their results are just ignored.
+    """
+
+    def __init__(self, runner, method_name, entries, callback, user_data):
+        self.method_name = method_name
+        self.callback = callback
+        self.user_data = user_data
+
+        self.results = {entry.plugin_id: PluginResult(entry.plugin_id, method_name) for entry in entries}
+        self.cancelled = False
+
+        self._runner = runner
+        self._executor = None
+        self._submitted = None
+        self._started = {}
+        self._pending = set(self.results)
+        self._futures = {}
+        self._timeout_id = None
+
+    def cancel(self) -> None:
+        if self.cancelled:
+            return
+
+        self.cancelled = True
+
+        for future in self._futures.values():
+            future.cancel()
+
+        self._stop_timeout_check()
+
+    def start(self, entries) -> None:
+        self._executor = self._runner.executor
+        self._submitted = time.monotonic()
+
+        for entry in entries:
+            future = self._executor.submit(self._run_plugin, entry)
+            future.add_done_callback(lambda _future, plugin_id=entry.plugin_id:
+                GLib.idle_add(self._on_plugin_done, plugin_id))
+
+            self._futures[entry.plugin_id] = future
+
+        if self._pending:
+            self._timeout_id = GLib.timeout_add(100, self._on_timeout_check)
+        else:
+            GLib.idle_add(self._finish)
+
+    # NOTE: This function is run in a worker thread
+    def _run_plugin(self, entry):
+        result = self.results[entry.plugin_id]
+        self._started[entry.plugin_id] = time.monotonic()
+
+        try:
+            result.value = getattr(entry.plugin_object, self.method_name)()
+        except Exception as e:
+            result.error = e
+        finally:
+            result.duration = time.monotonic() - self._started[entry.plugin_id]
+
+    def _on_plugin_done(self, plugin_id):
+        if plugin_id in self._pending and not self.cancelled:
+            self._pending.discard(plugin_id)
+
+            if not self._pending:
+                self._finish()
+
+        return GLib.SOURCE_REMOVE
+
+    def _on_timeout_check(self):
+        now = time.monotonic()
+
+        # Time budget is counted from the moment plugin starts, plugins which \
+        # are still queued get the same budget counted from submitting them
+        for plugin_id in list(self._pending):
+            result = self.results[plugin_id]
+            started = self._started.get(plugin_id)
+
+            if started is None:
+                # Cancelling fails if the plugin has started in the meantime
+                if now - self._submitted <= self._runner.timeout or not self._futures[plugin_id].cancel():
+                    continue
+
+                result.duration = now - self._submitted
+                logging.warning(f"Plugin {plugin_id} didn't start '{self.method_name}' in {self._runner.timeout} seconds.")
+            elif now - started > self._runner.timeout:
+                result.duration = now - started
+
+                logging.warning(f"Plugin {plugin_id} didn't finish '{self.method_name}' in {self._runner.timeout} seconds.")
+
+                # Its worker thread stays blocked, so later runs get fresh workers
+                self._runner.replace_executor(self._executor)
+            else:
+                continue
+
+            result.timed_out = True
+            self._pending.discard(plugin_id)
+
+        if not self._pending:
+            self._timeout_id = None
+            self._finish()
+            return GLib.SOURCE_REMOVE
+
+        return GLib.SOURCE_CONTINUE
+
+    def _stop_timeout_check(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _finish(self):
+        self._stop_timeout_check()
+
+        if self.cancelled:
+            return GLib.SOURCE_REMOVE
+
+        for result in self.results.values():
+            logging.debug("Plugin %s '%s' finished.", result.plugin_id, self.method_name, duration=result.duration)
+
+        self.callback(list(self.results.values()), *self.user_data)
+
+        return GLib.SOURCE_REMOVE
+
+
+class PluginRunner:
+    """
+    Runs plugin methods in parallel in a small pool of worker threads,
+    so a slow plugin doesn't block the main loop or other plugins.
+
+    Every plugin gets `timeout` seconds, plugins which don't finish in
+    time (or don't even start, while waiting for a free worker) are
+    reported as timed out. Results are collected and passed to the
+    callback on the main loop once all plugins have finished.
+
+    Threads can't be interrupted, so once a plugin times out, its pool
+    is left to finish the work it already has and a new pool is used
+    for later runs.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 10.0):
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.executor = self._new_executor()
+
+    def replace_executor(self, executor: ThreadPoolExecutor) -> None:
+        """ Stops giving new work to `executor`, if it's still the one in use. """
+        if executor is not self.executor:
+            return
+
+        logging.debug("Replacing plugin worker pool blocked by a timed out plugin")
+
+        self.executor = self._new_executor()
+        executor.shutdown(wait=False)
+
+    def _new_executor(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers,
+                                  thread_name_prefix="gradience-plugin")
+
+    def run(self, method_name: str, entries: list, callback: callable, *user_data) -> PluginRun:
+        """
+        Calls `method_name` on plugin objects from `entries`.
+
+        `callback` is called on the main loop with a list of
+        `PluginResult`s followed by `user_data`.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            raise AssertionError("Plugins have to be run from the main thread")
+
+        plugin_run = PluginRun(self, method_name, entries, callback, user_data)
+        plugin_run.start(entries)
+
+        return plugin_run
@@ -0,0 +1,234 @@
+# preset_catalog.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+
+from pathlib import Path
+
+from gi.repository import GObject, GLib, Gio
+
+from gradience.backend.globals import presets_dir
+from gradience.backend.models.preset_item import PresetItem
+from gradience.backend.theming.preset import PresetUtils
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="PresetCatalog")
+
+
+def read_preset_name(preset_path: str) -> str:
+    """
+    Returns the display name of the preset in `preset_path`.
+
+    Raises `KeyError` if the file isn't a valid preset.
+    """
+    with open(preset_path, "r", encoding="utf-8") as file:
+        preset = json.load(file)
+
+    if preset.get("variables") is None:
+        raise KeyError("'variables' section missing in loaded preset file")
+
+    if preset.get("palette") is None:
+        raise KeyError("'palette' section missing in loaded preset file")
+
+    return preset["name"]
+
+
+class PresetCatalog(GObject.Object):
+    """
+    In-memory catalog of installed presets.
+
+    `presets_dir` is scanned once by `load()`, afterwards every repository
+    directory is watched with `Gio.FileMonitor` and only the files reported
+    by the monitors are read again. Presets are kept as `PresetItem`s in
+    the `store` list model, which can be used directly by list widgets.
+
+    `preset-added`, `preset-removed` and `preset-changed` signals are
+    emitted for every change, so other views can update only affected entries.
+    """
+    __gtype_name__ = "GradiencePresetCatalog"
+
+    __gsignals__ = {
+        "preset-added": (GObject.SignalFlags.RUN_LAST, None, (PresetItem,)),
+        "preset-removed": (GObject.SignalFlags.RUN_LAST, None, (PresetItem,)),
+        "preset-changed": (GObject.SignalFlags.RUN_LAST, None, (PresetItem,)),
+    }
+
+    def __init__(self):
+        super().__init__()
+
+        self.store = Gio.ListStore.new(PresetItem)
+
+        self._items = {}
+        self._monitors = {}
+        self._presets_dir_real = os.path.realpath(presets_dir)
+        self._loaded = False
+
+    def load(self) -> None:
+        """ Scans `presets_dir` and starts watching it for changes. """
+        if self._loaded:
+            return
+        self._loaded = True
+
+        for repo_name in ("user", "curated", "official"):
+            os.makedirs(os.path.join(presets_dir, repo_name), exist_ok=True)
+
+        for entry in Path(presets_dir).iterdir():
+            if entry.is_file() and entry.name.endswith(".json"):
+                # Moves presets from the legacy structure to `user` repository
+                try:
+                    PresetUtils().get_presets_list(entry)
+                except (OSError, KeyError, AttributeError, json.JSONDecodeError) as e:
+                    logging.error("Failed to move legacy preset.", exc=e)
+
+        self._watch_directory(presets_dir)
+
+        for entry in sorted(os.scandir(presets_dir), key=lambda entry: entry.name):
+            if entry.is_dir():
+                self._add_repo(entry.path)
+
+        logging.debug("Loaded %d presets.", len(self._items))
+
+    def get_item(self, preset_path: str) -> PresetItem:
+        return self._items.get(self._get_catalog_path(preset_path))
+
+    def get_items(self) -> list:
+        return list(self._items.values())
+
+    def refresh_path(self, preset_path: str) -> None:
+        """
+        Updates the catalog entry for `preset_path`, adding, updating or
+        removing it depending on the current state of the file.
+
+        File monitors do this automatically, but callers which have just
+        modified a preset can use it to see the change immediately.
+        """
+        preset_path = self._get_catalog_path(preset_path)
+
+        if preset_path is None:
+            return
+
+        if not preset_path.endswith(".json") or not os.path.isfile(preset_path):
+            self._remove_item(preset_path)
+            return
+
+        try:
+            display_name = read_preset_name(preset_path)
+        except (OSError, KeyError, TypeError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring invalid preset {preset_path}.", exc=e)
+            self._remove_item(preset_path)
+            return
+
+        item = self._items.get(preset_path)
+
+        if item is None:
+            repo_name = os.path.basename(os.path.dirname(preset_path))
+            item = PresetItem(display_name, preset_path, repo_name)
+
+            self._items[preset_path] = item
+            self.store.append(item)
+
+            self.emit("preset-added", item)
+        else:
+            item.props.display_name = display_name
+            item.clear_preset()
+
+            self.emit("preset-changed", item)
+
+    def _get_catalog_path(self, preset_path):
+        # Paths are compared resolved, but catalog keys keep the form used by \
+        # directory scans and monitors, so the same file always has one entry
+        preset_path = preset_path.rstrip(os.sep)
+        repo_path = os.path.dirname(preset_path)
+
+        if os.path.realpath(os.path.dirname(repo_path)) != self._presets_dir_real:
+            return None
+
+        repo_name = os.path.basename(os.path.normpath(repo_path))
+
+        return os.path.join(presets_dir, repo_name, os.path.basename(preset_path))
+
+    def _add_repo(self, repo_path):
+        self._watch_directory(repo_path)
+
+        for entry in sorted(os.scandir(repo_path), key=lambda entry: entry.name):
+            if entry.name.endswith(".json"):
+                self.refresh_path(entry.path)
+
+    def _remove_repo(self, repo_path):
+        monitor = self._monitors.pop(repo_path, None)
+        if monitor:
+            monitor.cancel()
+
+        for preset_path in [path for path in self._items if os.path.dirname(path) == repo_path]:
+            self._remove_item(preset_path)
+
+    def _remove_item(self, preset_path):
+        item = self._items.pop(preset_path, None)
+
+        if item is None:
+            return
+
+        found, position = self.store.find(item)
+        if found:
+            self.store.remove(position)
+
+        self.emit("preset-removed", item)
+
+    def _watch_directory(self, path):
+        if path in self._monitors:
+            return
+
+        try:
+            monitor = Gio.File.new_for_path(path).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.GError as e:
+            logging.warning(f"Unable to watch {path} for changes.", exc=e)
+            return
+
+        monitor.connect("changed", self._on_directory_changed)
+        self._monitors[path] = monitor
+
+    def _on_directory_changed(self, _monitor, file, other_file, event_type):
+        path = file.get_path()
+        is_repo = os.path.dirname(path) == presets_dir
+
+        if event_type == Gio.FileMonitorEvent.RENAMED:
+            self._on_path_removed(path, is_repo)
+            self._on_path_added(other_file.get_path(), is_repo)
+        elif event_type in (Gio.FileMonitorEvent.DELETED, Gio.FileMonitorEvent.MOVED_OUT):
+            self._on_path_removed(path, is_repo)
+        elif event_type in (Gio.FileMonitorEvent.MOVED_IN, Gio.FileMonitorEvent.CHANGES_DONE_HINT):
+            self._on_path_added(path, is_repo)
+        elif event_type == Gio.FileMonitorEvent.CREATED and is_repo:
+            # Files are read once they are fully written, but new repositories have to be watched right away
+            self._on_path_added(path, is_repo)
+
+    def _on_path_added(self, path, is_repo):
+        if is_repo:
+            if os.path.isdir(path):
+                self._add_repo(path)
+        else:
+            self.refresh_path(path)
+
+    def _on_path_removed(self, path, is_repo):
+        if is_repo:
+            self._remove_repo(path)
+        else:
+            self._remove_item(path)
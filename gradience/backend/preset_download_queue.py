@@ -0,0 +1,238 @@
+# preset_download_queue.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import time
+import threading
+
+from gi.repository import GObject, GLib, Gio
+
+from gradience.backend.globals import presets_dir, user_data_dir
+from gradience.backend.utils.common import to_slug_case
+from gradience.backend.preset_downloader import PresetDownloader
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="PresetDownloadQueue")
+
+
+# Network errors that are worth retrying, as they usually go away by themselves
+TRANSIENT_IO_ERRORS = (
+    Gio.IOErrorEnum.TIMED_OUT,
+    Gio.IOErrorEnum.BUSY,
+    Gio.IOErrorEnum.HOST_UNREACHABLE,
+    Gio.IOErrorEnum.NETWORK_UNREACHABLE,
+    Gio.IOErrorEnum.CONNECTION_REFUSED,
+    Gio.IOErrorEnum.CONNECTION_CLOSED,
+    Gio.IOErrorEnum.NOT_CONNECTED,
+    Gio.IOErrorEnum.BROKEN_PIPE
+)
+
+
+def is_transient_error(error: GLib.GError) -> bool:
+    if error.matches(Gio.resolver_error_quark(), Gio.ResolverError.TEMPORARY_FAILURE):
+        return True
+
+    return any(error.matches(Gio.io_error_quark(), code) for code in TRANSIENT_IO_ERRORS)
+
+
+class _DownloadJob:
+    def __init__(self, url, name, repo_name, attempts=0):
+        self.url = url
+        self.name = name
+        self.repo_name = repo_name
+        self.attempts = attempts
+
+        self.running = False
+        self.next_attempt = 0
+
+    def get_preset_path(self):
+        return os.path.join(presets_dir, self.repo_name, to_slug_case(self.name) + ".json")
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "name": self.name,
+            "repo_name": self.repo_name,
+            "attempts": self.attempts
+        }
+
+
+class PresetDownloadQueue(GObject.Object):
+    """
+    Background queue for preset downloads.
+
+    Downloads run in worker threads (at most `max_concurrent` at once),
+    identical URLs are only downloaded once, and transient network
+    errors are retried with exponential backoff. Pending downloads are
+    kept in a small state file, so they are resumed after restart.
+
+    All signals are emitted on the main loop.
+    """
+    __gtype_name__ = "GradiencePresetDownloadQueue"
+
+    __gsignals__ = {
+        "download-started": (GObject.SignalFlags.RUN_LAST, None, (str,)),
+        "download-retrying": (GObject.SignalFlags.RUN_LAST, None, (str, int)),
+        "download-finished": (GObject.SignalFlags.RUN_LAST, None, (str, str)),
+        "download-failed": (GObject.SignalFlags.RUN_LAST, None, (str, str)),
+    }
+
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self, max_concurrent=2, state_path=None):
+        super().__init__()
+
+        self.max_concurrent = max_concurrent
+        self.state_path = state_path or os.path.join(
+            user_data_dir, "gradience", "download-queue.json")
+
+        self._jobs = {}
+        self._workers = 0
+        self._resumed = False
+        self._condition = threading.Condition()
+
+    def resume(self) -> None:
+        """ Loads downloads left unfinished from the previous session and starts them. """
+        with self._condition:
+            if self._resumed:
+                return
+            self._resumed = True
+
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as file:
+                    state = json.load(file)
+            except FileNotFoundError:
+                return
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning("Unable to load download queue state.", exc=e)
+                return
+
+            for job_data in state.get("jobs", []):
+                job = _DownloadJob(**job_data)
+                self._jobs.setdefault(job.url, job)
+
+            if self._jobs:
+                logging.info(f"Resuming {len(self._jobs)} unfinished downloads.")
+                self._start_workers()
+
+    def add(self, name: str, repo_name: str, url: str) -> bool:
+        """
+        Queues a preset download.
+
+        Returns False if a download from the same URL is already queued.
+        """
+        with self._condition:
+            if url in self._jobs:
+                logging.debug(f"Download already queued: {url}")
+                return False
+
+            self._jobs[url] = _DownloadJob(url, name, repo_name)
+            self._save_state()
+            self._start_workers()
+
+            self._condition.notify()
+
+        return True
+
+    def is_queued(self, url: str) -> bool:
+        with self._condition:
+            return url in self._jobs
+
+    def get_pending_count(self) -> int:
+        with self._condition:
+            return len(self._jobs)
+
+    def _start_workers(self):
+        while self._workers < min(self.max_concurrent, len(self._jobs)):
+            self._workers += 1
+            threading.Thread(target=self._run_worker, daemon=True).start()
+
+    def _get_next_job(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                waiting = [job for job in self._jobs.values() if not job.running]
+
+                if not waiting:
+                    self._workers -= 1
+                    return None
+
+                job = min(waiting, key=lambda job: job.next_attempt)
+
+                if job.next_attempt <= now:
+                    job.running = True
+                    return job
+
+                self._condition.wait(job.next_attempt - now)
+
+    def _run_worker(self):
+        while job := self._get_next_job():
+            self._download(job)
+
+    def _download(self, job):
+        GLib.idle_add(self.emit, "download-started", job.url)
+
+        try:
+            PresetDownloader().download_preset(job.name, job.repo_name, job.url)
+        except GLib.GError as e:
+            if is_transient_error(e) and job.attempts + 1 < self.MAX_ATTEMPTS:
+                self._retry(job)
+            else:
+                self._finish(job, "download-failed", e.message)
+        except (json.JSONDecodeError, OSError) as e:
+            self._finish(job, "download-failed", str(e))
+        else:
+            self._finish(job, "download-finished", job.get_preset_path())
+
+    def _retry(self, job):
+        with self._condition:
+            delay = min(self.BACKOFF_BASE * 2 ** job.attempts, self.BACKOFF_MAX)
+
+            job.attempts += 1
+            job.running = False
+            job.next_attempt = time.monotonic() + delay
+
+            self._save_state()
+            self._condition.notify_all()
+
+        logging.warning(f"Download of {job.url} failed, retrying in {delay} seconds.")
+        GLib.idle_add(self.emit, "download-retrying", job.url, job.attempts)
+
+    def _finish(self, job, signal_name, detail):
+        with self._condition:
+            self._jobs.pop(job.url, None)
+            self._save_state()
+
+        GLib.idle_add(self.emit, signal_name, job.url, detail)
+
+    def _save_state(self):
+        state = {"jobs": [job.to_dict() for job in self._jobs.values()]}
+
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+
+            with open(self.state_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(state, file)
+
+            os.replace(self.state_path + ".tmp", self.state_path)
+        except OSError as e:
+            logging.warning("Unable to save download queue state.", exc=e)
@@ -25,6 +25,7 @@ from gradience.backend.globals import presets_dir
 from gradience.backend.utils.networking import github_to_jsdelivr_url
 from gradience.backend.utils.common import to_slug_case
 
+from gradience.backend.tracing import span
 from gradience.backend.logger import Logger
 
 logging = Logger()
@@ -41,7 +42,9 @@ class PresetDownloader:
 
         try:
             request = Soup.Message.new("GET", repo)
-            body = self.session.send_and_read(request, None)
+
+            with span("downloader.request", url=repo):
+                body = self.session.send_and_read(request, None)
         except GLib.GError as e:
             if e.code == 1: # offline
                 logging.error("Failed to establish a new connection.", exc=e)
@@ -81,7 +84,9 @@ class PresetDownloader:
 
         try:
             request = Soup.Message.new("GET", repo)
-            body = self.session.send_and_read(request, None)
+
+            with span("downloader.request", url=repo):
+                body = self.session.send_and_read(request, None)
         except GLib.GError as e:
             if e.code == 1: # offline
                 logging.error("Failed to establish a new connection.", exc=e)
@@ -0,0 +1,163 @@
+# preset_thumbnailer.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import queue
+import hashlib
+import threading
+
+from gi.repository import GLib, GdkPixbuf
+
+from gradience.backend.globals import user_cache_dir
+from gradience.backend.utils.colors import color_vars_to_color_code, color_code_to_rgba
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="PresetThumbnailer")
+
+
+class PresetThumbnailer:
+    """
+    Renders small swatch images from preset colors in a background thread.
+
+    Thumbnails are cached on disk in `~/.cache/gradience/thumbnails`, keyed
+    by a hash of the preset file contents, so unchanged presets are rendered
+    only once. The worker thread is started on the first request and exits
+    when there's nothing left to render.
+    """
+
+    THUMBNAIL_SIZE = 64
+
+    def __init__(self):
+        self.cache_dir = os.path.join(user_cache_dir, "gradience", "thumbnails")
+
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def get_thumbnail_async(self, preset_path: str, callback: callable, *user_data) -> None:
+        """
+        Requests a thumbnail for the preset in `preset_path`.
+
+        `callback` is called on the main loop with the thumbnail path
+        (or None, if rendering failed) followed by `user_data`.
+        """
+        with self._lock:
+            if preset_path in self._pending:
+                self._pending[preset_path].append((callback, user_data))
+                return
+
+            self._pending[preset_path] = [(callback, user_data)]
+            self._queue.put(preset_path)
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_worker, daemon=True)
+                self._worker.start()
+
+    def get_thumbnail(self, preset_path: str) -> str:
+        with open(preset_path, "rb") as file:
+            preset_data = file.read()
+
+        preset_hash = hashlib.sha256(preset_data).hexdigest()
+        thumbnail_path = os.path.join(self.cache_dir, preset_hash + ".png")
+
+        if not os.path.exists(thumbnail_path):
+            self.render_thumbnail(json.loads(preset_data), thumbnail_path)
+
+        return thumbnail_path
+
+    def render_thumbnail(self, preset: dict, thumbnail_path: str) -> None:
+        size = self.THUMBNAIL_SIZE
+
+        variables = color_vars_to_color_code(preset["variables"], preset.get("palette"))
+
+        window_bg = self._get_color(variables, "window_bg_color", (0, 0, 0, 0.0))
+
+        pixbuf = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8, size, size)
+        pixbuf.fill(self._to_pixel(window_bg))
+
+        # Headerbar, card and accent swatches over the window background
+        swatches = [
+            ("headerbar_bg_color", 0, 0, size, size // 4),
+            ("card_bg_color", size // 8, size * 3 // 8, size * 3 // 4, size // 4),
+            ("accent_bg_color", size // 8, size * 3 // 4, size * 3 // 8, size // 8),
+        ]
+
+        for var_name, x, y, width, height in swatches:
+            color = self._get_color(variables, var_name)
+
+            if color:
+                swatch = pixbuf.new_subpixbuf(x, y, width, height)
+                swatch.fill(self._to_pixel(self._blend(color, window_bg)))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file first, so other processes never see a partial image
+        pixbuf.savev(thumbnail_path + ".tmp", "png", [], [])
+        os.replace(thumbnail_path + ".tmp", thumbnail_path)
+
+    def _run_worker(self):
+        while True:
+            try:
+                preset_path = self._queue.get(timeout=5)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+
+            try:
+                thumbnail_path = self.get_thumbnail(preset_path)
+            except (OSError, KeyError, TypeError, ValueError, GLib.GError) as e:
+                logging.warning(f"Unable to render thumbnail for preset {preset_path}.", exc=e)
+                thumbnail_path = None
+
+            with self._lock:
+                callbacks = self._pending.pop(preset_path, [])
+
+            for callback, user_data in callbacks:
+                GLib.idle_add(callback, thumbnail_path, *user_data)
+
+    def _get_color(self, variables, var_name, fallback=None):
+        try:
+            return color_code_to_rgba(variables[var_name])
+        except (KeyError, ValueError):
+            return fallback
+
+    def _blend(self, color, background):
+        red, green, blue, alpha = color
+        bg_red, bg_green, bg_blue, bg_alpha = background
+
+        if alpha >= 1.0 or bg_alpha == 0.0:
+            return color
+
+        return (
+            round(red * alpha + bg_red * (1 - alpha)),
+            round(green * alpha + bg_green * (1 - alpha)),
+            round(blue * alpha + bg_blue * (1 - alpha)),
+            alpha + bg_alpha * (1 - alpha)
+        )
+
+    def _to_pixel(self, color) -> int:
+        red, green, blue = (min(max(value, 0), 255) for value in color[:3])
+        alpha = min(max(color[3], 0.0), 1.0)
+
+        return (red << 24) | (green << 16) | (blue << 8) | round(alpha * 255)
@@ -0,0 +1,200 @@
+# scheme_switcher.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import filecmp
+
+from gi.repository import GLib
+
+from gradience.backend.globals import is_sandboxed, get_gtk_theme_dir
+from gradience.backend.theming.preset import PresetUtils
+from gradience.backend.utils.subprocess import GradienceSubprocess
+from gradience.backend.utils.gsettings import FlatpakGSettings, get_settings
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="SchemeSwitcher")
+
+
+INTERFACE_SCHEMA = "org.gnome.desktop.interface"
+
+VARIANTS = ("light", "dark")
+
+
+class SchemeSwitcher:
+    """
+    Switches between a light and a dark preset following the system
+    `color-scheme` setting.
+
+    Stylesheets of both presets (and optionally Shell themes, built as
+    `gradience-shell-light` and `gradience-shell-dark`) are rendered once
+    on `start()`, and again only when one of the preset files changes.
+    Switching itself just renames a prerendered stylesheet over gtk.css
+    and sets the Shell theme name, without generating any CSS.
+
+    `presets` maps variants to preset names or paths, which are
+    looked up in `service`'s preset catalog.
+    """
+
+    def __init__(self, service, presets: dict, app_type: str = "gtk4", shell: bool = False):
+        self.service = service
+        self.presets = presets
+        self.app_types = ("gtk4", "gtk3") if app_type == "both" else (app_type,)
+        self.shell = shell
+
+        self.active_variant = None
+
+        self._interface_settings = None
+        self._monitor = None
+        self._preset_paths = {}
+        self._shell_themes = {}
+
+    def start(self) -> None:
+        self.prerender()
+
+        if is_sandboxed():
+            self._interface_settings = FlatpakGSettings(INTERFACE_SCHEMA)
+            self._monitor = GradienceSubprocess().run_streaming(
+                ["gsettings", "monitor", INTERFACE_SCHEMA, "color-scheme"],
+                self._on_monitor_line, self._on_monitor_exited, allow_escaping=True)
+        else:
+            # Raises GSettingsMissingError outside of GNOME
+            self._interface_settings = get_settings(INTERFACE_SCHEMA)
+            self._interface_settings.connect("changed::color-scheme", self._on_color_scheme_changed)
+
+        self.service.preset_catalog.connect("preset-changed", self._on_preset_changed)
+
+        self._backup_gtk_css()
+        self.switch(self._get_variant())
+
+    def stop(self) -> None:
+        if self._monitor:
+            monitor, self._monitor = self._monitor, None
+            monitor.cancel()
+
+        if self._interface_settings and not is_sandboxed():
+            self._interface_settings.disconnect_by_func(self._on_color_scheme_changed)
+
+        self.service.preset_catalog.disconnect_by_func(self._on_preset_changed)
+
+    def prerender(self, variants=VARIANTS) -> None:
+        """ Renders stylesheets, and Shell themes if enabled, for `variants`. """
+        for variant in variants:
+            preset = self._get_preset(self.presets[variant])
+            self._preset_paths[variant] = preset.preset_path
+
+            for app_type in self.app_types:
+                PresetUtils().prerender_preset(app_type, preset, variant)
+
+            if self.shell:
+                self._get_shell_theme(variant).apply_theme(None, variant, preset, set_theme=False)
+
+            logging.debug("Prerendered %s variant from %s", variant, preset.display_name)
+
+    def switch(self, variant: str) -> None:
+        """ Activates prerendered `variant`, unless it's already active. """
+        if variant == self.active_variant:
+            return
+
+        for app_type in self.app_types:
+            PresetUtils().activate_prerendered_preset(app_type, variant)
+
+        if self.shell:
+            self._get_shell_theme(variant).set_theme()
+
+        self.active_variant = variant
+        logging.info(f"Switched to {variant} preset")
+
+    def _get_preset(self, name_or_path):
+        if name_or_path.endswith(".json") or os.sep in name_or_path:
+            return self.service.get_preset(None, os.path.abspath(name_or_path))
+
+        return self.service.get_preset(name_or_path, None)
+
+    def _get_shell_theme(self, variant):
+        from gradience.backend.theming.shell import ShellTheme
+        from gradience.backend.utils.gnome import get_gnome_environment
+
+        if variant not in self._shell_themes:
+            shell_version = get_gnome_environment().shell_major_version
+            self._shell_themes[variant] = ShellTheme(shell_version=shell_version,
+                                                     theme_name=f"gradience-shell-{variant}")
+
+        return self._shell_themes[variant]
+
+    def _backup_gtk_css(self):
+        # Keep a backup of the stylesheet used before, like applying a preset does, \
+        # unless it's one of the variants (eg. when daemon was restarted)
+        for app_type in self.app_types:
+            gtk_css_path = os.path.join(get_gtk_theme_dir(app_type), "gtk.css")
+
+            if not os.path.exists(gtk_css_path):
+                continue
+
+            if any(filecmp.cmp(gtk_css_path, f"{gtk_css_path}.{variant}", shallow=False) for variant in VARIANTS):
+                continue
+
+            shutil.copyfile(gtk_css_path, gtk_css_path + ".bak")
+
+    def _get_variant(self):
+        if is_sandboxed():
+            # `gsettings get` prints values in GVariant text format
+            color_scheme = GLib.Variant.parse(None, self._interface_settings.get("color-scheme"), None, None).unpack()
+        else:
+            color_scheme = self._interface_settings.get_string("color-scheme")
+
+        return "dark" if color_scheme == "prefer-dark" else "light"
+
+    def _switch_safely(self, variant):
+        try:
+            self.switch(variant)
+        except (OSError, GLib.GError) as e:
+            logging.error(f"Unable to switch to {variant} preset.", exc=e)
+
+    def _on_color_scheme_changed(self, _settings, _key):
+        self._switch_safely(self._get_variant())
+
+    def _on_monitor_line(self, line):
+        # Lines look like `color-scheme: 'prefer-dark'`
+        _key, _separator, value = line.partition(":")
+        color_scheme = GLib.Variant.parse(None, value.strip(), None, None).unpack()
+
+        self._switch_safely("dark" if color_scheme == "prefer-dark" else "light")
+
+    def _on_monitor_exited(self, _completed, error):
+        if self._monitor:
+            logging.warning("Monitoring of color scheme has stopped.", exc=error)
+
+    def _on_preset_changed(self, _catalog, item):
+        variants = [variant for variant, path in self._preset_paths.items() if path == item.props.preset_path]
+
+        if not variants:
+            return
+
+        try:
+            self.prerender(variants)
+        except (OSError, KeyError, ValueError, json.JSONDecodeError, GLib.GError) as e:
+            logging.error("Unable to render changed preset.", exc=e)
+            return
+
+        # Changed variant has to be activated again, if it's the active one
+        if self.active_variant in variants:
+            active_variant, self.active_variant = self.active_variant, None
+            self._switch_safely(active_variant)
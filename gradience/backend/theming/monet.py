@@ -26,6 +26,7 @@ from reportlab.graphics import renderPM
 from gradience.backend.models.preset import Preset
 from gradience.backend.utils.colors import argb_to_color_code
 
+from gradience.backend.tracing import traced
 from gradience.backend.logger import Logger
 
 logging = Logger()
@@ -35,6 +36,7 @@ class Monet:
     def __init__(self):
         self.palette = None
 
+    @traced("monet.generate_palette")
     def generate_palette_from_image(self, image_path: str) -> dict:
         if image_path.endswith(".svg"):
             drawing = svg2rlg(image_path)
@@ -18,6 +18,8 @@
 
 import os
 import json
+import shutil
+import hashlib
 
 from pathlib import Path
 
@@ -27,8 +29,8 @@ from gradience.backend.models.preset import Preset
 
 from gradience.backend.utils.theming import generate_gtk_css
 from gradience.backend.globals import user_config_dir, presets_dir, get_gtk_theme_dir, is_sandboxed
-from gradience.backend.utils.gsettings import GSettingsSetting, FlatpakGSettings, GSettingsMissingError
 
+from gradience.backend.tracing import span, traced
 from gradience.backend.logger import Logger
 
 logging = Logger()
@@ -36,11 +38,17 @@ logging = Logger()
 
 class PresetUtils:
     THEME_GSETTINGS_SCHEMA_ID = "org.gnome.desktop.interface"
+
+    # Sidecar file saved next to gtk.css, with applied preset and a hash of generated CSS
+    SIDECAR_SUFFIX = ".gradience.json"
     
     def __init__(self):
         pass
 
     def set_gtk3_theme(self):
+        # Imported here, as loading GSettings schemas is only needed when applying GTK 3 theme
+        from gradience.backend.utils.gsettings import GSettingsSetting, FlatpakGSettings
+
         settings_retriever = FlatpakGSettings if is_sandboxed() else GSettingsSetting
         self.settings = settings_retriever(self.THEME_GSETTINGS_SCHEMA_ID, schema_dir=None)
         self.settings.set_string("gtk-theme", "adw-gtk3")
@@ -101,7 +109,7 @@ class PresetUtils:
 
         if full_list:
             for repo in Path(presets_dir).iterdir():
-                logging.debug(f"presets_dir.iterdir: {repo}")
+                logging.debug("presets_dir.iterdir: %s", repo)
                 __get_repo_presets(repo)
 
             return presets_list
@@ -112,6 +120,7 @@ class PresetUtils:
         else:
             raise AttributeError("You either need to set 'repo' property, or change 'full_list' property to True")
 
+    @traced("preset.apply")
     def apply_preset(self, app_type: str, preset: Preset) -> None:
         theme_dir = get_gtk_theme_dir(app_type)
         gtk_css_path = os.path.join(theme_dir, "gtk.css")
@@ -133,9 +142,122 @@ class PresetUtils:
                 backup.write(contents)
                 backup.close()
         finally:
-            with open(gtk_css_path, "w", encoding="utf-8") as css_file:
-                css_file.write(generate_gtk_css(app_type, preset))
-                css_file.close()
+            with span("preset.generate_css", app_type=app_type):
+                gtk_css = generate_gtk_css(app_type, preset)
+
+            with span("preset.write_files", app_type=app_type):
+                with open(gtk_css_path, "w", encoding="utf-8") as css_file:
+                    css_file.write(gtk_css)
+                    css_file.close()
+
+                self._save_sidecar(gtk_css_path, gtk_css, preset)
+
+    def prerender_preset(self, app_type: str, preset: Preset, variant: str) -> str:
+        """
+        Saves stylesheet generated from `preset` next to gtk.css, as
+        `gtk.css.<variant>`, so `activate_prerendered_preset()` can switch
+        to it later without generating it again.
+
+        Returns path of the saved stylesheet.
+        """
+        theme_dir = get_gtk_theme_dir(app_type)
+        variant_path = os.path.join(theme_dir, f"gtk.css.{variant}")
+
+        os.makedirs(theme_dir, exist_ok=True)
+
+        with span("preset.generate_css", app_type=app_type):
+            gtk_css = generate_gtk_css(app_type, preset)
+
+        with open(variant_path, "w", encoding="utf-8") as css_file:
+            css_file.write(gtk_css)
+
+        self._save_sidecar(variant_path, gtk_css, preset)
+
+        return variant_path
+
+    @traced("preset.activate_prerendered")
+    def activate_prerendered_preset(self, app_type: str, variant: str) -> None:
+        """
+        Replaces gtk.css with a stylesheet saved by `prerender_preset()`.
+
+        Files are copied next to gtk.css and renamed over it,
+        so applications never see a partially written stylesheet.
+        """
+        gtk_css_path = os.path.join(get_gtk_theme_dir(app_type), "gtk.css")
+        variant_path = f"{gtk_css_path}.{variant}"
+
+        if app_type == "gtk3":
+            self.set_gtk3_theme()
+
+        try:
+            self._replace_file(variant_path + self.SIDECAR_SUFFIX, gtk_css_path + self.SIDECAR_SUFFIX)
+        except FileNotFoundError:
+            # Sidecar isn't critical, but a stale one mustn't be left behind
+            try:
+                os.remove(gtk_css_path + self.SIDECAR_SUFFIX)
+            except FileNotFoundError:
+                pass
+
+        self._replace_file(variant_path, gtk_css_path)
+
+    def _replace_file(self, source_path: str, target_path: str) -> None:
+        temp_path = target_path + ".tmp"
+
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, target_path)
+
+    def get_applied_preset(self, app_type: str) -> dict:
+        """
+        Returns the preset last applied with `apply_preset()` as a dictionary,
+        so it doesn't need to be parsed back from gtk.css.
+
+        Returns None if there's no saved preset, or if gtk.css was changed
+        since the preset was applied (eg. edited by hand). Raises `OSError`
+        if gtk.css can't be read.
+        """
+        gtk_css_path = os.path.join(get_gtk_theme_dir(app_type), "gtk.css")
+
+        with open(gtk_css_path, "rb") as css_file:
+            css_hash = hashlib.sha256(css_file.read()).hexdigest()
+
+        try:
+            with open(gtk_css_path + self.SIDECAR_SUFFIX, "r", encoding="utf-8") as file:
+                sidecar = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning("Unable to load applied preset information.", exc=e)
+            return None
+
+        if sidecar.get("css_hash") != css_hash:
+            logging.debug(f"{gtk_css_path} was modified since the preset was applied.")
+            return None
+
+        preset = sidecar.get("preset")
+
+        if not isinstance(preset, dict) or "variables" not in preset or "palette" not in preset:
+            return None
+
+        return preset
+
+    def _save_sidecar(self, gtk_css_path: str, gtk_css: str, preset: Preset) -> None:
+        sidecar = {
+            "css_hash": hashlib.sha256(gtk_css.encode("utf-8")).hexdigest(),
+            "preset": {
+                "name": preset.display_name,
+                "variables": preset.variables,
+                "palette": preset.palette,
+                "custom_css": preset.custom_css,
+                "badges": preset.badges
+            }
+        }
+
+        try:
+            with open(gtk_css_path + self.SIDECAR_SUFFIX, "w", encoding="utf-8") as file:
+                json.dump(sidecar, file)
+        except (OSError, TypeError) as e:
+            # Not critical, gtk.css will be parsed instead on next launch
+            logging.warning("Unable to save applied preset information.", exc=e)
 
     def restore_preset(self, app_type: str) -> None:
         theme_dir = get_gtk_theme_dir(app_type)
@@ -159,6 +281,11 @@ class PresetUtils:
 
         file = Gio.File.new_for_path(gtk_css_path)
 
+        try:
+            os.remove(gtk_css_path + self.SIDECAR_SUFFIX)
+        except FileNotFoundError:
+            pass
+
         try:
             file.delete()
         except GLib.GError as e:
@@ -30,6 +30,7 @@ from gradience.backend.utils.gnome import get_shell_version, get_shell_colors
 from gradience.backend.utils.gsettings import GSettingsSetting, FlatpakGSettings, GSettingsMissingError
 from gradience.backend.constants import datadir
 
+from gradience.backend.tracing import span, traced
 from gradience.backend.logger import Logger
 from gradience.backend.exceptions import UnsupportedShellVersion
 from gradience.backend.globals import is_sandboxed
@@ -52,8 +53,11 @@ class ShellTheme:
 
     custom_css = None
 
-    def __init__(self, shell_version=None):
+    THEME_EXT_NAME = "user-theme@gnome-shell-extensions.gcampax.github.com"
+
+    def __init__(self, shell_version=None, theme_name="gradience-shell"):
         self._cancellable = Gio.Cancellable()
+        self.theme_name = theme_name
 
         if not shell_version:
             self._detect_shell_version()
@@ -67,7 +71,6 @@ class ShellTheme:
         self.THEME_GSETTINGS_SCHEMA_PATH = "/org/gnome/shell/extensions/user-theme/"
         self.THEME_GSETTINGS_SCHEMA_KEY = "name"
 
-        self.THEME_EXT_NAME = "user-theme@gnome-shell-extensions.gcampax.github.com"
         self.THEME_GSETTINGS_DIR = os.path.join(GLib.get_home_dir(), ".local/share/",
             "gnome-shell", "extensions", self.THEME_EXT_NAME, "schemas")
 
@@ -93,7 +96,7 @@ class ShellTheme:
         )
 
         # TODO: Allow user to use different name than "gradience-shell" (also, with default name, we should append "-light" suffix when generated from light preset)
-        self.output_dir = os.path.join(GLib.get_home_dir(), ".local/share/themes", "gradience-shell", "gnome-shell")
+        self.output_dir = os.path.join(GLib.get_home_dir(), ".local/share/themes", self.theme_name, "gnome-shell")
 
         self.main_template = os.path.join(self.templates_dir, "gnome-shell.template")
         self.colors_template = os.path.join(self.templates_dir, "colors.template")
@@ -131,7 +134,7 @@ class ShellTheme:
         task.return_value(output)
 
     # TODO: Make it accept either dict or callable in `parent` parameter
-    def apply_theme(self, parent: callable, theme_variant: str, preset: Preset):
+    def apply_theme(self, parent: callable, theme_variant: str, preset: Preset, set_theme: bool = True):
         if theme_variant in ("light", "dark"):
             self.theme_variant = theme_variant
         else:
@@ -139,11 +142,12 @@ class ShellTheme:
                 f"Theme variant {theme_variant} not in list: [light, dark]")
 
         try:
-            self._create_theme(parent, preset)
+            self._create_theme(parent, preset, set_theme)
         except (OSError, GLib.GError) as e:
             raise
 
-    def _create_theme(self, parent: callable, preset: Preset):
+    @traced("shell.create_theme")
+    def _create_theme(self, parent: callable, preset: Preset, set_theme: bool = True):
         # Convert GTK color variables to normal color values
         self.preset_variables = color_vars_to_color_code(preset.variables, preset.palette)
         self.preset_palette = preset.palette
@@ -152,15 +156,21 @@ class ShellTheme:
         # TODO: Move custom Shell colors list to Shell modules
         self.shell_colors = parent.shell_colors if parent != None else None
 
-        self._insert_variables()
-        self._recolor_assets()
+        with span("shell.insert_variables"):
+            self._insert_variables()
+
+        with span("shell.recolor_assets"):
+            self._recolor_assets()
 
         os.makedirs(self.output_dir, exist_ok=True)
 
-        self._compile_sass(self.main_source,
-            os.path.join(self.output_dir, "gnome-shell.css"))
+        with span("shell.compile_sass", shell_version=self.version_target):
+            self._compile_sass(self.main_source,
+                os.path.join(self.output_dir, "gnome-shell.css"))
 
-        self._set_shell_theme()
+        if set_theme:
+            with span("shell.set_theme"):
+                self._set_shell_theme()
 
     def _insert_variables(self):
         # hexcode_regex = re.compile(r".*#[0-9a-f]{3,6}")
@@ -249,18 +259,24 @@ class ShellTheme:
             os.path.join(self.assets_output, "toggle-on.svg")
         )
 
+    def set_theme(self) -> None:
+        """ Switches GNOME Shell to the theme generated by this instance, without building it again. """
+        self._set_shell_theme()
+
     def _set_shell_theme(self):
         key = self.THEME_GSETTINGS_SCHEMA_KEY
 
-        # Set default theme
-        self.settings.reset(key)
+        # Both changes are applied together, in a single host process when sandboxed
+        with self.settings.batch():
+            # Set default theme
+            self.settings.reset(key)
 
-        if is_sandboxed():
-            # Set theme generated by Gradience
-            self.settings.set(key, "gradience-shell")
-        else:
-            # Set theme generated by Gradience
-            self.settings.set_string(key, "gradience-shell")
+            if is_sandboxed():
+                # Set theme generated by Gradience
+                self.settings.set(key, self.theme_name)
+            else:
+                # Set theme generated by Gradience
+                self.settings.set_string(key, self.theme_name)
 
     def _detect_shell_version(self):
         shell_ver = get_shell_version()
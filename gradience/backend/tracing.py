@@ -0,0 +1,252 @@
+# tracing.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="Tracing")
+
+
+TRACE_ENV = "GRADIENCE_TRACE"
+
+
+class _Span:
+    """ Context manager measuring a single span, created by `Tracer.span()`. """
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+
+        self.tracer.add_span(self.name, self.start, end, self.args)
+
+
+class _NoSpan:
+    """ Span used when tracing is disabled, doesn't measure anything. """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+_no_span = _NoSpan()
+
+
+class Tracer:
+    """
+    Collects timings of named spans of work, eg. stages of applying a preset.
+
+    Tracing is disabled by default, spans are then no-op and cost only
+    an attribute check. When enabled, finished spans are kept in memory
+    and written out by `finish()`, either as a summary table printed
+    to stderr, or as a Chrome trace JSON file which can be opened in
+    `about:tracing` or Perfetto.
+
+    Attributes:
+        output (str): `summary`, path to a `.json` trace file, or None to disable tracing.
+    """
+
+    def __init__(self, output=None):
+        self.output = output
+        self.enabled = bool(output)
+
+        self._origin = time.perf_counter()
+        self._events = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args):
+        """
+        Returns a context manager measuring the time spent in its block.
+
+        `args` are stored with the span and shown in Chrome trace.
+        """
+        if not self.enabled:
+            return _no_span
+
+        return _Span(self, name, args)
+
+    def add_span(self, name: str, start: float, end: float, args: dict = None) -> None:
+        """ Records a finished span, `start` and `end` are `time.perf_counter()` values. """
+        event = {
+            "name": name,
+            "start": start - self._origin,
+            "duration": end - start,
+            "thread": threading.get_ident(),
+            "thread_name": threading.current_thread().name,
+            "args": args or {}
+        }
+
+        with self._lock:
+            self._events.append(event)
+
+        logging.debug("Span %s finished.", name, duration=end - start)
+
+    def get_events(self) -> list:
+        with self._lock:
+            return list(self._events)
+
+    def get_summary(self) -> list:
+        """
+        Returns a list of `(name, count, total, mean, max)` tuples with
+        durations in seconds, sorted by total time spent in each span.
+        """
+        totals = {}
+
+        for event in self.get_events():
+            count, total, longest = totals.get(event["name"], (0, 0.0, 0.0))
+            totals[event["name"]] = (count + 1, total + event["duration"], max(longest, event["duration"]))
+
+        summary = [
+            (name, count, total, total / count, longest)
+            for name, (count, total, longest) in totals.items()
+        ]
+
+        return sorted(summary, key=lambda row: row[2], reverse=True)
+
+    def format_summary(self) -> str:
+        summary = self.get_summary()
+        name_width = max([len(row[0]) for row in summary] + [4])
+
+        lines = [f"{'Span':<{name_width}}  {'Count':>6}  {'Total ms':>10}  {'Mean ms':>10}  {'Max ms':>10}"]
+
+        for name, count, total, mean, longest in summary:
+            lines.append(f"{name:<{name_width}}  {count:>6}  {total * 1000:>10.2f}  "
+                         f"{mean * 1000:>10.2f}  {longest * 1000:>10.2f}")
+
+        return "\n".join(lines)
+
+    def get_chrome_trace(self) -> dict:
+        """ Returns recorded spans in Chrome trace event format. """
+        pid = os.getpid()
+        trace_events = []
+        thread_names = {}
+
+        for event in self.get_events():
+            thread_names[event["thread"]] = event["thread_name"]
+
+            trace_events.append({
+                "name": event["name"],
+                "cat": "gradience",
+                "ph": "X",
+                "ts": round(event["start"] * 1e6, 3),
+                "dur": round(event["duration"] * 1e6, 3),
+                "pid": pid,
+                "tid": event["thread"],
+                "args": event["args"]
+            })
+
+        for tid, thread_name in thread_names.items():
+            trace_events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread_name}
+            })
+
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.get_chrome_trace(), file, default=str)
+
+    def finish(self) -> None:
+        """ Writes out recorded spans, as configured by `output`. """
+        if not self.enabled or not self._events:
+            return
+
+        if self.output.endswith(".json"):
+            try:
+                self.write_chrome_trace(self.output)
+            except OSError as e:
+                logging.error(f"Unable to write trace to {self.output}.", exc=e)
+            else:
+                logging.info(f"Trace written to {self.output}")
+        else:
+            print(self.format_summary(), file=sys.stderr)
+
+
+_tracer = Tracer(os.environ.get(TRACE_ENV))
+
+if _tracer.enabled:
+    atexit.register(_tracer.finish)
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns tracer shared by the whole process.
+
+    It is enabled by `GRADIENCE_TRACE` environment variable, set it to
+    `summary` to print a table of span timings on exit, or to a path
+    ending with `.json` to save a Chrome trace file.
+    """
+    return _tracer
+
+
+def span(name: str, **args):
+    """ Measures the enclosed block with the shared tracer, see `Tracer.span()`. """
+    if not _tracer.enabled:
+        return _no_span
+
+    return _Span(_tracer, name, args)
+
+
+def traced(name: str = None):
+    """
+    Decorator measuring every call of the decorated function as a span.
+
+    Span is named after the function's qualified name if `name` isn't set.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+
+            with _Span(_tracer, span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
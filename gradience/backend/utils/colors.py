@@ -18,8 +18,6 @@
 
 import material_color_utilities_python as monet
 
-from gradience.backend.globals import adw_variables_prefixes, adw_palette_prefixes
-
 from gradience.backend.logger import Logger
 
 logging = Logger(logger_name="ColorUtils")
@@ -78,6 +76,40 @@ def argb_to_color_code(argb, alpha=None) -> str:
 
     return rgba_base.format(red, green, blue, alpha)
 
+def color_code_to_rgba(color: str) -> [int, int, int, float]:
+    """
+    This function parses an hexadecimal or rgb/rgba-formatted color code
+    into red, green, blue (0-255) and alpha (0.0-1.0) values.
+
+    Raises `ValueError` if color code can't be parsed (eg. GTK color variables
+    or named colors).
+    """
+    color = color.strip()
+
+    if color.startswith("#"):
+        hex_code = color[1:]
+
+        if len(hex_code) in (3, 4):
+            hex_code = "".join(char * 2 for char in hex_code)
+
+        if len(hex_code) not in (6, 8):
+            raise ValueError(f"Invalid hexadecimal color code: {color}")
+
+        red, green, blue = (int(hex_code[i:i + 2], 16) for i in (0, 2, 4))
+        alpha = int(hex_code[6:8], 16) / 255 if len(hex_code) == 8 else 1.0
+
+        return red, green, blue, alpha
+
+    if color.startswith("rgb"):
+        rgb_list = color[color.index("(") + 1:color.rindex(")")].split(",")
+
+        red, green, blue = (int(float(value)) for value in rgb_list[:3])
+        alpha = float(rgb_list[3]) if len(rgb_list) == 4 else 1.0
+
+        return red, green, blue, alpha
+
+    raise ValueError(f"Unsupported color code format: {color}")
+
 def color_vars_to_color_code(variables: dict, palette: dict) -> dict:
     """
     This function converts GTK color variables to color code
@@ -86,40 +118,64 @@ def color_vars_to_color_code(variables: dict, palette: dict) -> dict:
     You can bypass passing a `palette` parameter if you put an None value to it.
     This isn't recommended however, because in most cases you'll be unable to determine
     if variables you pass don't contain any palette color variables.
-    """
 
-    output = variables
+    References to unknown variables (eg. GTK named colors) are left as they are.
+    Passed `variables` dictionary isn't modified, a new one is returned instead.
+
+    Raises `ValueError` if variables reference each other in a cycle.
+    """
 
-    if palette == None:
+    if palette is None:
         logging.warning("Palette parameter in `color_vars_to_color_code()` function not set. Incoming bugs ahead!")
+        palette = {}
+
+    def __get_reference(color):
+        color = color.strip()
+
+        # Strip '@' from the beginning of the color variable
+        return color[1:] if color.startswith("@") else None
+
+    def __get_palette_color(reference):
+        return palette.get(reference[:-1], {}).get(reference[-1:])
+
+    resolved = {}
 
-    def __has_palette_prefix(color):
-        return any(prefix in color for prefix in adw_palette_prefixes)
+    # Follow every alias chain only until it reaches an already resolved variable,
+    # then resolve the whole chain at once. This way each variable is visited once,
+    # no matter how deep the chains are.
+    for variable in variables:
+        chain = []
+        visited = set()
+        name = variable
 
-    def __has_variable_prefix(color):
-        return any(prefix in color for prefix in adw_variables_prefixes)
+        while name not in resolved:
+            if name in visited:
+                cycle = " -> ".join(f"@{chain_name}" for chain_name in chain + [name])
+                raise ValueError(f"Circular color variable reference: {cycle}")
 
-    def __update_vars(var_type, variable, color_value):
-        if var_type == "palette":
-            output[variable] = palette[color_value[:-1]][color_value[-1:]]
-        elif var_type == "variable":
-            output[variable] = output[color_value]
+            chain.append(name)
+            visited.add(name)
 
-        color_variable_name = output[variable].strip()[1:]
+            color = variables[name]
+            reference = __get_reference(color)
 
-        if __has_palette_prefix(output[variable]):
-            __update_vars("palette", variable, color_variable_name)
+            if reference is None:
+                value = color
+                break
 
-        if __has_variable_prefix(output[variable]):
-            __update_vars("variable", variable, color_variable_name)
+            if (palette_color := __get_palette_color(reference)) is not None:
+                value = palette_color
+                break
 
-    for variable, color in output.items():
-        color_value = color.strip()[1:] # Strip spaces and remove '@' from the beginning of the color variable
+            if reference not in variables:
+                value = color
+                break
 
-        if __has_palette_prefix(color_value) and palette != None:
-            __update_vars("palette", variable, color_value)
+            name = reference
+        else:
+            value = resolved[name]
 
-        if __has_variable_prefix(color_value):
-            __update_vars("variable", variable, color_value)
+        for name in chain:
+            resolved[name] = value
 
-    return output
+    return {variable: resolved[variable] for variable in variables}
@@ -17,40 +17,195 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import threading
+
+from gi.repository import GLib
 
 from gradience.backend.models.preset import Preset
 from gradience.backend.utils.subprocess import GradienceSubprocess
 from gradience.backend.utils.common import extract_version
 
+from gradience.backend.logger import Logger
+
 # TODO: Remove this import later (imports from gradience.frontend are not allowed in backend)
 from gradience.frontend.schemas.shell_schema import shell_schema
 
+logging = Logger(logger_name="GnomeUtils")
 
-# TODO: Return failure if command was not found
-def get_shell_version() -> str:
-    cmd_list = ["gnome-shell", "--version"]
-    process = GradienceSubprocess()
 
-    completed = process.run(cmd_list, allow_escaping=True)
-    stdout = process.get_stdout_data(completed, decode=True)
+# Lists everything the environment probe needs in a single host process,
+# sections are separated by the marker line, so failing commands leave them empty
+PROBE_MARKER = "--gradience-probe--"
+PROBE_SCRIPT = f"""
+gnome-shell --version 2>/dev/null
+echo "{PROBE_MARKER}"
+gnome-extensions list 2>/dev/null
+echo "{PROBE_MARKER}"
+gnome-extensions list --enabled 2>/dev/null
+exit 0
+"""
+
+
+class GnomeEnvironment:
+    """
+    Snapshot of the GNOME environment Gradience is running in.
+
+    Use `get_gnome_environment()` or `get_gnome_environment_async()` to
+    retrieve it, as probing the environment requires spawning host processes.
+    `shell_version` is None if GNOME Shell isn't installed.
+    """
+
+    def __init__(self, desktop: str, shell_version: str = None,
+                 installed_extensions: frozenset = frozenset(),
+                 enabled_extensions: frozenset = frozenset()):
+        self.desktop = desktop
+        self.shell_version = shell_version
+        self.installed_extensions = installed_extensions
+        self.enabled_extensions = enabled_extensions
+
+    @property
+    def is_gnome(self) -> bool:
+        return "gnome" in self.desktop.lower()
+
+    @property
+    def shell_major_version(self) -> int:
+        if not self.shell_version:
+            return None
+
+        return int(self.shell_version.split(".")[0])
+
+    def is_ext_installed(self, uuid: str, check_enabled: bool = False) -> bool:
+        if check_enabled:
+            return uuid in self.enabled_extensions
+
+        return uuid in self.installed_extensions
+
+    @classmethod
+    def new_from_probe_output(cls, stdout: str) -> "GnomeEnvironment":
+        # Sections missing from incomplete output (eg. when the host process failed) are left empty
+        sections = stdout.split(PROBE_MARKER, 2)
+        version_output, installed_output, enabled_output = sections + [""] * (3 - len(sections))
+
+        try:
+            shell_version = extract_version(version_output, "GNOME Shell")
+        except AttributeError: # No version found
+            shell_version = None
+
+        return cls(
+            desktop=os.environ.get("XDG_CURRENT_DESKTOP", ""),
+            shell_version=shell_version,
+            installed_extensions=frozenset(installed_output.split()),
+            enabled_extensions=frozenset(enabled_output.split())
+        )
+
+
+_environment = None
+_environment_lock = threading.Lock()
+_pending_callbacks = []
+
+def get_gnome_environment() -> GnomeEnvironment:
+    """
+    Returns the `GnomeEnvironment`, probing it on the first call.
+
+    The result is cached for the rest of the session, call
+    `invalidate_gnome_environment()` when it might have changed,
+    eg. after the user is asked to install or enable an extension.
+    """
+    global _environment
+
+    with _environment_lock:
+        if _environment is None:
+            cmd_list = ["sh", "-c", PROBE_SCRIPT]
+            process = GradienceSubprocess()
+
+            completed = process.run(cmd_list, allow_escaping=True, use_host_helper=True)
+            stdout = process.get_stdout_data(completed, decode=True)
+
+            _environment = GnomeEnvironment.new_from_probe_output(stdout)
+            logging.debug(f"Probed GNOME environment, Shell version: {_environment.shell_version}")
+
+        return _environment
 
-    shell_version = extract_version(stdout, "GNOME Shell")
+def get_gnome_environment_async(callback: callable, *user_data) -> None:
+    """
+    Asynchronous variant of `get_gnome_environment()`.
+
+    `callback` is called on the main loop with the `GnomeEnvironment`
+    (or None, if it couldn't be probed) followed by `user_data`.
+    Concurrent requests share a single probe.
+    """
+    if _environment is not None:
+        GLib.idle_add(_run_callback, callback, _environment, user_data)
+        return
+
+    _pending_callbacks.append((callback, user_data))
+
+    if len(_pending_callbacks) > 1:
+        return
+
+    def __on_finished(completed, error):
+        global _environment
+
+        # Cleared first, so a failure below can't block later requests
+        callbacks = _pending_callbacks.copy()
+        _pending_callbacks.clear()
+
+        environment = None
+
+        if error:
+            logging.warning("Unable to probe GNOME environment.", exc=error)
+        else:
+            try:
+                environment = GnomeEnvironment.new_from_probe_output(completed.stdout.decode())
+            except (ValueError, AttributeError) as e:
+                logging.warning("Unable to parse GNOME environment probe output.", exc=e)
+            else:
+                with _environment_lock:
+                    _environment = environment
+
+        for callback, user_data in callbacks:
+            callback(environment, *user_data)
+
+    cmd_list = ["sh", "-c", PROBE_SCRIPT]
+    GradienceSubprocess().run_async(cmd_list, __on_finished, allow_escaping=True)
+
+def _run_callback(callback, environment, user_data):
+    callback(environment, *user_data)
+
+    return GLib.SOURCE_REMOVE
+
+def invalidate_gnome_environment() -> None:
+    """ Drops the cached `GnomeEnvironment`, so it's probed again on the next use. """
+    global _environment
+
+    with _environment_lock:
+        _environment = None
+
+def get_shell_version() -> str:
+    shell_version = get_gnome_environment().shell_version
+
+    if shell_version is None:
+        raise FileNotFoundError("GNOME Shell is not installed")
 
     return shell_version
 
 def get_full_shell_version() -> str:
-    cmd_list = ["gnome-shell", "--version"]
-    process = GradienceSubprocess()
+    return get_shell_version()
 
-    completed = process.run(cmd_list, allow_escaping=True)
-    stdout = process.get_stdout_data(completed, decode=True)
+def get_full_shell_version_async(callback: callable, *user_data) -> None:
+    """
+    Asynchronous variant of `get_full_shell_version()`.
 
-    shell_version = stdout[12:]
+    `callback` is called on the main loop with the Shell version
+    (or None, if it couldn't be retrieved) followed by `user_data`.
+    """
+    def __on_environment(environment):
+        callback(environment.shell_version if environment else None, *user_data)
 
-    return shell_version
+    get_gnome_environment_async(__on_environment)
 
 def is_gnome_available() -> bool:
-    xdg_current_desktop = os.environ.get("XDG_CURRENT_DESKTOP").lower()
+    xdg_current_desktop = os.environ.get("XDG_CURRENT_DESKTOP", "").lower()
 
     if "gnome" in xdg_current_desktop:
         return True
@@ -65,24 +220,20 @@ def is_shell_ext_installed(uuid: str, check_enabled: bool = False) -> bool:
     `check_enabled` parameter allows for checking if extension is enabled.
     """
 
-    if check_enabled:
-        cmd_list = ["gnome-extensions", "list", "--enabled"]
-    else:
-        cmd_list = ["gnome-extensions", "list"]
+    return get_gnome_environment().is_ext_installed(uuid, check_enabled)
 
-    process = GradienceSubprocess()
-
-    completed = process.run(cmd_list, allow_escaping=True)
-    stdout = process.get_stdout_data(completed, decode=True)
-
-    ext_list = stdout.split("\n")
-    if ext_list[-1] == "":
-        ext_list.pop(-1)
+def is_shell_ext_installed_async(uuid: str, callback: callable, *user_data, check_enabled: bool = False) -> None:
+    """
+    Asynchronous variant of `is_shell_ext_installed()`.
 
-    if uuid in ext_list:
-        return True
+    `callback` is called on the main loop with the result followed by `user_data`.
+    If the environment can't be probed, the extension is reported as not installed.
+    """
+    def __on_environment(environment):
+        installed = environment.is_ext_installed(uuid, check_enabled) if environment else False
+        callback(installed, *user_data)
 
-    return False
+    get_gnome_environment_async(__on_environment)
 
 def get_shell_colors(preset_variables: Preset.variables) -> dict:
     shell_colors = {}
@@ -23,17 +23,23 @@
 
 import os
 import re
+import json
 import shutil
+import hashlib
+import shlex
 import os.path
-import xml.dom.minidom
 import gettext
 
-from subprocess import SubprocessError, CompletedProcess
+from xml.etree import ElementTree
+
+from functools import lru_cache
+from contextlib import contextmanager
 
 from gi.repository import Gio, GLib
 
 from gradience.backend.utils.subprocess import GradienceSubprocess
 from gradience.backend.constants import localedir, app_id
+from gradience.backend.globals import user_cache_dir
 
 from gradience.backend.logger import Logger
 
@@ -41,15 +47,59 @@ logging = Logger(logger_name="GSettings")
 
 
 _SCHEMA_CACHE = {}
-_GSETTINGS_SCHEMAS = set(Gio.Settings.list_schemas())
-_GSETTINGS_RELOCATABLE_SCHEMAS = set(Gio.Settings.list_relocatable_schemas())
+
+
+@lru_cache(maxsize=None)
+def _get_installed_schemas() -> (frozenset, frozenset):
+    """
+    Returns IDs of installed non-relocatable and relocatable schemas.
+
+    Schemas are enumerated on first use instead of at import time,
+    as most users of this module never construct a `GSettingsSetting`.
+    """
+    schema_source = Gio.SettingsSchemaSource.get_default()
+
+    if schema_source is None:
+        return frozenset(), frozenset()
+
+    schemas, relocatable_schemas = schema_source.list_schemas(True)
+
+    return frozenset(schemas), frozenset(relocatable_schemas)
 
 
 class GSettingsMissingError(Exception):
     pass
 
 
+def get_settings(schema_name: str) -> Gio.Settings:
+    """
+    Returns plain `Gio.Settings` for an installed schema, eg. to
+    listen to its change signals.
+
+    Raises `GSettingsMissingError` if the schema isn't installed.
+    """
+    schemas, _relocatable_schemas = _get_installed_schemas()
+
+    if schema_name not in schemas:
+        raise GSettingsMissingError(schema_name)
+
+    return Gio.Settings.new(schema_name)
+
+
+def _get_messages_locale() -> str:
+    # Same environment variables gettext looks at when choosing a translation
+    for envar in ("LANGUAGE", "LC_ALL", "LC_MESSAGES", "LANG"):
+        if value := os.environ.get(envar):
+            return value
+
+    return "C"
+
+
 class _GSettingsSchema:
+    # Parsed schema metadata is cached on disk, so short-lived processes (like CLI) \
+    # don't need to parse schema XML files every time a settings object is created
+    CACHE_DIR = os.path.join(user_cache_dir, "gradience", "gsettings")
+
     def __init__(self, schema_name, schema_dir=None, schema_filename=None, **options):
         if not schema_filename:
             schema_filename = schema_name + ".gschema.xml"
@@ -67,65 +117,124 @@ class _GSettingsSchema:
             assert (False)
 
         self._schema_name = schema_name
-        self._schema = {}
+        self._schema = self._load_cache(schema_path)
 
-        try:
-            dom = xml.dom.minidom.parse(schema_path)
-            global_gettext_domain = dom.documentElement.getAttribute(
-                'gettext-domain')
+        if self._schema is None:
             try:
-                if global_gettext_domain:
-                    # We can't know where the schema owner was installed, let's assume it's
-                    # the same prefix as ours
-                    global_translation = gettext.translation(
-                        global_gettext_domain, localedir)
-                else:
-                    global_translation = gettext.NullTranslations()
-            except IOError:
-                global_translation = None
-                logging.debug("No translated schema for %s (domain: %s)" % (
-                    schema_name, global_gettext_domain))
-            for schema in dom.getElementsByTagName("schema"):
-                gettext_domain = schema.getAttribute('gettext-domain')
-                try:
-                    if gettext_domain:
-                        translation = gettext.translation(
-                            gettext_domain, localedir)
-                    else:
-                        translation = global_translation
-                except IOError:
-                    translation = None
-                    logging.debug("Schema not translated %s (domain: %s)" % (
-                        schema_name, gettext_domain))
-                if schema_name == schema.getAttribute("id"):
-                    for key in schema.getElementsByTagName("key"):
-                        name = key.getAttribute("name")
-                        # summary is 'compulsory', description is optional
-                        # …in theory, but we should not barf on bad schemas ever
-                        try:
-                            summary = key.getElementsByTagName(
-                                "summary")[0].childNodes[0].data
-                        except:
-                            summary = ""
-                            logging.info("Schema missing summary %s (key %s)" %
-                                         (os.path.basename(schema_path), name))
-                        try:
-                            description = key.getElementsByTagName(
-                                "description")[0].childNodes[0].data
-                        except:
-                            description = ""
-
-                        # if missing translations, use the untranslated values
-                        self._schema[name] = dict(
-                            summary=translation.gettext(
-                                summary) if translation else summary,
-                            description=translation.gettext(
-                                description) if translation else description
-                        )
-
-        except:
-            logging.critical("Error parsing schema %s (%s)" %
-                             (schema_name, schema_path), exc_info=True)
+                self._schema = self._parse_schema(schema_path)
+            except (OSError, ElementTree.ParseError) as e:
+                logging.critical("Error parsing schema %s (%s)" %
+                                 (schema_name, schema_path), exc=e)
+                self._schema = {}
+            else:
+                self._save_cache(schema_path)
+
+    def _parse_schema(self, schema_path):
+        schema = {}
+
+        global_translation = gettext.NullTranslations()
+        translation = None
+        in_schema = False
+
+        key_name = None
+        key_texts = {}
+
+        # Stream the file instead of building a whole DOM tree, \
+        # most of its contents (defaults, choices, other schemas) are skipped anyway
+        for event, element in ElementTree.iterparse(schema_path, events=("start", "end")):
+            if event == "start":
+                if element.tag == "schemalist":
+                    global_translation = self._get_translation(
+                        element.get("gettext-domain"), global_translation)
+                elif element.tag == "schema":
+                    in_schema = self._schema_name == element.get("id")
+                    if in_schema:
+                        translation = self._get_translation(
+                            element.get("gettext-domain"), global_translation)
+                elif element.tag == "key" and in_schema:
+                    key_name = element.get("name")
+                    key_texts = {}
+                continue
+
+            if element.tag in ("summary", "description") and key_name is not None:
+                key_texts.setdefault(element.tag, element.text or "")
+            elif element.tag == "key" and key_name is not None:
+                # summary is 'compulsory', description is optional
+                # …in theory, but we should not barf on bad schemas ever
+                summary = key_texts.get("summary", "")
+                description = key_texts.get("description", "")
+
+                if not summary:
+                    logging.info("Schema missing summary %s (key %s)" %
+                                 (os.path.basename(schema_path), key_name))
+
+                # if missing translations, use the untranslated values
+                schema[key_name] = dict(
+                    summary=translation.gettext(
+                        summary) if translation and summary else summary,
+                    description=translation.gettext(
+                        description) if translation and description else description
+                )
+                key_name = None
+            elif element.tag == "schema":
+                in_schema = False
+                element.clear()
+
+        return schema
+
+    def _get_translation(self, gettext_domain, fallback):
+        if not gettext_domain:
+            return fallback
+
+        try:
+            # We can't know where the schema owner was installed, let's assume it's
+            # the same prefix as ours
+            return gettext.translation(gettext_domain, localedir)
+        except OSError:
+            logging.debug("No translated schema for %s (domain: %s)" % (
+                self._schema_name, gettext_domain))
+            return None
+
+    def _get_cache_path(self, schema_path):
+        cache_name = hashlib.sha256(f"{schema_path}:{self._schema_name}".encode("utf-8")).hexdigest()
+
+        return os.path.join(self.CACHE_DIR, cache_name + ".json")
+
+    def _get_cache_key(self, schema_path):
+        return {
+            "path": schema_path,
+            "mtime": os.stat(schema_path).st_mtime_ns,
+            "locale": _get_messages_locale()
+        }
+
+    def _load_cache(self, schema_path):
+        try:
+            with open(self._get_cache_path(schema_path), "r", encoding="utf-8") as file:
+                cache = json.load(file)
+
+            cache_key = self._get_cache_key(schema_path)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if cache.get("key") != cache_key:
+            return None
+
+        return cache.get("schema")
+
+    def _save_cache(self, schema_path):
+        cache_path = self._get_cache_path(schema_path)
+
+        try:
+            cache = {"key": self._get_cache_key(schema_path), "schema": self._schema}
+
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+
+            with open(cache_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(cache, file)
+
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError as e:
+            logging.debug("Unable to cache schema %s: %s" % (self._schema_name, e))
 
     def __repr__(self):
         return "<gradience._GSettingsSchema: %s>" % self._schema_name
@@ -135,10 +244,12 @@ class GSettingsSetting(Gio.Settings):
     def __init__(self, schema_name, schema_dir=None, schema_path=None, **options):
 
         if schema_dir is None:
-            if schema_path is None and schema_name not in _GSETTINGS_SCHEMAS:
+            schemas, relocatable_schemas = _get_installed_schemas()
+
+            if schema_path is None and schema_name not in schemas:
                 raise GSettingsMissingError(schema_name)
 
-            if schema_path is not None and schema_name not in _GSETTINGS_RELOCATABLE_SCHEMAS:
+            if schema_path is not None and schema_name not in relocatable_schemas:
                 raise GSettingsMissingError(schema_name)
 
             if schema_path is None:
@@ -164,6 +275,17 @@ class GSettingsSetting(Gio.Settings):
 
         self._schema = _SCHEMA_CACHE[schema_name]
 
+    @contextmanager
+    def batch(self):
+        """
+        Counterpart of `FlatpakGSettings.batch()`, so callers can use both the same way.
+
+        Changes are written immediately, as each of them is a cheap dconf write.
+        Delaying them would merge eg. `reset()` followed by `set_string()` of the
+        same value into a no-op, and `changed` signal wouldn't be emitted.
+        """
+        yield self
+
     def _on_changed(self, settings, key_name):
         logging.debug("Change: %s %s -> %s" %
               (self.props.schema, key_name, self[key_name]))
@@ -210,63 +332,104 @@ class GSettingsSetting(Gio.Settings):
 
 
 class FlatpakGSettings:
+    """
+    Accesses settings on the host system using `gsettings` command
+    when running inside Flatpak sandbox.
+
+    Every operation spawns a host process, so use `batch()` when changing
+    multiple keys and `get_many()` when reading them.
+    """
     def __init__(self, schema_name, schema_dir=None, **options):
         self.schema_name = schema_name
         self.schema_dir = schema_dir
 
-    def list_keys(self) -> str:
-        dconf_cmd = ["gsettings", "list-keys", self.schema_name]
-        process = GradienceSubprocess()
+        self._batch_depth = 0
+        self._pending = []
 
-        if self.schema_dir:
-            self._insert_schemadir(dconf_cmd)
+    @contextmanager
+    def batch(self):
+        """
+        Queues `set()` and `reset()` calls made inside the `with` block and
+        runs them all in a single host process when the block ends.
+        Queued changes are dropped if the block raises an exception.
+        """
+        self._batch_depth += 1
 
         try:
-            completed = process.run(dconf_cmd, allow_escaping=True)
-            stdout = process.get_stdout_data(completed, decode=True)
-        except SubprocessError:
+            yield self
+        except Exception:
+            self._pending = []
             raise
-        else:
-            return stdout
+        finally:
+            self._batch_depth -= 1
 
-    def get(self, key:str) -> CompletedProcess:
-        dconf_cmd = ["gsettings", "get", self.schema_name, key]
-        process = GradienceSubprocess()
+        if self._batch_depth == 0:
+            self.flush()
 
-        if self.schema_dir:
-            self._insert_schemadir(dconf_cmd)
+    def flush(self) -> None:
+        """ Runs all queued operations. """
+        if not self._pending:
+            return
 
-        try:
-            completed = process.run(dconf_cmd, allow_escaping=True)
-            stdout = process.get_stdout_data(completed, decode=True)
-        except SubprocessError:
-            raise
-        else:
-            return stdout
+        commands, self._pending = self._pending, []
+        self._run_commands(commands)
 
-    def set(self, key:str, value:str) -> None:
-        dconf_cmd = ["gsettings", "set", self.schema_name, key, value]
-        process = GradienceSubprocess()
+    def list_keys(self) -> str:
+        self.flush()
 
-        if self.schema_dir:
-            self._insert_schemadir(dconf_cmd)
+        return self._run_commands([self._get_command("list-keys", self.schema_name)])
 
-        try:
-            process.run(dconf_cmd, allow_escaping=True)
-        except SubprocessError:
-            raise
+    def get(self, key:str) -> str:
+        self.flush()
+
+        return self._run_commands([self._get_command("get", self.schema_name, key)])
+
+    def get_many(self, keys:list) -> dict:
+        """ Reads values of multiple keys in a single host process. """
+        self.flush()
+
+        commands = [self._get_command("get", self.schema_name, key) for key in keys]
+        stdout = self._run_commands(commands)
+
+        # `gsettings get` always prints a value in a single line
+        return dict(zip(keys, stdout.splitlines()))
+
+    def set(self, key:str, value:str) -> None:
+        self._queue_command(self._get_command("set", self.schema_name, key, value))
 
     def reset(self, key:str = None) -> None:
-        dconf_cmd = ["gsettings", "reset", self.schema_name, key]
-        process = GradienceSubprocess()
+        if key is None:
+            command = self._get_command("reset-recursively", self.schema_name)
+        else:
+            command = self._get_command("reset", self.schema_name, key)
+
+        self._queue_command(command)
+
+    def _queue_command(self, command):
+        self._pending.append(command)
+
+        if self._batch_depth == 0:
+            self.flush()
+
+    def _get_command(self, *args):
+        dconf_cmd = ["gsettings", *args]
 
         if self.schema_dir:
             self._insert_schemadir(dconf_cmd)
 
-        try:
-            process.run(dconf_cmd, allow_escaping=True)
-        except SubprocessError:
-            raise
+        return dconf_cmd
+
+    def _run_commands(self, commands) -> str:
+        if len(commands) == 1:
+            command = commands[0]
+        else:
+            # Chain commands in one shell, stopping at the first failure
+            command = ["sh", "-c", " && ".join(shlex.join(dconf_cmd) for dconf_cmd in commands)]
+
+        process = GradienceSubprocess()
+        completed = process.run(command, allow_escaping=True, use_host_helper=True)
+
+        return process.get_stdout_data(completed, decode=True)
 
     def _insert_schemadir(self, dconf_cmd):
         dconf_cmd.insert(1, "--schemadir")
@@ -0,0 +1,195 @@
+# host_helper.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import shlex
+import atexit
+import secrets
+import selectors
+import threading
+
+import subprocess
+from subprocess import CompletedProcess, CalledProcessError, TimeoutExpired
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="HostHelper")
+
+
+# Reads one shell-quoted command per line from stdin, runs it and writes its
+# stdout followed by a line with the session marker and the exit status
+HELPER_SCRIPT = """
+marker="$1"
+nl='
+'
+while IFS= read -r request; do
+    eval "$request" </dev/null 2>/dev/null
+    printf '\\n%s %s\\n' "$marker" "$?"
+done
+"""
+
+
+class HostHelper:
+    """
+    Long-lived shell process used to run commands on the host system.
+
+    The helper is started on the first request and then reused for the
+    rest of the session, so every following command costs a pipe round trip
+    instead of spawning a new `flatpak-spawn --host` process.
+
+    Requests are single lines with a shell-quoted command. Responses are
+    the command's stdout, followed by a line with a random per-session
+    marker and the exit status. Stderr of commands is discarded.
+
+    `command_prefix` is prepended to the helper command line. Setting it to
+    an empty list runs the helper locally, eg. for testing it outside Flatpak.
+    """
+
+    def __init__(self, command_prefix=None):
+        self.command_prefix = ["flatpak-spawn", "--host"] if command_prefix is None else command_prefix
+
+        self._process = None
+        self._marker = None
+        self._lock = threading.Lock()
+
+    def run(self, command: list, timeout: int = None) -> CompletedProcess:
+        """
+        Runs `command` through the helper and returns its result.
+
+        Raises `CalledProcessError` if the command exits with non-zero status
+        and `TimeoutExpired` if it doesn't finish in `timeout` seconds.
+        """
+        with self._lock:
+            try:
+                stdout, returncode = self._request(command, timeout)
+            except (BrokenPipeError, EOFError):
+                # Helper might have exited (eg. host session restarted), try once more with a new one
+                logging.debug("Host helper exited, restarting it")
+                self._stop()
+                stdout, returncode = self._request(command, timeout)
+
+        if returncode != 0:
+            raise CalledProcessError(returncode, command, output=stdout, stderr=b"")
+
+        return CompletedProcess(command, returncode, stdout=stdout, stderr=b"")
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop()
+
+    def _start(self):
+        self._marker = f"gradience-helper-{secrets.token_hex(8)}"
+
+        helper_cmd = self.command_prefix + ["sh", "-c", HELPER_SCRIPT, "sh", self._marker]
+        logging.debug(f"Starting host helper: {self.command_prefix + ['sh']}")
+
+        self._process = subprocess.Popen(helper_cmd, bufsize=0, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _stop(self):
+        if self._process is None:
+            return
+
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=1)
+        except (OSError, TimeoutExpired):
+            self._process.kill()
+
+        self._process = None
+
+    def _quote(self, command):
+        # Requests are line-based, so line breaks in arguments are passed as `$nl` variable
+        return " ".join(shlex.quote(arg).replace("\n", "'\"$nl\"'") for arg in command)
+
+    def _request(self, command, timeout):
+        if self._process is None or self._process.poll() is not None:
+            self._start()
+
+        logging.debug(f"Host helper request: {command}")
+
+        self._process.stdin.write(self._quote(command).encode("utf-8") + b"\n")
+        self._process.stdin.flush()
+
+        try:
+            return self._read_response(timeout)
+        except TimeoutExpired:
+            # There's no way to interrupt a single command, so replace the whole helper
+            self._process.kill()
+            self._process = None
+            raise TimeoutExpired(command, timeout)
+
+    def _read_response(self, timeout):
+        marker = b"\n" + self._marker.encode("utf-8") + b" "
+        stdout_fd = self._process.stdout.fileno()
+        response = bytearray()
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(stdout_fd, selectors.EVENT_READ)
+
+            # Response is complete when the marker line is fully received
+            while (marker_pos := response.find(marker)) == -1 or not response.endswith(b"\n"):
+                if timeout is not None and not selector.select(timeout):
+                    raise TimeoutExpired(None, timeout)
+
+                chunk = os.read(stdout_fd, 65536)
+
+                if not chunk:
+                    raise EOFError("Host helper closed its output")
+
+                response += chunk
+
+        stdout = bytes(response[:marker_pos])
+        returncode = int(response[marker_pos + len(marker):])
+
+        return stdout, returncode
+
+
+class LocalHostHelper:
+    """
+    Stand-in for `HostHelper` used outside Flatpak, where commands
+    can be run directly without any helper process.
+    """
+
+    def run(self, command: list, timeout: int = None) -> CompletedProcess:
+        return subprocess.run(command, check=True, capture_output=True, timeout=timeout)
+
+    def stop(self) -> None:
+        pass
+
+
+_host_helper = None
+_host_helper_lock = threading.Lock()
+
+
+def get_host_helper():
+    """
+    Returns helper shared by the whole process, `HostHelper` inside
+    Flatpak sandbox or `LocalHostHelper` otherwise.
+    """
+    global _host_helper
+
+    with _host_helper_lock:
+        if _host_helper is None:
+            if os.environ.get("FLATPAK_ID"):
+                _host_helper = HostHelper()
+                atexit.register(_host_helper.stop)
+            else:
+                _host_helper = LocalHostHelper()
+
+        return _host_helper
@@ -22,29 +22,34 @@ import os
 from typing import Union
 
 import subprocess
-from subprocess import SubprocessError, CompletedProcess
+from subprocess import SubprocessError, CompletedProcess, CalledProcessError, TimeoutExpired
+
+from gi.repository import GLib, Gio
+
+from gradience.backend.utils.host_helper import get_host_helper
 
 from gradience.backend.logger import Logger
 
 logging = Logger(logger_name="GradienceSubprocess")
 
 
-# TODO: Check how Dev Toolbox has its backend done fully in async using Gio.Task.
-# Example: https://github.com/aleiepure/devtoolbox/blob/main/src/services/gzip_compressor.py
-# TODO: Replace subprocess.run() with subprocess.Popen() for more control over subprocesses
 class GradienceSubprocess:
     """
     Wrapper for Python's `subprocess` module to provide an easy to use
     synchronous process spawning and stdout data retrievement with support
     for Flatpak sandbox escape.
 
+    For use in GUI code, `run_async()` and `run_streaming()` spawn processes
+    with `Gio.Subprocess` without blocking the main loop.
+
     Documentation: https://docs.python.org/3/library/subprocess.html
     """
 
     def __init__(self):
         pass
 
-    def run(self, command: list, timeout: int = None, allow_escaping: bool = False) -> CompletedProcess:
+    def run(self, command: list, timeout: int = None, allow_escaping: bool = False,
+            use_host_helper: bool = False) -> CompletedProcess:
         """
         Spawns synchronously a new child process (subprocess) using Python's `subprocess` module.
 
@@ -53,10 +58,18 @@ class GradienceSubprocess:
 
         You can enable executing commands outside Flatpak sandbox by
         enabling `allow_escaping` parameter.
+
+        Enabling `use_host_helper` together with `allow_escaping` runs the command
+        through a persistent host helper process instead of spawning a new
+        `flatpak-spawn` process every time. Use it for quick queries (eg. `gsettings`),
+        stderr output of the command isn't available then.
         """
 
-        if allow_escaping and os.environ.get('FLATPAK_ID'):
-            command = ['flatpak-spawn', '--host'] + command
+        if allow_escaping and use_host_helper:
+            logging.debug(f"Running with host helper: {command}")
+            return get_host_helper().run(command, timeout=timeout)
+
+        command = self._get_command(command, allow_escaping)
 
         logging.debug(f"Spawning: {command}")
 
@@ -70,6 +83,154 @@ class GradienceSubprocess:
 
         return process
 
+    def run_async(self, command: list, callback: callable, *user_data, timeout: int = None,
+                  cancellable: Gio.Cancellable = None, allow_escaping: bool = False) -> Gio.Cancellable:
+        """
+        Spawns a new child process using `Gio.Subprocess` without blocking the main loop.
+
+        `callback` is called on the main loop with a `CompletedProcess` (or None),
+        an exception (or None) and `user_data`. The exception is `FileNotFoundError`
+        if the command doesn't exist, `CalledProcessError` if it exits with non-zero
+        status, `TimeoutExpired` if it runs longer than `timeout` seconds and
+        `GLib.GError` if it's cancelled.
+
+        Returns a `Gio.Cancellable`, which can be used to cancel the process.
+        """
+        command = self._get_command(command, allow_escaping)
+        cancellable = cancellable or Gio.Cancellable()
+
+        logging.debug(f"Spawning asynchronously: {command}")
+
+        try:
+            process = Gio.Subprocess.new(command,
+                Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_PIPE)
+        except GLib.GError as e:
+            GLib.idle_add(self.__report_spawn_error, callback, command, e, user_data)
+            return cancellable
+
+        timeout_id = None
+
+        def __on_timeout():
+            nonlocal timeout_id
+            timeout_id = None
+
+            logging.warning(f"Process timed out after {timeout} seconds: {command}")
+            process.force_exit()
+
+            return GLib.SOURCE_REMOVE
+
+        def __on_communicated(process, result):
+            timed_out = timeout is not None and timeout_id is None
+
+            if timeout_id is not None:
+                GLib.source_remove(timeout_id)
+
+            try:
+                _success, stdout, stderr = process.communicate_finish(result)
+            except GLib.GError as e:
+                process.force_exit()
+                callback(None, e, *user_data)
+                return
+
+            stdout = stdout.get_data() if stdout else b""
+            stderr = stderr.get_data() if stderr else b""
+            returncode = self.__get_returncode(process)
+
+            completed = CompletedProcess(command, returncode, stdout=stdout, stderr=stderr)
+
+            if timed_out:
+                error = TimeoutExpired(command, timeout, output=stdout, stderr=stderr)
+            elif returncode != 0:
+                error = CalledProcessError(returncode, command, output=stdout, stderr=stderr)
+            else:
+                error = None
+
+            callback(completed, error, *user_data)
+
+        if timeout is not None:
+            timeout_id = GLib.timeout_add_seconds(timeout, __on_timeout)
+
+        process.communicate_async(None, cancellable, __on_communicated)
+
+        return cancellable
+
+    def run_streaming(self, command: list, line_callback: callable, callback: callable, *user_data,
+                      cancellable: Gio.Cancellable = None, allow_escaping: bool = False) -> Gio.Cancellable:
+        """
+        Same as `run_async()`, but stdout is streamed instead of collected.
+
+        `line_callback` is called on the main loop with every line of stdout
+        (without line break) and `user_data` as soon as the line is read.
+        `CompletedProcess` passed to `callback` contains no output.
+        """
+        command = self._get_command(command, allow_escaping)
+        cancellable = cancellable or Gio.Cancellable()
+
+        logging.debug(f"Spawning with streamed output: {command}")
+
+        try:
+            process = Gio.Subprocess.new(command,
+                Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_SILENCE)
+        except GLib.GError as e:
+            GLib.idle_add(self.__report_spawn_error, callback, command, e, user_data)
+            return cancellable
+
+        stream = Gio.DataInputStream.new(process.get_stdout_pipe())
+
+        def __on_line_read(stream, result):
+            try:
+                line, _length = stream.read_line_finish_utf8(result)
+            except GLib.GError as e:
+                process.force_exit()
+                callback(None, e, *user_data)
+                return
+
+            if line is None: # End of stream
+                process.wait_async(cancellable, __on_exited)
+                return
+
+            line_callback(line, *user_data)
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, cancellable, __on_line_read)
+
+        def __on_exited(process, result):
+            try:
+                process.wait_finish(result)
+            except GLib.GError as e:
+                process.force_exit()
+                callback(None, e, *user_data)
+                return
+
+            returncode = self.__get_returncode(process)
+            completed = CompletedProcess(command, returncode, stdout=b"", stderr=b"")
+            error = CalledProcessError(returncode, command) if returncode != 0 else None
+
+            callback(completed, error, *user_data)
+
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, cancellable, __on_line_read)
+
+        return cancellable
+
+    def _get_command(self, command: list, allow_escaping: bool) -> list:
+        if allow_escaping and os.environ.get('FLATPAK_ID'):
+            command = ['flatpak-spawn', '--host'] + command
+
+        return command
+
+    def __get_returncode(self, process: Gio.Subprocess) -> int:
+        if process.get_if_exited():
+            return process.get_exit_status()
+
+        # Follow `subprocess` module convention for processes killed by a signal
+        return -process.get_term_sig()
+
+    def __report_spawn_error(self, callback, command, error, user_data):
+        if error.matches(GLib.spawn_error_quark(), GLib.SpawnError.NOENT):
+            error = FileNotFoundError(f"No such file or directory: '{command[0]}'")
+
+        callback(None, error, *user_data)
+
+        return GLib.SOURCE_REMOVE
+
     def get_stdout_data(self, process: CompletedProcess, decode: bool = False) -> Union[str, bytes]:
         """
         Returns a data retrieved from stdout stream.
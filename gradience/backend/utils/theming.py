@@ -16,15 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
-from gradience.backend.models.preset import Preset
+from functools import lru_cache
 
+from gi.repository import GLib
 
-def generate_gtk_css(app_type: str, preset: Preset) -> str:
-    variables = preset.variables
-    palette = preset.palette
-    custom_css = preset.custom_css
+from gradience.backend.models.preset import Preset
 
-    theming_warning = """/*
+
+theming_warning = """/*
 Generated with Gradience
 
 Issues caused by theming should be reported to Gradience repository, and not to upstream
@@ -34,21 +33,51 @@ https://github.com/GradienceTeam/Gradience
 
 """
 
-    gtk_css = ""
+# Variables and palette blocks are cached separately, keyed by their contents,
+# as palette usually stays the same while variables are being edited
+@lru_cache(maxsize=16)
+def _render_variables(variables: tuple) -> str:
+    return "".join(f"@define-color {key} {value};\n" for key, value in variables)
+
+@lru_cache(maxsize=16)
+def _render_palette(palette: tuple) -> str:
+    return "".join(
+        f"@define-color {prefix_key + key} {value};\n"
+        for prefix_key, shades in palette
+        for key, value in shades
+    )
 
-    for key in variables.keys():
-        gtk_css += f"@define-color {key} {variables[key]};\n"
+def generate_gtk_css(app_type: str, preset: Preset) -> str:
+    variables = preset.variables
+    palette = preset.palette
+    custom_css = preset.custom_css
 
-    for prefix_key in palette.keys():
-        for key in palette[prefix_key].keys():
-            gtk_css += f"@define-color {prefix_key + key} {palette[prefix_key][key]};\n"
+    variables_block = _render_variables(tuple(variables.items()))
+    palette_block = _render_palette(tuple(
+        (prefix_key, tuple(shades.items())) for prefix_key, shades in palette.items()
+    ))
 
-    gtk_css += custom_css.get(app_type, "")
+    return "".join((
+        theming_warning,
+        variables_block,
+        palette_block,
+        custom_css.get(app_type, ""),
+        "\n.navigation-sidebar {\nbackground-color: ",
+        variables["window_bg_color"],
+        ";\n}"
+    ))
 
-    gtk_css += "\n.navigation-sidebar {\nbackground-color: "
-    gtk_css += variables["window_bg_color"]
-    gtk_css += ";\n}"
+@lru_cache(maxsize=4)
+def encode_gtk_css(gtk_css: str) -> GLib.Bytes:
+    """
+    Returns stylesheet generated by `generate_gtk_css()` UTF-8 encoded
+    as `GLib.Bytes`, ready to be passed to `Gtk.CssProvider`.
 
-    final_css = theming_warning + gtk_css
+    Encoded output of the last few stylesheets is cached, so reloading
+    an unchanged preset doesn't encode it again.
+    """
+    return GLib.Bytes.new(gtk_css.encode("utf-8"))
 
-    return final_css
+def generate_gtk_css_bytes(app_type: str, preset: Preset) -> GLib.Bytes:
+    """ Same as `generate_gtk_css()`, but returns the stylesheet encoded by `encode_gtk_css()`. """
+    return encode_gtk_css(generate_gtk_css(app_type, preset))
@@ -0,0 +1,201 @@
+# wallpaper_watcher.py
+#
+# Change the look of Adwaita, with ease
+# Copyright (C) 2023, Gradience Team
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import hashlib
+
+from gi.repository import GLib, Gio
+
+from gradience.backend.globals import is_sandboxed
+from gradience.backend.theming.preset import PresetUtils
+from gradience.backend.utils.subprocess import GradienceSubprocess
+from gradience.backend.utils.gsettings import FlatpakGSettings, get_settings
+
+from gradience.backend.logger import Logger
+
+logging = Logger(logger_name="WallpaperWatcher")
+
+
+BACKGROUND_SCHEMA = "org.gnome.desktop.background"
+INTERFACE_SCHEMA = "org.gnome.desktop.interface"
+
+WALLPAPER_KEYS = ("picture-uri", "picture-uri-dark")
+
+
+def picture_uri_to_path(picture_uri: str) -> str:
+    if picture_uri.startswith("file://"):
+        return Gio.File.new_for_uri(picture_uri).get_path()
+
+    return picture_uri or None
+
+
+def get_preset_hash(variables: dict, palette: dict) -> str:
+    """ Returns hash of preset colors, which stays the same for the same generated preset. """
+    colors = json.dumps({"variables": variables, "palette": palette}, sort_keys=True)
+
+    return hashlib.sha256(colors.encode("utf-8")).hexdigest()
+
+
+class WallpaperWatcher:
+    """
+    Regenerates and applies a Monet preset whenever the desktop wallpaper changes.
+
+    Changes of `picture-uri`, `picture-uri-dark` and `color-scheme` keys
+    are received from GSettings signals, or from `gsettings monitor` running
+    on the host when sandboxed. Bursts of changes (eg. both wallpaper keys
+    being set by Settings app) are debounced into a single update.
+
+    Palettes are generated by `service`, which caches them per image, and
+    the preset is applied only if its colors differ from the applied one.
+    """
+
+    def __init__(self, service, app_type: str = "gtk4", tone: int = 20, debounce: int = 1500):
+        self.service = service
+        self.app_types = ("gtk4", "gtk3") if app_type == "both" else (app_type,)
+        self.tone = tone
+        self.debounce = debounce
+
+        self._background_settings = None
+        self._interface_settings = None
+
+        self._settings = []
+        self._monitors = []
+        self._debounce_id = None
+
+    def start(self) -> None:
+        if is_sandboxed():
+            self._background_settings = FlatpakGSettings(BACKGROUND_SCHEMA)
+            self._interface_settings = FlatpakGSettings(INTERFACE_SCHEMA)
+
+            for schema in (BACKGROUND_SCHEMA, INTERFACE_SCHEMA):
+                self._monitors.append(GradienceSubprocess().run_streaming(
+                    ["gsettings", "monitor", schema], self._on_monitor_line,
+                    self._on_monitor_exited, schema, allow_escaping=True))
+        else:
+            # Raises GSettingsMissingError outside of GNOME
+            self._background_settings = get_settings(BACKGROUND_SCHEMA)
+            self._interface_settings = get_settings(INTERFACE_SCHEMA)
+
+            for key in WALLPAPER_KEYS:
+                self._background_settings.connect(f"changed::{key}", self._on_setting_changed)
+            self._interface_settings.connect("changed::color-scheme", self._on_setting_changed)
+
+            self._settings = [self._background_settings, self._interface_settings]
+
+        logging.info("Watching wallpaper changes")
+
+        # Apply preset for the current wallpaper, if it isn't already
+        self._schedule_update()
+
+    def stop(self) -> None:
+        for cancellable in self._monitors:
+            cancellable.cancel()
+        self._monitors = []
+
+        for settings in self._settings:
+            settings.disconnect_by_func(self._on_setting_changed)
+        self._settings = []
+
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+            self._debounce_id = None
+
+    def update(self) -> bool:
+        """
+        Applies Monet preset generated from the current wallpaper.
+
+        Returns False if the applied preset already has the same colors.
+        """
+        image_path, theme = self._get_wallpaper()
+
+        if not image_path:
+            logging.warning("No wallpaper set, nothing to generate a preset from.")
+            return False
+
+        preset = self.service.get_monet_preset(image_path, self.tone, theme)
+        preset_hash = get_preset_hash(preset.variables, preset.palette)
+
+        # Applied preset is read on every update, as the app or CLI could have changed it since
+        if preset_hash == self._get_applied_hash():
+            logging.debug("Monet preset for %s is already applied", image_path)
+            return False
+
+        for app_type in self.app_types:
+            PresetUtils().apply_preset(app_type, preset)
+
+        logging.info(f"Applied {theme} Monet preset generated from {image_path}")
+
+        return True
+
+    def _get_applied_hash(self):
+        try:
+            applied_preset = PresetUtils().get_applied_preset(self.app_types[0])
+        except OSError:
+            return None
+
+        if applied_preset is None:
+            return None
+
+        return get_preset_hash(applied_preset["variables"], applied_preset["palette"])
+
+    def _get_wallpaper(self):
+        if is_sandboxed():
+            # `gsettings get` prints values in GVariant text format
+            values = self._background_settings.get_many(list(WALLPAPER_KEYS))
+            values = {key: GLib.Variant.parse(None, value, None, None).unpack() for key, value in values.items()}
+            color_scheme = GLib.Variant.parse(None, self._interface_settings.get("color-scheme"), None, None).unpack()
+        else:
+            values = {key: self._background_settings.get_string(key) for key in WALLPAPER_KEYS}
+            color_scheme = self._interface_settings.get_string("color-scheme")
+
+        if color_scheme == "prefer-dark":
+            return picture_uri_to_path(values["picture-uri-dark"] or values["picture-uri"]), "dark"
+
+        return picture_uri_to_path(values["picture-uri"]), "light"
+
+    def _schedule_update(self):
+        if self._debounce_id:
+            GLib.source_remove(self._debounce_id)
+
+        self._debounce_id = GLib.timeout_add(self.debounce, self._on_debounce_timeout)
+
+    def _on_debounce_timeout(self):
+        self._debounce_id = None
+
+        try:
+            self.update()
+        except (OSError, KeyError, ValueError, AttributeError, json.JSONDecodeError, GLib.GError) as e:
+            logging.error("Unable to update Monet preset from wallpaper.", exc=e)
+
+        return GLib.SOURCE_REMOVE
+
+    def _on_setting_changed(self, _settings, key):
+        logging.debug("Setting changed: %s", key)
+        self._schedule_update()
+
+    def _on_monitor_line(self, line, schema):
+        # Lines look like `picture-uri: 'file:///...'`
+        key = line.split(":", 1)[0].strip()
+
+        if key in WALLPAPER_KEYS or key == "color-scheme":
+            logging.debug("Setting changed: %s", key)
+            self._schedule_update()
+
+    def _on_monitor_exited(self, _completed, error, schema):
+        if self._monitors:
+            logging.warning(f"Monitoring of {schema} settings has stopped.", exc=error)
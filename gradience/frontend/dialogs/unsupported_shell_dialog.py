@@ -19,12 +19,11 @@
 from gi.repository import Gtk, Adw
 
 from gradience.backend.constants import rootdir
-from gradience.backend.utils.gnome import get_full_shell_version
 
 class GradienceUnsupportedShellDialog(Adw.MessageDialog):
     __gtype_name__ = "GradienceUnsupportedShellDialog"
 
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, shell_version=None, **kwargs):
         super().__init__(**kwargs)
 
         self.parent = parent
@@ -37,7 +36,11 @@ class GradienceUnsupportedShellDialog(Adw.MessageDialog):
 
         self.set_transient_for(self.win)
 
-        self.set_heading(_(f"Unsupported Shell Version ({get_full_shell_version()})"))
+        # Version isn't detected here, as that would block the UI
+        if shell_version is None:
+            self.set_heading(_("Unsupported Shell Version"))
+        else:
+            self.set_heading(_(f"Unsupported Shell Version ({shell_version.strip()})"))
         self.set_body(_("The Shell version you are using is not supported by Gradience. Please upgrade to a newer version of GNOME."))
 
         self.add_response("ok", _("OK"))
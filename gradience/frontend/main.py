@@ -18,9 +18,7 @@
 
 import os
 import sys
-import threading
 
-from pathlib import Path
 from material_color_utilities_python import hexFromArgb
 from gi.repository import GObject, Gtk, Gdk, Gio, Adw, GLib
 
@@ -29,8 +27,11 @@ from gradience.backend.css_parser import parse_css
 from gradience.backend.models.preset import Preset
 from gradience.backend.theming.preset import PresetUtils
 from gradience.backend.theming.monet import Monet
+from gradience.backend.preset_catalog import PresetCatalog
+from gradience.backend.preset_download_queue import PresetDownloadQueue
 from gradience.backend.utils.common import to_slug_case
-from gradience.backend.utils.theming import generate_gtk_css
+from gradience.backend.utils.theming import generate_gtk_css, encode_gtk_css
+from gradience.backend.tracing import traced
 from gradience.backend.constants import rootdir, app_id, rel_ver
 
 from gradience.frontend.views.main_window import GradienceMainWindow
@@ -45,6 +46,7 @@ from gradience.frontend.dialogs.save_dialog import GradienceSaveDialog
 from gradience.frontend.widgets.custom_css_group import GradienceCustomCSSGroup
 
 from gradience.frontend.utils.actions import ActionHelpers
+from gradience.frontend.utils.run_async import RunAsync
 from gradience.frontend.schemas.preset_schema import preset_schema
 
 from gradience.backend.logger import Logger
@@ -79,7 +81,6 @@ class GradienceApplication(Adw.Application):
         self.custom_css = {}
         self.custom_css_group = None
 
-        self.custom_presets = {}
         self.global_errors = []
         self.current_css_provider = None
 
@@ -97,6 +98,9 @@ class GradienceApplication(Adw.Application):
 
         self.use_jsdelivr = self.settings.get_boolean("use-jsdelivr")
 
+        self.download_queue = PresetDownloadQueue()
+        self.preset_catalog = PresetCatalog()
+
     def do_activate(self):
         """Called when the application is activated."""
 
@@ -113,6 +117,8 @@ class GradienceApplication(Adw.Application):
                 maximized=self.settings.get_boolean("window-maximized")
             )
 
+        self.download_queue.resume()
+
         self.plugins_list = GradiencePluginsList(self.win)
         self.setup_plugins()
 
@@ -156,7 +162,7 @@ class GradienceApplication(Adw.Application):
                         self.show_about_window)
 
         self.load_preset_from_css()
-        self.reload_user_defined_presets()
+        self.setup_presets_menu()
 
         if self.first_run:
             welcome = GradienceWelcomeWindow(self.win)
@@ -183,109 +189,103 @@ class GradienceApplication(Adw.Application):
         self.settings.set_value(
             "favourite", GLib.Variant("as", self.favourite))
 
-    def reload_user_defined_presets(self):
-        if self.props.active_window.presets_menu.get_n_items() > 1:
-            self.props.active_window.presets_menu.remove(1)
-
-        if not os.path.exists(presets_dir):
-            os.makedirs(presets_dir)
-
-        self.custom_presets = {"user": {}}
+    def setup_presets_menu(self):
+        self.preset_catalog.load()
 
-        for repo in Path(presets_dir).iterdir():
-            logging.debug(f"presets_dir.iterdir: {repo}")
+        # Menu section is kept up to date with the catalog, entry by entry
+        self.favourite_presets_section = Gio.Menu()
+        self.favourite_menu_paths = []
+        self.presets_menu_placeholder = False
 
-            try:
-                presets_list = PresetUtils().get_presets_list(repo)
-            except (OSError, KeyError, AttributeError):
-                logging.error("Failed to retrieve a list of presets.")
-                self.toast_overlay.add_toast(
-                    Adw.Toast(title=_("Failed to load list of presets"))
-                )
-            else:
-                self.custom_presets[repo.name] = presets_list
+        for item in self.preset_catalog.get_items():
+            self.update_presets_menu_item(item)
+        self.update_presets_menu_placeholder()
 
-        custom_menu_section = Gio.Menu()
-
-        try:
-            is_custom_presets = (
-                self.custom_presets["user"]
-                or self.custom_presets["curated"]
-                or self.custom_presets["official"]
-            )
+        self.preset_catalog.connect("preset-added", self.on_catalog_preset_changed)
+        self.preset_catalog.connect("preset-changed", self.on_catalog_preset_changed)
+        self.preset_catalog.connect("preset-removed", self.on_catalog_preset_changed)
 
-            if (is_custom_presets):
-                for repo, content in self.custom_presets.items():
-                    for preset, preset_name in content.items():
-                        logging.debug(preset_name)
+        self.props.active_window.presets_menu.append_section(
+            _("Favorite Presets"), self.favourite_presets_section
+        )
 
-                        if preset_name in self.favourite:
-                            menu_item = Gio.MenuItem()
-                            menu_item.set_label(preset_name)
+    def on_catalog_preset_changed(self, _catalog, item):
+        self.update_presets_menu_item(item)
+        self.update_presets_menu_placeholder()
 
-                            if not preset.startswith("error"):
-                                menu_item.set_action_and_target_value(
-                                    "app.load_preset",
-                                    GLib.Variant("s", "custom-" + preset))
-                            else:
-                                menu_item.set_action_and_target_value("")
+    def update_presets_menu_item(self, item):
+        """ Adds, updates or removes favorite presets menu entry for `item`. """
+        preset_path = item.props.preset_path
+        offset = 1 if self.presets_menu_placeholder else 0
 
-                            custom_menu_section.append_item(menu_item)
-            else:
-                menu_item = Gio.MenuItem()
-                menu_item.set_label(_("No presets found"))
-                custom_menu_section.append_item(menu_item)
+        is_favourite = (self.preset_catalog.get_item(preset_path) is item
+                        and item.props.display_name in self.favourite)
 
-        except KeyError:
-            if not os.path.exists(os.path.join(presets_dir, "user")):
-                os.makedirs(os.path.join(presets_dir, "user"))
+        if preset_path in self.favourite_menu_paths:
+            position = self.favourite_menu_paths.index(preset_path)
+            self.favourite_presets_section.remove(position + offset)
 
-            if not os.path.exists(os.path.join(presets_dir, "curated")):
-                os.makedirs(os.path.join(presets_dir, "curated"))
+            if not is_favourite:
+                self.favourite_menu_paths.pop(position)
+                return
+        elif is_favourite:
+            position = len(self.favourite_menu_paths)
+            self.favourite_menu_paths.append(preset_path)
+        else:
+            return
 
-            if not os.path.exists(os.path.join(presets_dir, "official")):
-                os.makedirs(os.path.join(presets_dir, "official"))
+        menu_item = Gio.MenuItem()
+        menu_item.set_label(item.props.display_name)
+        menu_item.set_action_and_target_value(
+            "app.load_preset",
+            GLib.Variant("s", "custom-" + preset_path))
 
-        open_in_file_manager_item = Gio.MenuItem()
-        open_in_file_manager_item.set_label(_("Open in File Manager"))
+        self.favourite_presets_section.insert_item(position + offset, menu_item)
 
-        open_in_file_manager_item.set_action_and_target_value(
-            "app.open_preset_directory"
-        )
+    def update_presets_menu_placeholder(self):
+        show_placeholder = self.preset_catalog.store.get_n_items() == 0
 
-        # custom_menu_section.append_item(open_in_file_manager_item)
+        if show_placeholder and not self.presets_menu_placeholder:
+            menu_item = Gio.MenuItem()
+            menu_item.set_label(_("No presets found"))
+            self.favourite_presets_section.insert_item(0, menu_item)
+        elif not show_placeholder and self.presets_menu_placeholder:
+            self.favourite_presets_section.remove(0)
 
-        self.props.active_window.presets_menu.append_section(
-            _("Favorite Presets"), custom_menu_section
-        )
+        self.presets_menu_placeholder = show_placeholder
 
     def show_presets_manager(self, *_args):
         presets = GradiencePresetWindow(self.win)
         presets.present()
 
-        add_rows_thread = threading.Thread(target=presets.add_explore_rows)
-        add_rows_thread.start()
+        RunAsync(presets.add_explore_rows)
 
     def load_preset_from_css(self):
         try:
-            variables, palette, custom_css = parse_css(
-                os.path.join(
-                    get_gtk_theme_dir("gtk4"),
-                    "gtk.css"
+            # Use preset saved when it was applied, unless gtk.css was edited since then
+            preset = PresetUtils().get_applied_preset("gtk4")
+
+            if preset is None:
+                variables, palette, custom_css = parse_css(
+                    os.path.join(
+                        get_gtk_theme_dir("gtk4"),
+                        "gtk.css"
+                    )
                 )
-            )
 
-            logging.debug(f"Loaded custom CSS variables: {variables}")
+                logging.debug("Loaded custom CSS variables: %s", variables)
 
-            preset = {
-                "name": "Preset Name",
-                "variables": variables,
-                "palette": palette,
-                "custom_css": {
-                    "gtk4": custom_css,
-                    "gtk3": ""
+                preset = {
+                    "name": "Preset Name",
+                    "variables": variables,
+                    "palette": palette,
+                    "custom_css": {
+                        "gtk4": custom_css,
+                        "gtk3": ""
+                    }
                 }
-            }
+            else:
+                logging.debug("Loaded applied preset from gtk.css sidecar file")
 
             self.preset = Preset().new_from_dict(preset)
             self.load_preset_variables_from_preset()
@@ -306,7 +306,7 @@ class GradienceApplication(Adw.Application):
         )
 
     def load_preset_from_file(self, preset_path):
-        logging.debug(f"load preset from file {preset_path}")
+        logging.debug("load preset from file %s", preset_path)
 
         self.preset = Preset().new_from_path(preset_path)
         self.load_preset_variables_from_preset()
@@ -421,6 +421,7 @@ class GradienceApplication(Adw.Application):
         self.props.active_window.save_preset_button.get_child().set_label(_("Save"))
         self.props.active_window.save_preset_button.set_tooltip_text(_("Save Preset"))
 
+    @traced("app.reload_variables")
     def reload_variables(self):
         parsing_errors = []
         gtk_css = generate_gtk_css("gtk4", self.preset)
@@ -448,10 +449,15 @@ class GradienceApplication(Adw.Application):
         # strings in GTK 4.8 and before.
         # https://gitlab.gnome.org/GNOME/pygobject/-/merge_requests/231
         # Credits to https://gitlab.gnome.org/amolenaar for the patch
-        if (Gtk.get_major_version(), Gtk.get_minor_version()) >= (4, 9):
+        # Since GTK 4.12, already encoded stylesheet can be passed without any conversion.
+        gtk_version = (Gtk.get_major_version(), Gtk.get_minor_version())
+
+        if gtk_version >= (4, 12):
+            css_provider.load_from_bytes(encode_gtk_css(gtk_css))
+        elif gtk_version >= (4, 9):
             css_provider.load_from_data(gtk_css, -1)
         else:
-            css_provider.load_from_data(gtk_css.encode())
+            css_provider.load_from_data(encode_gtk_css(gtk_css).get_data())
 
         self.props.active_window.update_errors(
             self.global_errors + parsing_errors)
@@ -604,13 +610,28 @@ class GradienceApplication(Adw.Application):
             if widget.get_app_types()["gtk3"]:
                 PresetUtils().apply_preset("gtk3", self.preset)
 
-            self.reload_plugins()
-            self.plugins_list.apply()
+            # Plugins are applied only after they were validated, so both runs \
+            # don't compete for worker threads and the errors view
+            self.reload_plugins(on_validated=self.apply_plugins)
 
             self.win.toast_overlay.add_toast(
                 Adw.Toast(title=_("Preset has been set. Log out to apply changes."))
             )
 
+    def apply_plugins(self, validate_errors):
+        self.plugins_list.apply_async(self.on_plugins_applied, validate_errors)
+
+    def on_plugins_applied(self, plugins_errors, validate_errors):
+        self.props.active_window.update_plugin_timings(self.plugins_list.get_timings())
+
+        if plugins_errors:
+            self.props.active_window.update_errors(
+                self.global_errors + validate_errors + plugins_errors)
+
+            self.win.toast_overlay.add_toast(
+                Adw.Toast(title=_("Some plugins failed to apply the preset"))
+            )
+
     def show_preferences(self, *_args):
         prefs = GradiencePreferencesWindow(self.win)
         prefs.present()
@@ -640,12 +661,17 @@ class GradienceApplication(Adw.Application):
         self.win.content_plugins.add(self.custom_css_group)
         self.custom_css_group = self.custom_css_group
 
-        plugins_errors = self.plugins_list.validate()
+        self.plugins_list.validate_async(self.on_plugins_validated)
 
+    def on_plugins_validated(self, plugins_errors, on_validated=None):
+        self.props.active_window.update_plugin_timings(self.plugins_list.get_timings())
         self.props.active_window.update_errors(
             self.global_errors + plugins_errors)
 
-    def reload_plugins(self):
+        if on_validated is not None:
+            on_validated(plugins_errors)
+
+    def reload_plugins(self, on_validated=None):
         self.plugins_list.reload()
         logging.debug("reload plugins")
 
@@ -666,10 +692,7 @@ class GradienceApplication(Adw.Application):
         self.win.content_plugins.add(self.custom_css_group)
         self.custom_css_group = self.custom_css_group
 
-        plugins_errors = self.plugins_list.validate()
-
-        self.props.active_window.update_errors(
-            self.global_errors + plugins_errors)
+        self.plugins_list.validate_async(self.on_plugins_validated, on_validated)
 
 
 def main():
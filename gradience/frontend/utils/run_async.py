@@ -16,10 +16,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
-import sys
+import os
+import queue
+import itertools
 import threading
 import traceback
 
+from concurrent.futures import Future
+
 from gi.repository import GLib
 
 from gradience.backend.logger import Logger
@@ -27,38 +31,179 @@ from gradience.backend.logger import Logger
 logging = Logger()
 
 
-class RunAsync(threading.Thread):
-    def __init__(self, task_func, callback=None, *args, **kwargs):
-        self.source_id = None
-        if threading.current_thread() is not threading.main_thread():
-            raise AssertionError
+PRIORITY_HIGH = -100
+PRIORITY_DEFAULT = 0
+PRIORITY_LOW = 100
 
-        super(RunAsync, self).__init__(
-            target=self.target, args=args, kwargs=kwargs)
 
-        self.task_func = task_func
+class TaskScheduler:
+    """
+    Bounded pool of worker threads shared by all frontend background work.
 
-        self.callback = callback if callback else lambda r, e: None
-        self.daemon = kwargs.pop("daemon", True)
+    Jobs are queued by priority (lower value runs first, jobs with equal
+    priority run in order of submission) and run by at most `max_workers`
+    threads, which are started on demand. Every job gets a
+    `concurrent.futures.Future`, which can also be used to cancel the job
+    before it starts.
+
+    Callbacks are called on the main loop. Jobs finishing at about the same
+    time are delivered together from a single idle handler, instead of
+    scheduling one for every job.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        self._workers = 0
+        self._idle_workers = 0
+
+        self._finished = []
+        self._delivery_scheduled = False
+
+        self._stats = {
+            "queued": 0,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0
+        }
+
+    def submit(self, task_func: callable, *args, callback: callable = None,
+               priority: int = PRIORITY_DEFAULT, **kwargs) -> Future:
+        """
+        Queues `task_func` to be called with `args` and `kwargs` in a worker thread.
+
+        `callback` is called on the main loop with the result and the
+        raised exception (or None), unless the job was cancelled.
+        """
+        future = Future()
+
+        with self._lock:
+            self._stats["queued"] += 1
+            self._queue.put((priority, next(self._counter), future, task_func, args, kwargs, callback))
+
+            if self._stats["queued"] > self._idle_workers and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._run_worker, daemon=True,
+                                 name=f"gradience-worker-{self._workers}").start()
+
+        return future
+
+    def get_stats(self) -> dict:
+        """ Returns counts of queued and running jobs, and totals of finished ones. """
+        with self._lock:
+            return dict(self._stats, workers=self._workers)
+
+    def _run_worker(self):
+        while True:
+            with self._lock:
+                self._idle_workers += 1
+
+            try:
+                _priority, _count, future, task_func, args, kwargs, callback = self._queue.get(timeout=30)
+            except queue.Empty:
+                with self._lock:
+                    self._idle_workers -= 1
+
+                    # Exit only if no job arrived in the meantime
+                    if self._queue.empty():
+                        self._workers -= 1
+                        return
+                continue
+
+            with self._lock:
+                self._idle_workers -= 1
+                self._stats["queued"] -= 1
+
+                if not future.set_running_or_notify_cancel():
+                    self._stats["cancelled"] += 1
+                    continue
+
+                self._stats["running"] += 1
 
-        self.start()
+            self._run_job(future, task_func, args, kwargs, callback)
 
-    def target(self, *args, **kwargs):
+    def _run_job(self, future, task_func, args, kwargs, callback):
         result = None
         error = None
 
-        logging.debug(f"Running async job [{self.task_func}].")
+        logging.debug(f"Running async job [{task_func}].")
 
         try:
-            result = self.task_func(*args, **kwargs)
+            result = task_func(*args, **kwargs)
         except Exception as e:
-            logging.error(f"Error while running async job: {self.task_func}", exc=e)
+            logging.error(f"Error while running async job: {task_func}", exc=e)
+            logging.debug("".join(traceback.format_exception(e)))
+
+            error = e
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+        with self._lock:
+            self._stats["running"] -= 1
+            self._stats["failed" if error else "completed"] += 1
+
+            if callback:
+                self._finished.append((callback, result, error))
+
+                if not self._delivery_scheduled:
+                    self._delivery_scheduled = True
+                    GLib.idle_add(self._deliver_results)
+
+    def _deliver_results(self):
+        with self._lock:
+            finished = self._finished
+            self._finished = []
+            self._delivery_scheduled = False
+
+        for callback, result, error in finished:
+            # One failing callback shouldn't prevent delivering the others
+            try:
+                callback(result, error)
+            except Exception as e:
+                logging.error(f"Error in async job callback: {callback}", exc=e)
+
+        return GLib.SOURCE_REMOVE
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> TaskScheduler:
+    """ Returns `TaskScheduler` shared by the whole application. """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TaskScheduler()
+
+        return _scheduler
+
+
+class RunAsync:
+    """
+    Runs `task_func` in the shared `TaskScheduler`.
+
+    `callback` is called on the main loop with the result and the
+    raised exception (or None). The job's future is available
+    as `future` attribute, `cancel()` cancels jobs which haven't started yet.
+    """
+
+    def __init__(self, task_func, callback=None, *args, priority=PRIORITY_DEFAULT, **kwargs):
+        if threading.current_thread() is not threading.main_thread():
+            raise AssertionError
+
+        self.task_func = task_func
+        self.callback = callback if callback else lambda r, e: None
 
-            error = exception
-            _ex_type, _ex_value, trace = sys.exc_info()
-            traceback.print_tb(trace)
-            traceback_info = "\n".join(traceback.format_tb(trace))
+        self.future = get_scheduler().submit(task_func, *args,
+                            callback=self.callback, priority=priority, **kwargs)
 
-            logging.error([str(exception), traceback_info])
-        self.source_id = GLib.idle_add(self.callback, result, error)
-        return self.source_id
+    def cancel(self) -> bool:
+        return self.future.cancel()
@@ -64,6 +64,9 @@ class GradienceMainWindow(Adw.ApplicationWindow):
 
         self.monet_image_file = None
 
+        self.errors = []
+        self.plugin_timings = {}
+
         self.enabled_theme_engines = set(
             self.settings.get_value("enabled-theme-engines").unpack()
         )
@@ -72,9 +75,6 @@ class GradienceMainWindow(Adw.ApplicationWindow):
         self.setup()
 
     def setup_signals(self):
-        self.presets_dropdown.get_popover().connect("show",
-            self.on_presets_dropdown_activate)
-
         self.connect("close-request",
             self.on_close_request)
 
@@ -219,15 +219,37 @@ class GradienceMainWindow(Adw.ApplicationWindow):
         self.content_colors.add(palette_pref_group)
 
     def update_errors(self, errors):
+        self.errors = errors
+        self.update_errors_list()
+
+    def update_plugin_timings(self, timings):
+        """ Shows durations of the last plugin runs, by plugin ID and method, below the errors. """
+        self.plugin_timings = timings
+        self.update_errors_list()
+
+    def update_errors_list(self):
         child = self.errors_list.get_row_at_index(0)
         while child is not None:
             self.errors_list.remove(child)
             child = self.errors_list.get_row_at_index(0)
-        self.errors_button.set_visible(len(errors) > 0)
-        for error in errors:
+
+        self.errors_button.set_visible(len(self.errors) > 0 or len(self.plugin_timings) > 0)
+
+        if self.errors:
+            self.errors_button.add_css_class("error")
+            self.errors_button.set_tooltip_text(_("CSS Errors"))
+        else:
+            self.errors_button.remove_css_class("error")
+            self.errors_button.set_tooltip_text(_("Plugin Timings"))
+
+        for error in self.errors:
             self.errors_list.append(
                 GradienceErrorListRow(error["error"], error["element"], error["line"])
             )
 
-    def on_presets_dropdown_activate(self, *args):
-        self.app.reload_user_defined_presets()
+        for plugin_id, methods in sorted(self.plugin_timings.items()):
+            for method_name, duration in sorted(methods.items()):
+                self.errors_list.append(
+                    GradienceErrorListRow(_("Plugin finished"), f"@{plugin_id}.{method_name}",
+                                          f"{duration * 1000:.0f} ms", is_error=False)
+                )
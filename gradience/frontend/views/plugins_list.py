@@ -19,10 +19,11 @@
 import os
 
 from gi.repository import Adw, GLib
-from yapsy.PluginManager import PluginManager
 
 from gradience.frontend.widgets.plugin_row import GradiencePluginRow
 from gradience.backend.globals import user_plugin_dir, system_plugin_dir
+from gradience.backend.plugin_registry import PluginRegistry
+from gradience.backend.plugin_runner import PluginRunner
 
 from gradience.backend.logger import Logger
 
@@ -44,20 +45,33 @@ class GradiencePluginsList:
         )
         self.rows = {}
 
+        # Plugins stay loaded for the whole session, so reloading only \
+        # picks up installed/removed plugins and newly enabled ones
+        self.registry = PluginRegistry([user_plugin_dir, system_plugin_dir])
+
+        self.runner = PluginRunner()
+        self.runs = {}
+        self.timings = {}
+
         self.reload()
 
     def reload(self):
-        self.pm = PluginManager()
-        self.pm.setPluginPlaces([user_plugin_dir, system_plugin_dir])
-        self.pm.collectPlugins()
-        for pluginInfo in self.pm.getAllPlugins():
-            pluginInfo.plugin_object.activate()
+        self.registry.refresh()
 
         self.app = self.win.get_application()
         self.enabled_plugins = set(
             self.app.settings.get_value("enabled-plugins").unpack()
         )
 
+        self.registry.load(self.enabled_plugins)
+
+    def load_plugin(self, plugin_id):
+        """ Loads a plugin, eg. for opening its settings, and returns its plugin object. """
+        self.registry.load([plugin_id])
+
+        entry = self.registry.get_entry(plugin_id)
+        return entry.plugin_object if entry else None
+
     def save_enabled_plugins(self):
         self.app.settings.set_value(
             "enabled-plugins", GLib.Variant("as", list(self.enabled_plugins))
@@ -67,6 +81,8 @@ class GradiencePluginsList:
         self.enabled_plugins.add(plugin_id)
         self.save_enabled_plugins()
 
+        self.registry.load([plugin_id])
+
     def disable_plugin(self, plugin_id):
         self.enabled_plugins.remove(plugin_id)
         self.save_enabled_plugins()
@@ -94,9 +110,9 @@ class GradiencePluginsList:
             )
         )
         empty = True
-        for pluginInfo in self.pm.getAllPlugins():
-            row = GradiencePluginRow(pluginInfo.plugin_object, preset, self)
-            self.rows[pluginInfo.plugin_object.plugin_id] = row
+        for entry in self.registry.get_entries():
+            row = GradiencePluginRow(entry, preset, self)
+            self.rows[entry.plugin_id] = row
             group.add(row)
             empty = False
         if empty:
@@ -107,29 +123,94 @@ class GradiencePluginsList:
 
     def save(self):
         saved = {}
-        for pluginInfo in self.pm.getAllPlugins():
+        for entry in self.registry.get_loaded_entries():
             try:
-                saved[pluginInfo.plugin_object.plugin_id] = pluginInfo.plugin_object.save()
+                saved[entry.plugin_id] = entry.plugin_object.save()
             except AttributeError:
-                logging.error(f"{pluginInfo.plugin_object.plugin_id} doesn't have 'apply'")
+                logging.error(f"{entry.plugin_id} doesn't have 'apply'")
         return saved
 
-    def validate(self):
-        errors = []
-        for pluginInfo in self.pm.getAllPlugins():
+    def validate_async(self, callback, *user_data):
+        """
+        Validates loaded plugins in background threads.
+
+        `callback` is called on the main loop with a list of error
+        dictionaries for the errors view, followed by `user_data`.
+        """
+        entries = self.registry.get_loaded_entries()
+
+        self._run_async("validate", entries, self._on_validate_finished, callback, user_data)
+
+    def _on_validate_finished(self, results, callback, user_data):
+        errors = self._get_result_errors(results)
+
+        for result in results:
+            if result.failed:
+                continue
+
             try:
-                error, detail = pluginInfo.plugin_object.validate()
+                error, detail = result.value
                 if error:
                     errors.append(detail)
-            except AttributeError:
-                logging.error(f"Plugin {pluginInfo.plugin_object.plugin_id} doesn't have 'validatee'")
-        return errors
+            except (TypeError, ValueError):
+                logging.error(f"Plugin {result.plugin_id} returned invalid result from 'validate'")
+
+        callback(errors, *user_data)
 
-    def apply(self):
-        for pluginInfo in self.pm.getAllPlugins():
-            if pluginInfo.plugin_object.plugin_id in self.enabled_plugins:
-                logging.debug(pluginInfo.plugin_object)
-                try:
-                    pluginInfo.plugin_object.apply()
-                except AttributeError:
-                    logging.error(f"Plugin {pluginInfo.plugin_object.plugin_id} doesn't have 'apply'")
+    def apply_async(self, callback, *user_data):
+        """
+        Applies enabled plugins in background threads.
+
+        `callback` is called on the main loop with a list of error
+        dictionaries for failed plugins, followed by `user_data`.
+        """
+        entries = [entry for entry in self.registry.get_loaded_entries()
+                   if entry.plugin_id in self.enabled_plugins]
+
+        self._run_async("apply", entries, self._on_apply_finished, callback, user_data)
+
+    def _on_apply_finished(self, results, callback, user_data):
+        callback(self._get_result_errors(results), *user_data)
+
+    def get_timings(self) -> dict:
+        """ Returns durations (in seconds) of the last plugin runs, by plugin ID and method. """
+        return {plugin_id: dict(methods) for plugin_id, methods in self.timings.items()}
+
+    def _run_async(self, method_name, entries, finished_callback, callback, user_data):
+        # Results of a previous unfinished run of the same method would be outdated
+        if method_name in self.runs:
+            self.runs.pop(method_name).cancel()
+
+        def __on_finished(results):
+            self.runs.pop(method_name, None)
+
+            for result in results:
+                self.timings.setdefault(result.plugin_id, {})[method_name] = result.duration
+
+            finished_callback(results, callback, user_data)
+
+        self.runs[method_name] = self.runner.run(method_name, entries, __on_finished)
+
+    def _get_result_errors(self, results):
+        errors = []
+
+        for result in results:
+            duration = f"{result.duration * 1000:.0f} ms"
+
+            if result.timed_out:
+                errors.append({
+                    "error": _("Plugin didn't finish in time"),
+                    "element": f"@{result.plugin_id}.{result.method_name}",
+                    "line": duration
+                })
+            elif isinstance(result.error, AttributeError):
+                logging.error(f"Plugin {result.plugin_id} doesn't have '{result.method_name}'")
+            elif result.error is not None:
+                logging.error(f"Plugin {result.plugin_id} failed in '{result.method_name}'", exc=result.error)
+                errors.append({
+                    "error": _("Plugin failed: {error}").format(error=result.error),
+                    "element": f"@{result.plugin_id}.{result.method_name}",
+                    "line": duration
+                })
+
+        return errors
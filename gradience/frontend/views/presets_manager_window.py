@@ -20,13 +20,14 @@ import os
 import shutil
 import json
 
-from pathlib import Path
-from gi.repository import Gtk, Adw, GLib
+from gi.repository import Gtk, Adw, Gio, GLib
 
 from gradience.backend.utils.networking import get_preset_repos
+from gradience.backend.utils.common import to_slug_case
 
+from gradience.backend.models.preset_item import ExplorePresetItem
 from gradience.backend.preset_downloader import PresetDownloader
-from gradience.backend.theming.preset import PresetUtils
+from gradience.backend.preset_thumbnailer import PresetThumbnailer
 from gradience.backend.globals import presets_dir
 from gradience.backend.constants import rootdir
 
@@ -44,7 +45,10 @@ logging = Logger()
 class GradiencePresetWindow(Adw.Window):
     __gtype_name__ = "GradiencePresetWindow"
 
-    installed = Gtk.Template.Child()
+    installed_stack = Gtk.Template.Child()
+    installed_list = Gtk.Template.Child()
+    builtin_preset_list = Gtk.Template.Child()
+    preset_list = Gtk.Template.Child()
     repos = Gtk.Template.Child()
     main_view = Gtk.Template.Child()
     toast_overlay = Gtk.Template.Child()
@@ -66,9 +70,11 @@ class GradiencePresetWindow(Adw.Window):
     search_dropdown = Gtk.Template.Child("search_dropdown")
     search_string_list = Gtk.Template.Child("search_string_list")
 
-    custom_presets = {}
-
-    search_results_list = []
+    builtin_presets = {
+        "adwaita": "Adwaita",
+        "adwaita-dark": "Adwaita Dark",
+        "pretty-purple": "Pretty Purple"
+    }
 
     offline = False
 
@@ -86,6 +92,9 @@ class GradiencePresetWindow(Adw.Window):
 
         self.preset_repos = get_preset_repos(self.settings.get_boolean("use-jsdelivr"))
 
+        self.thumbnailer = PresetThumbnailer()
+        self.apply_after_download = set()
+
         self.setup_signals()
         self.setup()
 
@@ -106,19 +115,55 @@ class GradiencePresetWindow(Adw.Window):
 
     def setup_signals(self):
         self.search_entry.connect("search-changed", self.on_search_changed)
+
+        # The download queue outlives this window, so its handlers are \
+        # disconnected again in `on_close_request`
+        self.download_handlers = [
+            self.app.download_queue.connect("download-finished", self.on_download_finished),
+            self.app.download_queue.connect("download-failed", self.on_download_failed)
+        ]
+        self.connect("close-request", self.on_close_request)
         self.search_dropdown.connect("notify", self.on_search_changed)
         self.search_entry.connect("stop-search", self.on_search_ended)
 
     def setup_builtin_presets(self):
-        self.builtin_preset_list = Adw.PreferencesGroup()
-        self.builtin_preset_list.set_title(_("Built-In Presets"))
-        self.installed.add(self.builtin_preset_list)
+        for preset, preset_name in self.builtin_presets.items():
+            row = GradienceBuiltinPresetRow(preset_name, self.toast_overlay)
+            self.builtin_preset_list.add(row)
 
     def setup_user_presets(self):
-        self.preset_list = Adw.PreferencesGroup()
-        self.preset_list.set_title(_("User Presets"))
-        self.installed.add(self.preset_list)
-        self.reload_pref_group()
+        self.preset_list.set_description(
+            _(
+                "See "
+                '<a href="https://github.com/GradienceTeam/Community">'
+                "GradienceTeam/Community</a> on Github for more presets."
+            )
+        )
+
+        # Rows are recycled by Gtk.ListView, so only the visible ones are ever constructed. \
+        # The model is owned by the preset catalog, which keeps it in sync with `presets_dir`
+        self.preset_store = self.app.preset_catalog.store
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_preset_row_setup)
+        factory.connect("bind", self.on_preset_row_bind)
+        factory.connect("unbind", self.on_preset_row_unbind)
+
+        self.installed_list.set_model(Gtk.NoSelection.new(self.preset_store))
+        self.installed_list.set_factory(factory)
+
+        self.store_handler = self.preset_store.connect("items-changed", self.update_installed_stack)
+        self.update_installed_stack()
+
+    def on_preset_row_setup(self, _factory, list_item):
+        list_item.set_activatable(False)
+        list_item.set_child(GradiencePresetRow(self))
+
+    def on_preset_row_bind(self, _factory, list_item):
+        list_item.get_child().bind(list_item.get_item())
+
+    def on_preset_row_unbind(self, _factory, list_item):
+        list_item.get_child().unbind()
 
     # TODO: Separate repositories list initialization from this function and remove Repositories tab in 1.0 release
     def setup_repos(self):
@@ -128,18 +173,43 @@ class GradiencePresetWindow(Adw.Window):
         self.reload_repos_group()
 
     def setup_explore(self):
-        self.search_results_list.clear()
+        if not hasattr(self, "explore_store"):
+            self.explore_store = Gio.ListStore.new(ExplorePresetItem)
+
+            self.search_filter = Gtk.CustomFilter.new(self.search_filter_func)
+            self.search_filter_model = Gtk.FilterListModel.new(
+                self.explore_store, self.search_filter)
+
+            factory = Gtk.SignalListItemFactory()
+            factory.connect("setup", self.on_explore_row_setup)
+            factory.connect("bind", self.on_explore_row_bind)
+            factory.connect("unbind", self.on_explore_row_unbind)
+
+            self.search_results.set_model(Gtk.NoSelection.new(self.search_filter_model))
+            self.search_results.set_factory(factory)
+
+        self.explore_store.remove_all()
 
         if self.offline:
             self.search_spinner.props.visible = False
             self.search_stack.set_visible_child_name("page_offline")
 
+    def on_explore_row_setup(self, _factory, list_item):
+        list_item.set_activatable(False)
+        list_item.set_child(GradienceExplorePresetRow(self))
+
+    def on_explore_row_bind(self, _factory, list_item):
+        list_item.get_child().bind(list_item.get_item())
+
+    def on_explore_row_unbind(self, _factory, list_item):
+        list_item.get_child().unbind()
+
+    # NOTE: This function is run in a separate thread, so every UI update \
+    # has to be scheduled back on the main loop
     def add_explore_rows(self):
         logging.debug(self._repos)
 
         for repo_name, repo in self._repos.items():
-            self.search_string_list.append(repo_name)
-
             if repo_name == "Official":
                 badge = "black"
             elif repo_name == "Curated":
@@ -150,26 +220,37 @@ class GradiencePresetWindow(Adw.Window):
             try:
                 explore_presets, urls = PresetDownloader(self.settings.get_boolean("use-jsdelivr")).fetch_presets(repo)
             except GLib.GError as e:
-                if e.code == 1:
-                    self.offline = True
-                    self.search_spinner.props.visible = False
-                    self.search_stack.set_visible_child_name("page_offline")
-                else:
-                    self.search_spinner.props.visible = False
+                GLib.idle_add(self.on_explore_fetch_failed, repo_name, e.code == 1)
             # TODO: Create a new page to show for other errors eg. "page_error"
             except json.JSONDecodeError:
-                self.search_spinner.props.visible = False
+                GLib.idle_add(self.on_explore_fetch_failed, repo_name, False)
             else:
-                self.search_spinner.props.visible = False
-
-                for (preset, preset_name), preset_url in zip(
-                    explore_presets.items(), urls
-                ):
-                    row = GradienceExplorePresetRow(
-                        preset_name, preset_url, self, repo_name, badge
+                items = [
+                    ExplorePresetItem(preset_name, preset_url, repo_name, badge)
+                    for (preset, preset_name), preset_url in zip(
+                        explore_presets.items(), urls
                     )
-                    self.search_results.append(row)
-                    self.search_results_list.append(row)
+                ]
+
+                GLib.idle_add(self.on_explore_presets_fetched, repo_name, items)
+
+    def on_explore_presets_fetched(self, repo_name, items):
+        self.search_string_list.append(repo_name)
+        self.search_spinner.props.visible = False
+
+        self.explore_store.splice(self.explore_store.get_n_items(), 0, items)
+
+        return GLib.SOURCE_REMOVE
+
+    def on_explore_fetch_failed(self, repo_name, offline):
+        self.search_string_list.append(repo_name)
+        self.search_spinner.props.visible = False
+
+        if offline:
+            self.offline = True
+            self.search_stack.set_visible_child_name("page_offline")
+
+        return GLib.SOURCE_REMOVE
 
     def add_repo(self, _unused, response, name_entry, url_entry):
         if response == "add":
@@ -237,44 +318,76 @@ class GradiencePresetWindow(Adw.Window):
 
         dialog.present()
 
+    def search_filter_func(self, item, *_args):
+        search_text = self.search_entry.props.text.lower()
+        selected_item_pos = self.search_dropdown.get_selected()
+
+        if not selected_item_pos == 0:
+            selected_item_name = self.search_dropdown.props.selected_item.get_string().lower()
+
+            if selected_item_name not in item.prefix.lower():
+                return False
+
+        return search_text in item.props.display_name.lower()
+
     def on_search_changed(self, *args):
-        items_count = 0
         search_text = self.search_entry.props.text
 
         logging.debug("[New search query]")
-        logging.debug(f"Preset amount: {len(self.search_results_list)}")
-        logging.debug(f"Search string: {search_text}")
-        logging.debug("Items found:")
+        logging.debug("Preset amount: %d", self.explore_store.get_n_items())
+        logging.debug("Search string: %s", search_text)
 
         if not self.offline:
             self.search_stack.set_visible_child_name("page_results")
-            for widget in self.search_results_list:
-                widget.props.visible = False
-
-                selected_item_pos = self.search_dropdown.get_selected()
-                selected_item_name = self.search_dropdown.props.selected_item.get_string().lower()
-
-                if not selected_item_pos == 0:
-                    if selected_item_name in widget.prefix.lower():
-                        if search_text.lower() in widget.props.title.lower():
-                            widget.props.visible = True
-                            items_count += 1
-                            logging.debug(widget.props.title)
-                else:
-                    if search_text.lower() in widget.props.title.lower():
-                        widget.props.visible = True
-                        items_count += 1
-                        logging.debug(widget.props.title)
-                    elif search_text == "":
-                        widget.props.visible = True
-                        items_count += 1
+            self.search_filter.changed(Gtk.FilterChange.DIFFERENT)
+
+            items_count = self.search_filter_model.get_n_items()
+            logging.debug("Items found: %d", items_count)
 
             if items_count == 0:
                 self.search_stack.set_visible_child_name("page_empty")
 
     def on_search_ended(self, *args):
-        for widget in self.search_results_list:
-            widget.props.visible = True
+        self.search_entry.props.text = ""
+
+    def download_preset(self, item, apply=False):
+        if apply:
+            self.apply_after_download.add(item.props.url)
+
+        queued = self.app.download_queue.add(
+            to_slug_case(item.props.display_name), item.prefix, item.props.url)
+
+        if not queued:
+            self.toast_overlay.add_toast(
+                Adw.Toast(title=_("Preset is already being downloaded")))
+
+    def on_download_finished(self, _queue, url, preset_path):
+        if url in self.apply_after_download:
+            self.apply_after_download.discard(url)
+            self.app.load_preset_from_file(preset_path)
+
+        self.toast_overlay.add_toast(
+            Adw.Toast(title=_("Preset downloaded")))
+        self.app.preset_catalog.refresh_path(preset_path)
+
+        logging.debug(f"Download completed: {url}")
+
+    def on_download_failed(self, _queue, url, message):
+        self.apply_after_download.discard(url)
+
+        logging.error(f"An error occurred while trying to download a preset: {message}")
+        self.toast_overlay.add_toast(
+            Adw.Toast(title=_("Preset could not be downloaded"))
+        )
+
+    def on_close_request(self, *_args):
+        for handler_id in self.download_handlers:
+            self.app.download_queue.disconnect(handler_id)
+        self.download_handlers = []
+
+        self.preset_store.disconnect(self.store_handler)
+
+        return False
 
     @Gtk.Template.Callback()
     def on_file_manager_button_clicked(self, *_args):
@@ -292,20 +405,16 @@ class GradiencePresetWindow(Adw.Window):
 
         if response == Gtk.ResponseType.ACCEPT:
             if preset_file.endswith(".json"):
+                imported_path = os.path.join(presets_dir, "user", preset_file)
 
-                if preset_file in self.custom_presets:
+                if os.path.exists(imported_path):
                     self.toast_overlay.add_toast(
                         Adw.Toast(title=_("Preset already exists"))
                     )
                 else:
-                    shutil.copy(
-                        self.preset_path.get_path(),
-                        os.path.join(
-                            presets_dir,
-                            "user",
-                            preset_file,
-                        ),
-                    )
+                    shutil.copy(self.preset_path.get_path(), imported_path)
+                    self.app.preset_catalog.refresh_path(imported_path)
+
                     self.toast_overlay.add_toast(
                         Adw.Toast(title=_("Preset imported")))
             else:
@@ -313,80 +422,11 @@ class GradiencePresetWindow(Adw.Window):
                     Adw.Toast(title=_("Unsupported file format, must be .json"))
                 )
 
-        self.reload_pref_group()
-
-    def reload_pref_group(self):
-        logging.debug("reload")
-
-        if not os.path.exists(presets_dir):
-            os.makedirs(presets_dir)
-
-        self.custom_presets = {"user": {}}
-        self.builtin_presets = {
-            "adwaita": "Adwaita",
-            "adwaita-dark": "Adwaita Dark",
-            "pretty-purple": "Pretty Purple"
-        }
-
-        for repo in Path(presets_dir).iterdir():
-            logging.debug(f"presets_dir.iterdir: {repo}")
-
-            try:
-                presets_list = PresetUtils().get_presets_list(repo)
-            except (OSError, KeyError, AttributeError):
-                logging.error("Failed to retrieve a list of presets.")
-                self.toast_overlay.add_toast(
-                    Adw.Toast(title=_("Failed to load list of presets"))
-                )
-            else:
-                self.custom_presets[repo.name] = presets_list
-
-        self.installed.remove(self.preset_list)
-        self.installed.remove(self.builtin_preset_list)
-
-        self.builtin_preset_list = Adw.PreferencesGroup()
-        self.builtin_preset_list.set_title(_("Built-in Presets"))
-        for preset, preset_name in self.builtin_presets.items():
-            row = GradienceBuiltinPresetRow(preset_name, self.toast_overlay)
-            self.builtin_preset_list.add(row)
-        self.installed.add(self.builtin_preset_list)
-
-        self.preset_list = Adw.PreferencesGroup()
-        self.preset_list.set_title(_("User Presets"))
-        self.preset_list.set_description(
-            _(
-                "See "
-                '<a href="https://github.com/GradienceTeam/Community">'
-                "GradienceTeam/Community</a> on Github for more presets."
-            )
-        )
-
-        logging.debug(f"custom_presets: {self.custom_presets}")
-
-        presets_check = not (
-            len(self.custom_presets["user"]) == 0
-            and len(self.custom_presets["official"]) == 0
-            and len(self.custom_presets["curated"]) == 0
-        )
-        logging.debug(f"preset_check: {presets_check}")
-
-        if presets_check:
-            for repo, presets in self.custom_presets.items():
-                for preset_file, preset_name in presets.items():
-                    row = GradiencePresetRow(
-                        preset_name, preset_file, self, repo)
-                    self.preset_list.add(row)
-
+    def update_installed_stack(self, *_args):
+        if self.preset_store.get_n_items() > 0:
+            self.installed_stack.set_visible_child_name("page_presets")
         else:
-            self.preset_empty = Adw.ActionRow()
-            self.preset_empty.set_title(
-                _(
-                    "No preset found! Use the import button to import one or "
-                    "search one on the Explore tab."
-                )
-            )
-            self.preset_list.add(self.preset_empty)
-        self.installed.add(self.preset_list)
+            self.installed_stack.set_visible_child_name("page_empty")
 
     def reload_repos_group(self):
         self.repos.remove(self.repos_list)
@@ -16,9 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
-import time
-
-from gi.repository import Gtk, Adw, Gio
+from gi.repository import Gtk, Adw, Gio, GLib
 
 from gradience.frontend.utils.run_async import RunAsync
 from gradience.backend.constants import rootdir, app_id
@@ -135,6 +133,8 @@ class GradienceShareWindow(Adw.Window):
 
     def install_runner(self, widget):
         def set_completed(result, error=False):
+            GLib.source_remove(self.pulse_id)
+
             self.label_skip.set_visible(False)
             self.btn_close.set_sensitive(True)
             self.window.settings.set_boolean("first-run", False)
@@ -146,7 +146,7 @@ class GradienceShareWindow(Adw.Window):
         def install():
             logging.debug("Installing Gradience…")
 
-        RunAsync(self.pulse)
+        self.pulse_id = GLib.timeout_add(500, self.pulse)
         RunAsync(
             install,
             callback=set_completed,
@@ -167,10 +167,10 @@ class GradienceShareWindow(Adw.Window):
         self.carousel.scroll_to(next_page, True)
 
     def pulse(self):
-        # This function updates the progress bar every 1s.
-        while True:
-            time.sleep(0.5)
-            self.progressbar.pulse()
+        # This function updates the progress bar every 0.5s.
+        self.progressbar.pulse()
+
+        return GLib.SOURCE_CONTINUE
 
     def close_window(self, widget):
         self.destroy()
@@ -66,8 +66,8 @@ class GradienceCustomCSSGroup(Adw.PreferencesGroup):
     @Gtk.Template.Callback()
     def on_dropdown_notify(self, _unused, pspec):
         if pspec.name == "selected":
-            logging.debug(f"Custom CSS values: {self.custom_css.values()}")
-            logging.debug(f"Selected app type in dropdown: {self.app_type_dropdown.get_selected()}")
+            logging.debug("Custom CSS values: %s", self.custom_css.values())
+            logging.debug("Selected app type in dropdown: %d", self.app_type_dropdown.get_selected())
             self.custom_css_text_view.get_buffer().set_text(
                 list(self.custom_css.values())[
                     self.app_type_dropdown.get_selected()]
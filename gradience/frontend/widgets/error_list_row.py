@@ -29,9 +29,14 @@ class GradienceErrorListRow(Gtk.ListBoxRow):
     element_label = Gtk.Template.Child("element-label")
     line_label = Gtk.Template.Child("line-label")
 
-    def __init__(self, error, element, line, **kwargs):
+    def __init__(self, error, element, line, is_error=True, **kwargs):
         super().__init__(**kwargs)
 
         self.error_label.set_label(error)
         self.element_label.set_label(element)
         self.line_label.set_label(line)
+
+        # Informational rows, eg. plugin timings, are shown in the same list
+        if not is_error:
+            self.error_label.remove_css_class("error")
+            self.element_label.remove_css_class("error")
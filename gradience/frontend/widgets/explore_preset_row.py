@@ -17,12 +17,11 @@
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
 import os
-import json
 
 from gi.repository import GLib, Gtk, Adw
 
 from gradience.backend.utils.common import to_slug_case
-from gradience.backend.preset_downloader import PresetDownloader
+from gradience.backend.globals import presets_dir
 from gradience.backend.constants import rootdir
 
 from gradience.backend.logger import Logger
@@ -36,65 +35,61 @@ class GradienceExplorePresetRow(Adw.ActionRow):
 
     apply_button = Gtk.Template.Child("apply_button")
     download_button = Gtk.Template.Child("download_button")
+    thumbnail = Gtk.Template.Child("thumbnail")
     # badge = Gtk.Template.Child("badge")
 
-    def __init__(self, name, url, win, repo_name, badge, **kwargs):
+    def __init__(self, win, **kwargs):
         super().__init__(**kwargs)
 
-        self.name = name
+        self.app = Gtk.Application.get_default()
+        self.win = win
+        self.toast_overlay = self.win.toast_overlay
 
-        self.prefix = to_slug_case(repo_name)
+        self.item = None
 
-        self.set_name(name)
-        self.set_title(name)
-        self.set_subtitle(repo_name)
+    def bind(self, item):
+        """ Binds a recycled row to an `ExplorePresetItem` from the search results model. """
+        self.item = item
 
-        # self.badge.set_label(repo_name)
-        # self.badge.get_style_context().add_class(f"badge-{badge}")
+        self.name = item.props.display_name
+        self.prefix = item.prefix
+        self.url = item.props.url
 
-        self.app = Gtk.Application.get_default()
-        self.win = win
-        self.toast_overlay = self.win.toast_overlay
+        self.set_name(self.name)
+        self.set_title(self.name)
+        self.set_subtitle(item.props.repo_name)
+
+        # self.badge.set_label(item.props.repo_name)
+        # self.badge.get_style_context().add_class(f"badge-{item.props.badge}")
+
+        # Previews are only available for already downloaded presets, \
+        # we never fetch a preset just to render its thumbnail
+        local_path = self.get_local_path()
+
+        if os.path.exists(local_path):
+            self.win.thumbnailer.get_thumbnail_async(
+                local_path, self.on_thumbnail_ready, item)
+
+    def unbind(self):
+        self.item = None
+
+        self.thumbnail.set_visible(False)
+        self.thumbnail.clear()
+
+    def on_thumbnail_ready(self, thumbnail_path, item):
+        if thumbnail_path and self.item is item:
+            self.thumbnail.set_from_file(thumbnail_path)
+            self.thumbnail.set_visible(True)
+
+        return GLib.SOURCE_REMOVE
 
-        self.url = url
+    def get_local_path(self):
+        return os.path.join(presets_dir, self.prefix, to_slug_case(self.name) + ".json")
 
     @Gtk.Template.Callback()
     def on_apply_button_clicked(self, *_args):
-        try:
-            PresetDownloader().download_preset(to_slug_case(self.name), self.prefix, self.url)
-        except (GLib.GError, json.JSONDecodeError, OSError):
-            logging.error("An error occurred while trying to download a preset.")
-            self.toast_overlay.add_toast(
-                Adw.Toast(title=_("Preset could not be downloaded"))
-            )
-        else:
-            self.app.load_preset_from_file(
-                os.path.join(
-                    os.environ.get("XDG_CONFIG_HOME",
-                                   os.environ["HOME"] + "/.config"),
-                    "presets",
-                    self.prefix,
-                    to_slug_case(self.name) + ".json",
-                )
-            )
-
-            self.toast_overlay.add_toast(
-                Adw.Toast(title=_("Preset downloaded")))
-            self.win.reload_pref_group()
-
-            logging.debug("Apply and download completed")
+        self.win.download_preset(self.item, apply=True)
 
     @Gtk.Template.Callback()
     def on_download_button_clicked(self, *_args):
-        try:
-            PresetDownloader().download_preset(to_slug_case(self.name), self.prefix, self.url)
-        except (GLib.GError, json.JSONDecodeError, OSError):
-            logging.error("An error occurred while trying to download a preset.")
-            self.toast_overlay.add_toast(
-                Adw.Toast(title=_("Preset could not be downloaded"))
-            )
-        else:
-            self.toast_overlay.add_toast(
-                Adw.Toast(title=_("Preset downloaded")))
-            self.win.reload_pref_group()
-            logging.debug("Download completed")
+        self.win.download_preset(self.item)
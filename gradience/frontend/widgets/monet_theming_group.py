@@ -24,6 +24,7 @@ from gradience.backend.theming.monet import Monet
 from gradience.backend.constants import rootdir
 
 from gradience.frontend.widgets.palette_shades import GradiencePaletteShades
+from gradience.frontend.utils.run_async import RunAsync, PRIORITY_HIGH
 
 from gradience.backend.logger import Logger
 
@@ -102,45 +103,52 @@ class GradienceMonetThemingGroup(Adw.PreferencesGroup):
     @Gtk.Template.Callback()
     def on_apply_button_clicked(self, *_args):
         if self.monet_image_file:
-            try:
-                monet_theme = Monet().generate_palette_from_image(self.monet_image_file)
-                #tone = self.tone_row.get_selected_item().get_string() # TODO: Remove tone requirement from Monet Engine
-                variant_pos = self.theme_row.props.selected
-
-                class variantEnum(Enum):
-                    AUTO = 0
-                    LIGHT = 1
-                    DARK = 2
-
-                def __get_variant_string():
-                    if variant_pos == variantEnum.AUTO.value:
-                        return "auto"
-                    elif variant_pos == variantEnum.DARK.value:
-                        return "dark"
-                    elif variant_pos == variantEnum.LIGHT.value:
-                        return "light"
-
-                variant_str = __get_variant_string()
-
-                self.app.custom_css_group.reset_buffer()
-
-                self.app.update_theme_from_monet(monet_theme, variant_str)
-            except (OSError, AttributeError, ValueError) as e:
-                logging.error("Failed to generate Monet palette", exc=e)
-                self.parent.toast_overlay.add_toast(
-                    Adw.Toast(title=_("Failed to generate Monet palette"))
-                )
-            else:
-                logging.info("Monet palette generated successfully")
-                self.parent.toast_overlay.add_toast(
-                    Adw.Toast(title=_("Palette generated"))
-                )
+            # Image decoding and color quantization can take a while, don't block the UI
+            RunAsync(Monet().generate_palette_from_image, self.on_palette_generated,
+                        self.monet_image_file, priority=PRIORITY_HIGH)
         else:
             logging.error("Input image for Monet generation not selected")
             self.parent.toast_overlay.add_toast(
                 Adw.Toast(title=_("Select an image first"))
             )
 
+    def on_palette_generated(self, monet_theme, error):
+        try:
+            if error:
+                raise error
+
+            #tone = self.tone_row.get_selected_item().get_string() # TODO: Remove tone requirement from Monet Engine
+            variant_pos = self.theme_row.props.selected
+
+            class variantEnum(Enum):
+                AUTO = 0
+                LIGHT = 1
+                DARK = 2
+
+            def __get_variant_string():
+                if variant_pos == variantEnum.AUTO.value:
+                    return "auto"
+                elif variant_pos == variantEnum.DARK.value:
+                    return "dark"
+                elif variant_pos == variantEnum.LIGHT.value:
+                    return "light"
+
+            variant_str = __get_variant_string()
+
+            self.app.custom_css_group.reset_buffer()
+
+            self.app.update_theme_from_monet(monet_theme, variant_str)
+        except (OSError, AttributeError, ValueError) as e:
+            logging.error("Failed to generate Monet palette", exc=e)
+            self.parent.toast_overlay.add_toast(
+                Adw.Toast(title=_("Failed to generate Monet palette"))
+            )
+        else:
+            logging.info("Monet palette generated successfully")
+            self.parent.toast_overlay.add_toast(
+                Adw.Toast(title=_("Palette generated"))
+            )
+
     @Gtk.Template.Callback()
     def on_file_chooser_button_clicked(self, *_args):
         self.monet_file_chooser.show()
@@ -37,33 +37,41 @@ class GradiencePluginRow(Adw.ActionRow):
     settings_button = Gtk.Template.Child("settings-button")
     remove_button = Gtk.Template.Child("remove-button")
 
-    def __init__(self, plugin_object, preset, plugins_list, **kwargs):
+    def __init__(self, plugin_entry, preset, plugins_list, **kwargs):
         super().__init__(**kwargs)
 
         self.plugins_list = plugins_list
 
-        self.plugin_object = plugin_object
+        # Plugin might not be loaded yet, so only metadata from its info file is used here
+        self.plugin_entry = plugin_entry
+        self.plugin_id = plugin_entry.plugin_id
         if not os.path.exists(
             os.path.join(
                 user_plugin_dir,
-                f"{self.plugin_object.plugin_id}.yapsy-plugin"
+                f"{self.plugin_id}.yapsy-plugin"
             )
         ):
             self.remove_button.set_visible(False)
 
-        self.set_name(plugin_object.plugin_id)
-        self.set_title(plugin_object.title)
-        self.set_subtitle("@" + plugin_object.plugin_id)
+        self.set_name(self.plugin_id)
+        self.set_title(plugin_entry.plugin_object.title if plugin_entry.is_loaded else plugin_entry.name)
+        self.set_subtitle("@" + self.plugin_id)
 
         self.enabled_plugins = self.plugins_list.enabled_plugins
-        if self.plugin_object.plugin_id in self.enabled_plugins:
+        if self.plugin_id in self.enabled_plugins:
             self.switch.set_active(True)
 
         self.give_preset_settings(preset)
 
     @Gtk.Template.Callback()
     def on_settings_plugin_clicked(self, *_args):
-        has_setting = self.plugin_object.open_settings()
+        plugin_object = self.plugins_list.load_plugin(self.plugin_id)
+        has_setting = False
+
+        if plugin_object:
+            plugin_object.give_preset_settings(self.preset_settings)
+            has_setting = plugin_object.open_settings()
+
         if not has_setting:
             win = GradienceNoPluginPrefWindow()
             win.set_transient_for(self.plugins_list.win)
@@ -74,7 +82,7 @@ class GradiencePluginRow(Adw.ActionRow):
         plugin_yapsy_file = (
             os.path.join(
                 user_plugin_dir,
-                f"{self.plugin_object.plugin_id}.yapsy-plugin"
+                f"{self.plugin_id}.yapsy-plugin"
             )
         )
         logging.debug(f"remove {plugin_yapsy_file}")
@@ -93,10 +101,15 @@ class GradiencePluginRow(Adw.ActionRow):
     @Gtk.Template.Callback()
     def on_switch_toggled(self, *_args):
         if self.switch.get_active():
-            self.plugins_list.enable_plugin(self.plugin_object.plugin_id)
+            self.plugins_list.enable_plugin(self.plugin_id)
+
+            if self.plugin_entry.is_loaded:
+                self.plugin_entry.plugin_object.give_preset_settings(self.preset_settings)
         else:
-            self.plugins_list.disable_plugin(self.plugin_object.plugin_id)
+            self.plugins_list.disable_plugin(self.plugin_id)
 
     def give_preset_settings(self, preset_settings):
         self.preset_settings = preset_settings
-        self.plugin_object.give_preset_settings(preset_settings)
+
+        if self.plugin_entry.is_loaded:
+            self.plugin_entry.plugin_object.give_preset_settings(preset_settings)
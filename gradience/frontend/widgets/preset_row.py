@@ -18,11 +18,9 @@
 
 import os
 
-from gi.repository import Gdk, Gtk, Adw
+from gi.repository import Gdk, Gtk, Adw, GLib
 
 #from gradience.frontend.views.share_window import GradienceShareWindow
-from gradience.backend.utils.common import to_slug_case
-from gradience.backend.models.preset import Preset
 from gradience.backend.constants import rootdir
 
 from gradience.backend.logger import Logger
@@ -44,24 +42,34 @@ class GradiencePresetRow(Adw.ExpanderRow):
     star_button = Gtk.Template.Child("star_button")
     badge_list = Gtk.Template.Child("badge_list")
     no_badges = Gtk.Template.Child("no_badges")
+    thumbnail = Gtk.Template.Child("thumbnail")
 
-    def __init__(self, name, preset_path, win, repo_name, author="", **kwargs):
+    def __init__(self, win, **kwargs):
         super().__init__(**kwargs)
 
-        self.name = name
-
-        self.prefix = to_slug_case(repo_name)
-
-        self.set_name(name)
-        self.set_title(name)
-        self.set_subtitle(repo_name)
-        self.name_entry.set_text(name)
-
         self.app = Gtk.Application.get_default()
         self.win = win
         self.toast_overlay = self.win.toast_overlay
 
-        self.preset = Preset().new_from_path(preset_path)
+        self.item = None
+        self.preset = None
+        self.badges = []
+
+        # self.share_button.connect("clicked", self.on_share_btn_clicked)
+
+    def bind(self, item):
+        """ Binds a recycled row to a `PresetItem` from the presets list model. """
+        self.item = item
+
+        self.name = item.props.display_name
+        self.prefix = item.prefix
+
+        self.set_name(self.name)
+        self.set_title(self.name)
+        self.set_subtitle(item.props.repo_name)
+        self.name_entry.set_text(self.name)
+
+        self.preset = item.get_preset()
 
         if self.preset.badges:
             self.has_badges = True
@@ -72,15 +80,44 @@ class GradiencePresetRow(Adw.ExpanderRow):
                 badge.get_style_context().add_class("tag")
                 badge.set_valign(Gtk.Align.CENTER)
                 badge.get_style_context().add_class("caption")
-                badge.get_style_context().add_class(f"badge-{badge}")
+                badge.get_style_context().add_class(f"badge-{badge_name}")
                 self.badge_list.append(badge)
+                self.badges.append(badge)
         else:
             self.has_badges = False
             self.no_badges.set_visible(True)
 
-        # self.share_button.connect("clicked", self.on_share_btn_clicked)
+        self.update_star_button()
+
+        self.win.thumbnailer.get_thumbnail_async(
+            item.props.preset_path, self.on_thumbnail_ready, item)
+
+    def on_thumbnail_ready(self, thumbnail_path, item):
+        # Row could have been recycled for another preset in the meantime
+        if thumbnail_path and self.item is item:
+            self.thumbnail.set_from_file(thumbnail_path)
+            self.thumbnail.set_visible(True)
+
+        return GLib.SOURCE_REMOVE
 
-        if name in self.win.app.favourite:
+    def unbind(self):
+        # Reset per-item state, so it won't leak to the next bound item
+        self.item = None
+        self.preset = None
+
+        for badge in self.badges:
+            self.badge_list.remove(badge)
+        self.badges.clear()
+
+        self.thumbnail.set_visible(False)
+        self.thumbnail.clear()
+
+        self.set_expanded(False)
+        self.name_entry_toggle.set_active(False)
+        self.value_stack.set_visible_child(self.apply_button)
+
+    def update_star_button(self):
+        if self.name in self.win.app.favourite:
             self.star_button.set_icon_name("star-large-symbolic")
             self.star_button.set_tooltip_text(_("Remove from Favorites"))
         else:
@@ -93,15 +130,16 @@ class GradiencePresetRow(Adw.ExpanderRow):
 
     def show_unsaved_dialog(self, *_args):
         dialog, preset_entry = self.app.construct_unsaved_dialog()
+        preset_path = self.preset.preset_path
 
         def on_unsaved_dialog_response(_widget, response, preset_entry):
             if response == "save":
                 self.app.preset.save_to_file(preset_entry.get_text(), self.app.plugins_list)
                 self.app.clear_dirty()
-                self.app.load_preset_from_file(self.preset.preset_path)
+                self.app.load_preset_from_file(preset_path)
             elif response == "discard":
                 self.app.clear_dirty()
-                self.app.load_preset_from_file(self.preset.preset_path)
+                self.app.load_preset_from_file(preset_path)
 
         dialog.connect("response", on_unsaved_dialog_response, preset_entry)
 
@@ -114,9 +152,8 @@ class GradiencePresetRow(Adw.ExpanderRow):
         else:
             self.app.load_preset_from_file(self.preset.preset_path)
 
-    def on_undo_button_clicked(self, *_args):
-        self.delete_preset = False
-        self.delete_toast.dismiss()
+    def on_undo_button_clicked(self, _toast, item):
+        item.pending_deletion = False
 
     @Gtk.Template.Callback()
     def on_name_entry_changed(self, *_args):
@@ -128,23 +165,26 @@ class GradiencePresetRow(Adw.ExpanderRow):
     def on_name_entry_toggled(self, *_args):
         if self.name_entry_toggle.get_active():
             self.value_stack.set_visible_child(self.name_entry)
-        else:
+        elif self.item:
+            old_path = self.item.props.preset_path
+
             self.preset.rename(self.name_entry.get_text())
             self.value_stack.set_visible_child(self.apply_button)
 
+            # Catalog replaces the item, as paths are its keys
+            self.app.preset_catalog.refresh_path(old_path)
+            self.app.preset_catalog.refresh_path(self.preset.preset_path)
+
     @Gtk.Template.Callback()
     def on_star_button_clicked(self, *_args):
         if self.name in self.win.app.favourite:
             self.win.app.favourite.remove(self.name)
-            self.star_button.set_icon_name("non-starred-symbolic")
-            self.star_button.set_tooltip_text(_("Add to Favorites"))
         else:
             self.win.app.favourite.add(self.name)
-            self.star_button.set_icon_name("starred-symbolic")
-            self.star_button.set_tooltip_text(_("Remove from Favorites"))
 
         self.win.app.save_favourite()
-        self.win.reload_pref_group()
+        self.win.app.update_presets_menu_item(self.item)
+        self.update_star_button()
 
     @Gtk.Template.Callback()
     def on_report_button_clicked(self, *_args):
@@ -156,50 +196,49 @@ class GradiencePresetRow(Adw.ExpanderRow):
 
     @Gtk.Template.Callback()
     def on_remove_button_clicked(self, *_args):
-        self.delete_preset = True
-        self.delete_toast = Adw.Toast(title=_("Preset removed"))
-        self.delete_toast.set_button_label(_("Undo"))
-        self.delete_toast.connect("dismissed", self.on_delete_toast_dismissed)
-        self.delete_toast.connect(
-            "button-clicked", self.on_undo_button_clicked)
+        # This row can get recycled for another preset before the toast is dismissed, \
+        # so the deletion state is kept in the list item instead
+        item = self.item
+        item.pending_deletion = True
 
-        self.toast_overlay.add_toast(self.delete_toast)
+        delete_toast = Adw.Toast(title=_("Preset removed"))
+        delete_toast.set_button_label(_("Undo"))
+        delete_toast.connect("dismissed", self.on_delete_toast_dismissed, item)
+        delete_toast.connect(
+            "button-clicked", self.on_undo_button_clicked, item)
+
+        self.toast_overlay.add_toast(delete_toast)
 
         try:
             os.rename(
-                self.preset.preset_path,
-                self.preset.preset_path + ".to_delete",
+                item.props.preset_path,
+                item.props.preset_path + ".to_delete",
             )
         except OSError as e:
             logging.error("Unable to rename an preset for later deletion.", exc=e)
         else:
-            self.set_name(self.name + "(" + _("Pending Deletion") + ")")
-            self.props.visible = False
-        finally:
-            self.delete_preset = True
-
-    def on_delete_toast_dismissed(self, widget):
-        if self.delete_preset:
-            logging.info(f"Deleting preset {self.preset.display_name}")
-            logging.debug("Preset filename:" + self.preset.preset_path + ".to_delete")
+            self.app.preset_catalog.refresh_path(item.props.preset_path)
+
+    def on_delete_toast_dismissed(self, _toast, item):
+        preset_path = item.props.preset_path
+
+        if item.pending_deletion:
+            logging.info(f"Deleting preset {item.props.display_name}")
+            logging.debug("Preset filename:" + preset_path + ".to_delete")
             try:
-                os.remove(self.preset.preset_path + ".to_delete")
+                os.remove(preset_path + ".to_delete")
             except OSError as e:
                 logging.error("Unable to delete an preset.", exc=e)
                 self.toast_overlay.add_toast(
                     Adw.Toast(title=_("Unable to delete preset"))
                 )
-            finally:
-                self.win.reload_pref_group()
         else:
             try:
                 os.rename(
-                    self.preset.preset_path + ".to_delete",
-                    self.preset.preset_path
+                    preset_path + ".to_delete",
+                    preset_path
                 )
             except OSError as e:
                 logging.error("Unable to rename an preset.", exc=e)
             finally:
-                self.win.reload_pref_group()
-
-        self.delete_preset = True
+                self.app.preset_catalog.refresh_path(preset_path)
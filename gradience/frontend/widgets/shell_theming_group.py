@@ -21,7 +21,8 @@ from subprocess import SubprocessError
 
 from gi.repository import GObject, GLib, Gio, Gtk, Adw
 
-from gradience.backend.utils.gnome import is_gnome_available, is_shell_ext_installed
+from gradience.backend.utils.gnome import is_gnome_available, is_shell_ext_installed_async, \
+    get_full_shell_version_async, invalidate_gnome_environment
 from gradience.backend.utils.subprocess import GradienceSubprocess
 from gradience.backend.constants import rootdir
 from gradience.backend.exceptions import UnsupportedShellVersion
@@ -110,10 +111,6 @@ class GradienceShellThemingGroup(Adw.PreferencesGroup):
 
     @Gtk.Template.Callback()
     def on_apply_button_clicked(self, *_args):
-        user_themes_available = is_shell_ext_installed(ShellTheme().THEME_EXT_NAME)
-        user_themes_enabled = is_shell_ext_installed(
-                ShellTheme().THEME_EXT_NAME, check_enabled=True)
-
         if not is_gnome_available():
             dialog = Adw.MessageDialog(transient_for=self.win, heading=_("GNOME Shell Missing"),
                 body=_("Shell Engine is designed to work only on systems running GNOME. You can still generate themes on other desktop environments, but it won't have any affect on them."))
@@ -125,7 +122,13 @@ class GradienceShellThemingGroup(Adw.PreferencesGroup):
 
             dialog.connect("response", self.on_shell_missing_response)
             dialog.present()
-        elif is_gnome_available() and not user_themes_available:
+            return
+
+        # Extension checks query the host system, so run them without blocking the UI
+        is_shell_ext_installed_async(ShellTheme.THEME_EXT_NAME, self._on_user_themes_checked)
+
+    def _on_user_themes_checked(self, user_themes_available):
+        if not user_themes_available:
             dialog = Adw.MessageDialog(transient_for=self.win, heading=_("User Themes Extension Missing"),
                 body=_("Gradience requires the User Themes extension installed to apply the Shell theme. You can still generate a theme, but you won't be able to apply it without this extension."))
 
@@ -136,7 +139,15 @@ class GradienceShellThemingGroup(Adw.PreferencesGroup):
 
             dialog.connect("response", self.on_user_themes_missing_response)
             dialog.present()
-        elif is_gnome_available() and user_themes_available and not user_themes_enabled:
+
+            # User is likely to install the extension now, so check it again next time
+            invalidate_gnome_environment()
+        else:
+            is_shell_ext_installed_async(ShellTheme.THEME_EXT_NAME,
+                    self._on_user_themes_enabled_checked, check_enabled=True)
+
+    def _on_user_themes_enabled_checked(self, user_themes_enabled):
+        if not user_themes_enabled:
             dialog = Adw.MessageDialog(transient_for=self.win, heading=_("User Themes Extension Disabled"),
                 body=_("The User Themes extension is currently disabled on your system. Please enable it to apply the theme."))
 
@@ -149,10 +160,23 @@ class GradienceShellThemingGroup(Adw.PreferencesGroup):
 
             dialog.connect("response", self.on_user_themes_disabled_response)
             dialog.present()
+
+            invalidate_gnome_environment()
         else:
             self.apply_shell_theme()
 
     def apply_shell_theme(self):
+        get_full_shell_version_async(self._on_shell_version_retrieved)
+
+    def _on_shell_version_retrieved(self, full_shell_version):
+        # ShellTheme would try to detect the version again, synchronously
+        if full_shell_version is None:
+            logging.error("Unable to detect GNOME Shell version.")
+            self.toast_overlay.add_toast(
+                Adw.Toast(title=_("Unable to detect GNOME Shell version."))
+            )
+            return
+
         variant_pos = self.variant_row.props.selected
 
         class variantEnum(Enum):
@@ -168,11 +192,13 @@ class GradienceShellThemingGroup(Adw.PreferencesGroup):
         variant_str = __get_variant_string()
 
         try:
-            ShellTheme().apply_theme_async(self, self._on_shell_theme_done,
-                                            variant_str, self.app.preset)
+            shell_version = int(full_shell_version.strip().split(".")[0])
+
+            ShellTheme(shell_version=shell_version).apply_theme_async(self,
+                                            self._on_shell_theme_done, variant_str, self.app.preset)
         except UnsupportedShellVersion as exception_message:
             logging.error(exception_message)
-            GradienceUnsupportedShellDialog(self.parent).present()
+            GradienceUnsupportedShellDialog(self.parent, shell_version=full_shell_version).present()
         except (ValueError, OSError, GLib.GError) as e:
             logging.error(
                 "An error occurred while generating a Shell theme.", exc=e)